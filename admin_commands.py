@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import hmac
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+from flask import Flask, jsonify, request
+from config import Config, ConfigStore, config_store
+from suppression import suppressed_chats
+
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import ContextTypes
+
+logger = logging.getLogger(__name__)
+
+
+def is_admin(chat_id) -> bool:
+    """Admin commands are limited to ADMIN_CHAT_IDS"""
+    return chat_id in config_store.current().admin_chat_ids
+
+
+async def suppressed_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /suppressed command: list chats parked after permanent failures"""
+    if not is_admin(update.effective_chat.id):
+        await update.message.reply_text("❌ This command is restricted to bot admins.")
+        return
+
+    entries = suppressed_chats.entries()
+    if not entries:
+        await update.message.reply_text("✅ No suppressed chats.")
+        return
+
+    lines = [f"🚫 Suppressed chats ({len(entries)}):", ""]
+    for chat_id, entry in sorted(entries.items(), key=lambda item: item[1]['since']):
+        since = datetime.fromtimestamp(entry['since']).strftime('%Y-%m-%d %H:%M')
+        lines.append(f"• {chat_id} - {entry['reason']} (since {since})")
+    lines.append("")
+    lines.append("Use /restore <chat_id> to deliver to a chat again.")
+    await update.message.reply_text("\n".join(lines))
+
+
+async def restore_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /restore <chat_id> command"""
+    if not is_admin(update.effective_chat.id):
+        await update.message.reply_text("❌ This command is restricted to bot admins.")
+        return
+
+    if not context.args:
+        await update.message.reply_text("Usage: /restore <chat_id>")
+        return
+
+    try:
+        chat_id = int(context.args[0])
+    except ValueError:
+        await update.message.reply_text(f"❌ Invalid chat id: {context.args[0]}")
+        return
+
+    if suppressed_chats.restore(chat_id):
+        logger.info(f"Chat {chat_id} restored by admin {update.effective_chat.id}")
+        await update.message.reply_text(f"✅ Chat {chat_id} restored.")
+    else:
+        await update.message.reply_text(f"ℹ️ Chat {chat_id} was not suppressed.")
+
+
+def has_admin_token() -> bool:
+    """Whether the current HTTP request carries ADMIN_TOKEN in X-Admin-Token"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(Config.ADMIN_TOKEN) and hmac.compare_digest(token, Config.ADMIN_TOKEN)
+
+
+def register_reload_route(app: Flask, store: Optional[ConfigStore] = None, path: str = "/admin/reload"):
+    """Serve an authenticated config reload on an existing Flask app"""
+    store = store or config_store
+
+    def admin_reload():
+        """Re-read filters and chat lists; a JSON body may override individual keys"""
+        if not has_admin_token():
+            logger.warning("Config reload with invalid admin token")
+            return jsonify({"error": "Unauthorized"}), 401
+        try:
+            snapshot = store.reload(request.get_json(silent=True) or None)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid config: {e}"}), 400
+        return jsonify({"status": "reloaded", "config": snapshot.summary()}), 200
+
+    app.add_url_rule(path, 'admin_reload', admin_reload, methods=['POST'])
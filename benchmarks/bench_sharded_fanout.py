@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Broadcast throughput of sharded delivery vs the number of shard processes
+
+Every run sends one signal to `--chats` recipients through the mock Bot
+API. `--latency` models the Telegram round trip; on real deployments the
+per-message CPU cost (TLS, JSON) is what the extra processes parallelize,
+so expect near-linear gains only up to the number of cores.
+
+    python benchmarks/bench_sharded_fanout.py --chats 5000 --shards 1 2 4 8
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+
+from benchmarks.mock_bot_api import MockBotAPI
+from sharded_delivery import ShardedDelivery
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chats', type=int, default=2000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=8, help="sender threads per shard")
+    parser.add_argument('--latency', type=float, default=0.005)
+    args = parser.parse_args()
+
+    chat_ids = list(range(1, args.chats + 1))
+    text = "🟢📈 <b>TRADING SIGNAL</b>\n\n📊 <b>Symbol:</b> BTCUSD\n🎯 <b>Action:</b> BUY"
+    print(f"{args.chats} recipients, {args.threads} threads/shard, {args.latency * 1000:.1f}ms latency, "
+          f"{os.cpu_count()} CPU(s)")
+
+    baseline = None
+    with MockBotAPI(latency=args.latency) as mock:
+        for shards in args.shards:
+            # Unlimited budget: this measures delivery capacity, not Telegram's limits
+            with ShardedDelivery(shards=shards, threads_per_shard=args.threads, global_rate=1e9,
+                                 chat_rate=1e9, base_url=mock.url) as delivery:
+                delivery.broadcast(chat_ids[:shards * args.threads], text)  # warm up pools
+                report = delivery.broadcast(chat_ids, text)
+            rate = report.sent / report.elapsed
+            baseline = baseline or rate
+            print(f"shards={shards:<3} sent={report.sent:<6} failed={report.failed:<4} "
+                  f"{report.elapsed:6.2f}s {rate:8.0f} msg/s  x{rate / baseline:.2f}")
+
+
+if __name__ == '__main__':
+    main()
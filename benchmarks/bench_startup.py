@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Cold start: import cost of the web entry points and time to first /health
+
+For every app module this runs `python -X importtime -c "import <module>"`
+in fresh interpreters and reports the median total plus the heaviest
+top-level imports, then starts the server and times spawn -> first 200
+from /health. Pass `--record` to append the run to
+benchmarks/startup_history.jsonl so regressions show up over time.
+
+    python benchmarks/bench_startup.py --runs 5 --record
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.load_harness import free_port
+
+HISTORY_FILE = os.path.join(ROOT, "benchmarks", "startup_history.jsonl")
+ENV = dict(os.environ, BOT_TOKEN="123456:STARTUP", PYTHONDONTWRITEBYTECODE="")
+
+
+def import_profile(module: str):
+    """Total import time and per top-level package cumulative time, in ms"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=ENV, capture_output=True, text=True, check=True)
+    # Children are printed before their parent, so collect direct children until the module's own line
+    children = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            if name.strip() == module:
+                return int(cumulative) / 1000, children
+            children = {}
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def time_to_health(module: str, timeout: float = 30) -> float:
+    """Seconds from process spawn to the first 200 from /health"""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, f"{module}.py"], cwd=ROOT, env=dict(ENV, PORT=str(port)),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - started
+            except requests.RequestException:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError(f"{module} did not become healthy")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def git_revision() -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=["webhook_server_clean", "webhook_server", "combined_bot"])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=6, help="heaviest imports to list per module")
+    parser.add_argument('--no-serve', action='store_true', help="skip the time-to-/health measurement")
+    parser.add_argument('--record', action='store_true', help=f"append results to {os.path.relpath(HISTORY_FILE, ROOT)}")
+    args = parser.parse_args()
+
+    record = {"revision": git_revision(), "timestamp": int(time.time()), "python": sys.version.split()[0],
+              "modules": {}}
+    for module in args.modules:
+        totals, packages = [], defaultdict(list)
+        for _ in range(args.runs):
+            total, breakdown = import_profile(module)
+            totals.append(total)
+            for name, ms in breakdown.items():
+                packages[name].append(ms)
+        heaviest = sorted(((statistics.median(v), k) for k, v in packages.items()), reverse=True)[:args.top]
+
+        entry = {"import_ms": round(statistics.median(totals), 1)}
+        print(f"{module}: import {entry['import_ms']:.1f}ms (median of {args.runs})")
+        for ms, name in heaviest:
+            print(f"    {ms:8.1f}ms  {name}")
+        if not args.no_serve:
+            entry["health_ms"] = round(statistics.median(time_to_health(module) for _ in range(args.runs)) * 1000, 1)
+            print(f"    first /health after {entry['health_ms']:.1f}ms")
+        entry["top"] = {name: round(ms, 1) for ms, name in heaviest}
+        record["modules"][module] = entry
+
+    if args.record:
+        with open(HISTORY_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Recorded in {os.path.relpath(HISTORY_FILE, ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Broadcast throughput vs the number of bot tokens in the pool
+
+Each token keeps its own rate budget (`--rate` msg/s, Telegram allows ~30
+per bot), so with the budget as the bottleneck the time to reach every
+recipient should drop roughly linearly with the number of tokens.
+
+    python benchmarks/bench_token_pool.py --chats 1200 --rate 200 --tokens 1 2 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+
+from benchmarks.mock_bot_api import MockBotAPI
+from delivery import DeliveryEngine
+from rate_limiter import RateLimiter
+from retry_engine import RetryEngine
+from suppression import SuppressionList
+from telegram_api import TelegramAPI
+from token_pool import ChatReach, TokenPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chats', type=int, default=1200)
+    parser.add_argument('--tokens', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--rate', type=float, default=200, help="per-token global rate, msg/s")
+    parser.add_argument('--latency', type=float, default=0.001)
+    args = parser.parse_args()
+
+    chat_ids = list(range(1, args.chats + 1))
+    text = "🟢📈 <b>TRADING SIGNAL</b>\n\n📊 <b>Symbol:</b> BTCUSD\n🎯 <b>Action:</b> BUY"
+    print(f"{args.chats} recipients, {args.rate:.0f} msg/s per token, {args.latency * 1000:.1f}ms latency")
+
+    baseline = None
+    with MockBotAPI(latency=args.latency) as mock:
+        for count in args.tokens:
+            suppression = SuppressionList(None)
+
+            def engine_factory(token, bot_suppression):
+                # Empty bucket: the run measures the sustained rate, not the initial burst
+                limiter = RateLimiter(args.rate, chat_rate=1e9)
+                limiter.global_bucket.reserve(limiter.global_bucket.available)
+                return DeliveryEngine(TelegramAPI(token=token, base_url=mock.url),
+                                      RetryEngine(rate_limiter=limiter), bot_suppression)
+
+            tokens = [f"{100000 + i}:BENCHMARK" for i in range(count)]
+            pool = TokenPool(tokens, suppression=suppression, engine_factory=engine_factory, reach=ChatReach())
+            # Every recipient has started every bot
+            for chat_id in chat_ids:
+                for bot in pool.engines:
+                    pool.record_reach(chat_id, bot)
+            started = time.perf_counter()
+            results = pool.broadcast(chat_ids, text)
+            elapsed = time.perf_counter() - started
+            sent = sum(result.ok for result in results)
+            rate = sent / elapsed
+            baseline = baseline or rate
+            shares = "/".join(str(len(part)) for part in pool.partition(chat_ids).values())
+            print(f"tokens={count:<3} sent={sent:<6} {elapsed:6.2f}s {rate:8.0f} msg/s  x{rate / baseline:.2f}  "
+                  f"(chats per token {shares})")
+
+
+if __name__ == '__main__':
+    main()
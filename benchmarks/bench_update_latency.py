@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Callback round-trip latency: getUpdates polling vs webhook ingestion
+
+A button tap is pushed through the mock Bot API and timed until the bot's
+answerCallbackQuery reaches the mock. `--latency` adds a fixed delay to
+every mock response (and to webhook pushes) to model the network hop to
+Telegram. `--burst` taps land at once: with polling, taps arriving while a
+getUpdates response is in flight wait for the next poll cycle, with a
+webhook each tap is pushed independently.
+
+    python benchmarks/bench_update_latency.py --iterations 200 --latency 0.02 --burst 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from telegram.ext import Application, CallbackQueryHandler
+from werkzeug.serving import make_server
+
+from benchmarks.mock_bot_api import MockBotAPI
+from telegram_webhook import TelegramUpdateBridge, register_update_route, serve_webhook_updates
+
+TOKEN = "123456:BENCHMARK"
+SECRET = "bench-secret"
+
+
+async def on_callback(update, context):
+    await update.callback_query.answer()
+
+
+def callback_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": f"q{update_id}",
+            "from": {"id": 42, "is_bot": False, "first_name": "Bench"},
+            "chat_instance": "bench",
+            "data": "menu_price"
+        }
+    }
+
+
+def build_application(mock: MockBotAPI):
+    application = Application.builder().token(TOKEN).base_url(f"{mock.url}/bot").build()
+    application.add_handler(CallbackQueryHandler(on_callback))
+    return application
+
+
+def round_trip(mock: MockBotAPI, update_id: int) -> float:
+    started = time.perf_counter()
+    mock.push_update(callback_update(update_id))
+    answered = mock.wait_for('answerCallbackQuery', lambda p: p.get('callback_query_id') == f"q{update_id}")
+    return answered - started
+
+
+def run_taps(mock: MockBotAPI, iterations: int, burst: int):
+    """Push `burst` concurrent taps per iteration and collect every round trip"""
+    samples = []
+    with ThreadPoolExecutor(max_workers=burst) as pool:
+        for i in range(iterations):
+            first_id = i * burst + 1
+            samples.extend(pool.map(lambda update_id: round_trip(mock, update_id), range(first_id, first_id + burst)))
+    return samples
+
+
+async def run_polling(mock: MockBotAPI, iterations: int, burst: int):
+    application = build_application(mock)
+    async with application:
+        await application.start()
+        await application.updater.start_polling(poll_interval=0, timeout=10)
+        try:
+            return await asyncio.to_thread(run_taps, mock, iterations, burst)
+        finally:
+            await application.updater.stop()
+            await application.stop()
+
+
+async def run_webhook(mock: MockBotAPI, iterations: int, burst: int):
+    application = build_application(mock)
+    flask_app = Flask(__name__)
+    bridge = TelegramUpdateBridge(secret_token=SECRET)
+    register_update_route(flask_app, bridge, "/telegram")
+
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/telegram"
+
+    serving = asyncio.create_task(serve_webhook_updates(application, bridge, url=url))
+    try:
+        while not bridge.ready:
+            await asyncio.sleep(0.01)
+        return await asyncio.to_thread(run_taps, mock, iterations, burst)
+    finally:
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+        server.shutdown()
+        mock.webhook_url = None
+
+
+def summarize(name: str, samples):
+    samples_ms = sorted(s * 1000 for s in samples)
+    p95 = samples_ms[int(len(samples_ms) * 0.95) - 1]
+    print(f"{name:<10} n={len(samples_ms):<5} mean={statistics.mean(samples_ms):7.2f}ms "
+          f"p50={statistics.median(samples_ms):7.2f}ms p95={p95:7.2f}ms max={samples_ms[-1]:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help="simulated one-way network delay in seconds")
+    parser.add_argument('--burst', type=int, default=1, help="concurrent taps per iteration")
+    args = parser.parse_args()
+
+    print(f"Callback round trip, {args.iterations}x{args.burst} taps, simulated latency {args.latency * 1000:.0f}ms")
+    with MockBotAPI(latency=args.latency) as mock:
+        summarize("polling", asyncio.run(run_polling(mock, args.iterations, args.burst)))
+        mock.reset()
+        summarize("webhook", asyncio.run(run_webhook(mock, args.iterations, args.burst)))
+
+
+if __name__ == '__main__':
+    main()
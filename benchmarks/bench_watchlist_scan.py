@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Scan time per bar close of the vectorized watchlist scanner
+
+Each run warms the scanner up past the indicator lengths, then times
+`--bars` scans of a random-walk watchlist. The per-symbol column runs the
+same strategy through indicators.MaCrossStrategy, one symbol at a time,
+on the smallest watchlist as the reference cost.
+
+    python benchmarks/bench_watchlist_scan.py --symbols 1000 5000 10000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from indicators import Bar, MaCrossStrategy
+from watchlist_scanner import WatchlistScanner
+
+WARM_UP = 40
+
+
+def random_walk(symbols: int, bars: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.01, size=(symbols, bars))
+    return 100.0 * np.exp(np.cumsum(steps, axis=1))
+
+
+def time_scanner(closes: np.ndarray):
+    symbols, bars = closes.shape
+    scanner = WatchlistScanner([f"SYM{i}" for i in range(symbols)])
+    timings, fired = [], 0
+    for column in range(bars):
+        started = time.perf_counter()
+        fired += len(scanner.scan(closes[:, column], 1700000000 + 60 * column))
+        if column >= WARM_UP:
+            timings.append(time.perf_counter() - started)
+    return timings, fired
+
+
+def time_per_symbol(closes: np.ndarray) -> float:
+    symbols, bars = closes.shape
+    strategies = [MaCrossStrategy() for _ in range(symbols)]
+    timings = []
+    for column in range(bars):
+        started = time.perf_counter()
+        for row, strategy in enumerate(strategies):
+            close = float(closes[row, column])
+            strategy.update(Bar(column, close, close, close, close))
+        if column >= WARM_UP:
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, nargs='+', default=[1000, 5000, 10000])
+    parser.add_argument('--bars', type=int, default=200, help="timed bar closes per run")
+    args = parser.parse_args()
+
+    print(f"{args.bars} timed bars after {WARM_UP} warm-up bars, {os.cpu_count()} CPU(s)")
+    for symbols in args.symbols:
+        closes = random_walk(symbols, WARM_UP + args.bars)
+        timings, fired = time_scanner(closes)
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        line = (f"symbols={symbols:<6} median {statistics.median(timings) * 1000:7.3f}ms/bar  "
+                f"p99 {p99 * 1000:7.3f}ms  {statistics.median(timings) / symbols * 1e9:6.0f}ns/symbol  "
+                f"signals={fired}")
+        if symbols == min(args.symbols):
+            reference = time_per_symbol(closes)
+            line += f"  (per-symbol loop {reference * 1000:.1f}ms/bar)"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Load harness: fire TradingView-style webhooks at a real server process
+
+Starts the mock Bot API, launches the webhook server (gunicorn with N
+workers, or the Flask dev server) pointed at it, replays webhooks with a
+share of duplicates, then checks what reached "Telegram":
+
+* every unique signal was delivered exactly once per chat (cross-worker dedupe)
+* the send rate never exceeded the configured global budget (shared buckets)
+
+With several `--broadcast` modes the run is repeated per mode and the Bot
+API calls per signal are compared: `direct` messages every chat, `channel`
+posts once to a channel (BROADCAST_CHANNELS), `notify` posts once and sends
+every chat a one-line notice.
+
+    python benchmarks/load_harness.py --workers 4 --requests 200 --chats 5
+    python benchmarks/load_harness.py --workers 0 --chats 50 --broadcast direct channel notify
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_bot_api import MockBotAPI
+
+SECRET = "harness_secret"
+CHANNEL = "@harness_channel"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, mock: MockBotAPI, state_dir: str, port: int, extra_env=None) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        BOT_TOKEN="123456:HARNESS",
+        TELEGRAM_API_BASE_URL=mock.url,
+        WEBHOOK_SECRET=SECRET,
+        ALLOWED_CHAT_IDS=",".join(str(100 + i) for i in range(args.chats)),
+        TELEGRAM_GLOBAL_RATE=str(args.global_rate),
+        TELEGRAM_CHAT_RATE=str(args.global_rate),
+        SUPPRESSION_FILE=os.path.join(state_dir, "suppressed.json"),
+        PORT=str(port),
+    )
+    env.update(extra_env or {})
+    if args.workers:
+        env["SHARED_STATE_PATH"] = os.path.join(state_dir, "state.sqlite3")
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                   "--workers", str(args.workers), "--bind", f"127.0.0.1:{port}",
+                   "--access-logfile", "/dev/null", "--log-level", "warning", args.app]
+    else:
+        command = [sys.executable, f"{args.app.split(':')[0]}.py"]
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_healthy(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Server did not become healthy")
+
+
+def build_payloads(count: int, duplicate_ratio: float, rng: random.Random):
+    """Signal bodies, where a share are byte-identical repeats of earlier ones"""
+    payloads, unique = [], []
+    for i in range(count):
+        if unique and rng.random() < duplicate_ratio:
+            payloads.append(rng.choice(unique))
+            continue
+        body = json.dumps({
+            "secret": SECRET,
+            "action": rng.choice(["BUY", "SELL", "LONG", "SHORT"]),
+            "symbol": rng.choice(["BTCUSD", "ETHUSD", "SOLUSD", "ADAUSD"]),
+            "price": f"{rng.uniform(10, 70000):.2f}",
+            "strategy": rng.choice(["EMA Cross", "RSI Levels", "MACD"]),
+            "timestamp": str(int(time.time() * 1000) + i)
+        })
+        unique.append(body)
+        payloads.append(body)
+    return payloads, len(unique)
+
+
+def max_rate(timestamps, window: float = 1.0) -> int:
+    """Largest number of events inside any sliding window"""
+    timestamps = sorted(timestamps)
+    best, start = 0, 0
+    for end, ts in enumerate(timestamps):
+        while ts - timestamps[start] > window:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+def fire(base_url: str, payloads, concurrency: int):
+    session_pool = [requests.Session() for _ in range(concurrency)]
+
+    def post(indexed):
+        index, body = indexed
+        session = session_pool[index % concurrency]
+        return session.post(f"{base_url}/webhook", data=body,
+                            headers={'Content-Type': 'application/json'}, timeout=120).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(post, enumerate(payloads)))
+    return statuses, time.perf_counter() - started
+
+
+def broadcast_env(mode: str, rate: float):
+    if mode == "direct":
+        return {"BROADCAST_CHANNELS": ""}
+    suffix = ":notify" if mode == "notify" else ""
+    return {"BROADCAST_CHANNELS": f"*={CHANNEL}{suffix}", "BROADCAST_RATE": str(rate)}
+
+
+def expected_sends(mode: str, unique: int, chats: int) -> int:
+    return unique * {"direct": chats, "channel": 1, "notify": 1 + chats}[mode]
+
+
+def run(args, payloads, unique: int, mode: str) -> int:
+    with MockBotAPI() as mock, tempfile.TemporaryDirectory() as state_dir:
+        port = free_port()
+        server = start_server(args, mock, state_dir, port, broadcast_env(mode, args.global_rate))
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            wait_healthy(base_url)
+            mock.reset()
+            statuses, elapsed = fire(base_url, payloads, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        sends = [ts for ts, method, _ in mock.calls if method == 'sendMessage']
+        expected = expected_sends(mode, unique, args.chats)
+        peak = max_rate(sends)
+
+        server_mode = f"gunicorn x{args.workers}" if args.workers else "flask dev server"
+        print(f"Server:            {server_mode} ({args.app}), {mode} delivery")
+        print(f"Webhooks:          {len(payloads)} ({unique} unique) in {elapsed:.2f}s -> {len(payloads) / elapsed:.1f} req/s")
+        print(f"HTTP statuses:     {dict((s, statuses.count(s)) for s in sorted(set(statuses)))}")
+        print(f"sendMessage calls: {len(sends)} (expected {expected}) {'OK' if len(sends) == expected else 'MISMATCH'}")
+        # A bucket allows its burst capacity plus one second of refill in any 1s window;
+        # notify mode spends two budgets, the channel's and the private chats'
+        limit = 2 * args.global_rate * (2 if mode == "notify" else 1)
+        print(f"Peak send rate:    {peak}/s (limit {limit:g} = burst + 1s refill) "
+              f"{'OK' if peak <= limit * 1.02 else 'EXCEEDED'}")
+        return len(mock.calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', default="webhook_server_clean:app")
+    parser.add_argument('--workers', type=int, default=4, help="gunicorn workers, 0 = Flask dev server")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--chats', type=int, default=5)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.2)
+    parser.add_argument('--global-rate', type=float, default=200, help="TELEGRAM_GLOBAL_RATE for the run")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--broadcast', nargs='+', default=["direct"], choices=["direct", "channel", "notify"],
+                        help="delivery modes to run and compare")
+    args = parser.parse_args()
+
+    payloads, unique = build_payloads(args.requests, args.duplicate_ratio, random.Random(args.seed))
+
+    calls = {}
+    for mode in args.broadcast:
+        calls[mode] = run(args, payloads, unique, mode)
+        print()
+    if len(calls) > 1:
+        baseline = calls.get("direct") or next(iter(calls.values()))
+        print(f"Bot API calls per signal ({args.chats} chats):")
+        for mode, count in calls.items():
+            print(f"  {mode:<8} {count / unique:8.1f}  x{count / baseline:.2f}")
+
+
+if __name__ == '__main__':
+    main()
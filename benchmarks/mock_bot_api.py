@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+In-process mock of the Telegram Bot API used by the benchmarks and load harness
+
+Point a bot at it with `TELEGRAM_API_BASE_URL=<mock.url>` (requests based
+senders) or `Application.builder().base_url(f"{mock.url}/bot")` (python-telegram-bot).
+"""
+import json
+import threading
+import time
+from collections import Counter
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl
+import requests
+
+BOT_USER = {"id": 1000, "is_bot": True, "first_name": "MockBot", "username": "mock_bot"}
+
+
+def _parse_body(content_type: str, body: bytes) -> Dict:
+    """Decode JSON, form-encoded or multipart Bot API parameters"""
+    if not body:
+        return {}
+    if content_type.startswith('application/json'):
+        return json.loads(body)
+    if content_type.startswith('multipart/form-data'):
+        message = BytesParser(policy=default_policy).parsebytes(
+            b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+        )
+        params = {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if part.get_filename():
+                params[name] = {"filename": part.get_filename(), "size": len(part.get_payload(decode=True))}
+            else:
+                params[name] = part.get_content()
+        return params
+    return dict(parse_qsl(body.decode()))
+
+
+class MockBotAPI:
+    """
+    Threaded HTTP server answering Bot API methods
+
+    Args:
+        latency: seconds added to every response, a stand-in for network RTT
+        fail_chats: chat_id -> (error_code, description) returned for sends to that chat
+    """
+
+    def __init__(self, latency: float = 0.0, fail_chats: Optional[Dict[int, Tuple[int, str]]] = None):
+        self.latency = latency
+        self.fail_chats = fail_chats or {}
+        self.calls = []
+        self.counts = Counter()
+        self.webhook_url = None
+        self.webhook_secret = None
+        self._updates = []
+        self._message_id = 0
+        self._cond = threading.Condition()
+        self._server = None
+        self._thread = None
+        self._stopped = False
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockBotAPI":
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                params = _parse_body(self.headers.get('Content-Type', ''), self.rfile.read(length))
+                method = self.path.rstrip('/').rsplit('/', 1)[-1]
+                status, payload = mock.handle(method, params)
+                if mock.latency:
+                    time.sleep(mock.latency)
+                body = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up, e.g. a long poll cancelled at shutdown
+                    pass
+
+            do_GET = do_POST
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Bot API methods -------------------------------------------------
+
+    def handle(self, method: str, params: Dict):
+        with self._cond:
+            self.calls.append((time.perf_counter(), method, params))
+            self.counts[method] += 1
+            self._cond.notify_all()
+
+        chat_id = params.get('chat_id')
+        if chat_id is not None:
+            failure = self.fail_chats.get(int(chat_id)) if str(chat_id).lstrip('-').isdigit() else None
+            if failure:
+                code, description = failure
+                return code, {"ok": False, "error_code": code, "description": description}
+
+        if method == 'getMe':
+            return 200, {"ok": True, "result": BOT_USER}
+        if method == 'getUpdates':
+            return 200, {"ok": True, "result": self._get_updates(params)}
+        if method == 'setWebhook':
+            self.webhook_url = params.get('url') or None
+            self.webhook_secret = params.get('secret_token')
+            return 200, {"ok": True, "result": True}
+        if method == 'deleteWebhook':
+            self.webhook_url = None
+            return 200, {"ok": True, "result": True}
+        if method in ('sendMessage', 'sendPhoto', 'editMessageText', 'copyMessage', 'forwardMessage'):
+            return 200, {"ok": True, "result": self._message(params)}
+        return 200, {"ok": True, "result": True}
+
+    def _message(self, params: Dict) -> Dict:
+        with self._cond:
+            self._message_id += 1
+            message_id = int(params.get('message_id') or self._message_id)
+        chat_id = params.get('chat_id', 0)
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id) if str(chat_id).lstrip('-').isdigit() else 0, "type": "private"},
+            "text": params.get('text') or params.get('caption') or ""
+        }
+        if 'photo' in params:
+            message["photo"] = [{"file_id": f"photo-{message_id}", "file_unique_id": f"u{message_id}",
+                                 "width": 1, "height": 1}]
+        return message
+
+    def _get_updates(self, params: Dict):
+        offset = int(params.get('offset') or 0)
+        timeout = float(params.get('timeout') or 0)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if offset:
+                self._updates = [u for u in self._updates if u['update_id'] >= offset]
+            while not self._updates and time.monotonic() < deadline and not self._stopped:
+                self._cond.wait(deadline - time.monotonic())
+            return list(self._updates)
+
+    # --- test helpers ----------------------------------------------------
+
+    def push_update(self, update: Dict):
+        """Deliver an update like Telegram would: via webhook if one is set, else getUpdates"""
+        if self.webhook_url:
+            if self.latency:
+                time.sleep(self.latency)
+            headers = {'X-Telegram-Bot-Api-Secret-Token': self.webhook_secret} if self.webhook_secret else {}
+            requests.post(self.webhook_url, json=update, headers=headers, timeout=10)
+            return
+        with self._cond:
+            self._updates.append(update)
+            self._cond.notify_all()
+
+    def wait_for(self, method: str, predicate=lambda params: True, timeout: float = 10.0):
+        """Block until a call to `method` matching `predicate` arrives, return its timestamp"""
+        deadline = time.monotonic() + timeout
+        seen = 0
+        with self._cond:
+            while True:
+                for ts, name, params in self.calls[seen:]:
+                    if name == method and predicate(params):
+                        return ts
+                seen = len(self.calls)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No {method} call within {timeout}s")
+                self._cond.wait(remaining)
+
+    def reset(self):
+        with self._cond:
+            self.calls.clear()
+            self.counts.clear()
+
+
+if __name__ == '__main__':
+    with MockBotAPI() as mock:
+        print(f"Mock Bot API listening on {mock.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
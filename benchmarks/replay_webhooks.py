@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Replay captured webhooks through SignalProcessor against the mock Bot API
+
+Reads the segments written with WEBHOOK_CAPTURE_DIR and pushes every body
+through the production path (parse, filter, history, render, deliver) with
+the config from `--config-a`. `--speed 0` replays as fast as possible,
+`--speed 10` keeps the captured spacing ten times faster.
+
+With `--config-b` each signal is also judged under a second config, and the
+report lists how many decisions differ and for which token/strategy/action,
+which is how a filter change gets checked before it is deployed.
+
+    python benchmarks/replay_webhooks.py captures/ --config-a prod.env --config-b new.env
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_bot_api import MockBotAPI
+
+
+def load_filters(path, chats: int):
+    """FilterConfig from a dotenv file (only its own keys), with stand-in chats if it names none"""
+    from dotenv import dotenv_values
+    from config import FilterConfig
+
+    values = {k: v for k, v in (dotenv_values(path) if path else {}).items() if v is not None}
+    if not values.get("ALLOWED_CHAT_IDS"):
+        values["ALLOWED_CHAT_IDS"] = ",".join(str(1000 + i) for i in range(chats))
+    return FilterConfig.from_env(values)
+
+
+async def replay(args, mock: MockBotAPI):
+    from config import config_store
+    from signal_processor import SignalProcessor
+    from webhook_capture import read_captures
+
+    filters_a = config_store.swap(load_filters(args.config_a, args.chats))
+    filters_b = load_filters(args.config_b, args.chats) if args.config_b else None
+    processor = SignalProcessor()
+    await processor.telegram_bot.application.bot.initialize()
+    mock.reset()
+
+    decisions = Counter()
+    differences = Counter()
+    stats = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    pending = set()
+    first_ts = None
+    started = time.perf_counter()
+
+    async def process(data):
+        async with semaphore:
+            if await processor.process_signal(data):
+                stats["delivered"] += 1
+
+    for ts, body in read_captures(args.captures):
+        if args.limit and stats["bodies"] >= args.limit:
+            break
+        stats["bodies"] += 1
+        if args.speed:
+            first_ts = ts if first_ts is None else first_ts
+            delay = (ts - first_ts) / args.speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        try:
+            data = json.loads(body)
+        except ValueError:
+            stats["invalid"] += 1
+            continue
+        if not isinstance(data, dict):
+            stats["invalid"] += 1
+            continue
+
+        signal = processor.parse_signal(data)
+        if signal and filters_b is not None:
+            accepted_a = processor.should_process_signal(signal, filters_a)
+            accepted_b = processor.should_process_signal(signal, filters_b)
+            decisions[(accepted_a, accepted_b)] += 1
+            if accepted_a != accepted_b:
+                key = ("A only" if accepted_a else "B only", signal.get('token'), signal.get('strategy'),
+                       signal.get('action'))
+                differences[key] += 1
+
+        task = asyncio.create_task(process(data))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        if len(pending) >= args.concurrency * 4:
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+    if pending:
+        await asyncio.wait(pending)
+    elapsed = time.perf_counter() - started
+    await processor.telegram_bot.application.bot.shutdown()
+    return stats, decisions, differences, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('captures', help="WEBHOOK_CAPTURE_DIR to replay")
+    parser.add_argument('--config-a', help="dotenv file with the filters to deliver with (default: none)")
+    parser.add_argument('--config-b', help="dotenv file to compare filter decisions against")
+    parser.add_argument('--speed', type=float, default=0, help="0 = as fast as possible, N = N x real time")
+    parser.add_argument('--concurrency', type=int, default=8, help="signals in flight at once")
+    parser.add_argument('--chats', type=int, default=3, help="recipients when config A lists no chats")
+    parser.add_argument('--latency', type=float, default=0.0, help="mock Bot API response delay")
+    parser.add_argument('--limit', type=int, default=0, help="stop after this many bodies")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    with MockBotAPI(latency=args.latency) as mock, tempfile.TemporaryDirectory() as state_dir:
+        # Before the bot modules are imported: point them at the mock, lift Telegram's rate budget
+        os.environ.update(
+            BOT_TOKEN="123456:REPLAY",
+            TELEGRAM_API_BASE_URL=mock.url,
+            TELEGRAM_GLOBAL_RATE="1000000",
+            TELEGRAM_CHAT_RATE="1000000",
+            SUPPRESSION_FILE=os.path.join(state_dir, "suppressed.json"),
+            CONFIG_FILE=os.path.join(state_dir, "none.env"),
+        )
+        for key in ("SHARED_STATE_PATH", "HISTORY_DIR", "WEBHOOK_CAPTURE_DIR"):
+            os.environ.pop(key, None)
+        stats, decisions, differences, elapsed = asyncio.run(replay(args, mock))
+        sends = mock.counts['sendMessage']
+
+    bodies = stats["bodies"]
+    print(f"Replayed:     {bodies} webhooks ({stats['invalid']} not JSON) in {elapsed:.2f}s "
+          f"-> {bodies / elapsed if elapsed else 0:.0f} webhooks/s")
+    print(f"Delivered:    {stats['delivered']} signals, {sends} sendMessage calls "
+          f"({sends / elapsed if elapsed else 0:.0f} msg/s)")
+    if args.config_b:
+        same = decisions[(True, True)] + decisions[(False, False)]
+        print(f"Filter diff:  {same} same, {decisions[(True, False)]} accepted only by A, "
+              f"{decisions[(False, True)]} accepted only by B")
+        for (side, token, strategy, action), count in differences.most_common(20):
+            print(f"    {side:<7} {count:>6}  {token} / {strategy} / {action}")
+
+
+if __name__ == '__main__':
+    main()
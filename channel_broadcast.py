@@ -0,0 +1,136 @@
+import html
+import logging
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional
+from config import Config
+from delivery import DeliveryEngine
+from rate_limiter import TokenBucket
+from retry_engine import DeliveryResult, RetryEngine
+from telegram_api import TelegramAPI
+
+logger = logging.getLogger(__name__)
+
+MODE_CHANNEL = "channel"   # one post to the channel, subscribers follow the channel
+MODE_NOTIFY = "notify"     # the channel post plus a one-line notice to every subscriber
+
+
+class ChannelRoute:
+    """Where a strategy's signals go instead of every subscriber's private chat"""
+
+    def __init__(self, target, mode: str = MODE_CHANNEL):
+        self.target = target
+        self.mode = mode
+
+    @property
+    def notify(self) -> bool:
+        return self.mode == MODE_NOTIFY
+
+    def __repr__(self):
+        return f"ChannelRoute({self.target!r}, {self.mode})"
+
+
+def parse_channel_routes(value: Optional[str]) -> Dict[str, ChannelRoute]:
+    """
+    "EMA Cross + RSI=@signals:notify,*=-1001234567890" -> {"EMA CROSS + RSI": ChannelRoute(...), ...}
+
+    The target is a channel username or a numeric chat id; ":notify" adds
+    the subscriber notices. "*" covers every strategy without its own route.
+    """
+    routes = {}
+    for item in (value or "").split(","):
+        name, sep, target = item.rpartition("=")
+        if not sep or not name.strip() or not target.strip():
+            continue
+        target, colon, mode = target.strip().partition(":")
+        mode = mode.strip().lower() if colon else MODE_CHANNEL
+        if mode not in (MODE_CHANNEL, MODE_NOTIFY):
+            logger.warning(f"Unknown broadcast mode {mode!r} for {name.strip()}, posting to the channel only")
+            mode = MODE_CHANNEL
+        target = target.strip()
+        routes[name.strip().upper()] = ChannelRoute(int(target) if target.lstrip("-").isdigit() else target, mode)
+    return routes
+
+
+def post_link(target, message_id) -> Optional[str]:
+    """t.me link to a channel post, if the target has one"""
+    if message_id is None:
+        return None
+    target = str(target)
+    if target.startswith("@"):
+        return f"https://t.me/{target[1:]}/{message_id}"
+    if target.startswith("-100"):
+        return f"https://t.me/c/{target[4:]}/{message_id}"
+    return None
+
+
+def format_notice(symbol: str, action: str, price, strategy: str, link: Optional[str] = None) -> str:
+    """The lightweight copy a subscriber gets for a channel post"""
+    emoji = '🟢' if action in ('BUY', 'LONG') else '🔴' if action in ('SELL', 'SHORT') else '🔔'
+    text = f"{emoji} <b>{html.escape(action)} {html.escape(symbol)}</b> @ ${html.escape(str(price))} " \
+           f"({html.escape(strategy)})"
+    return f'{text} · <a href="{link}">details</a>' if link else text
+
+
+class ChannelBroadcaster:
+    """
+    Posts a signal once to a channel or group instead of once per subscriber
+
+    The route is picked per strategy. Posts go through their own
+    DeliveryEngine, so channels have their own rate budget (Telegram allows
+    about 20 posts a minute in one group) and a 429 on a channel doesn't
+    pause the private chats. Posts still spend `bot_bucket`, the budget of
+    the bot they are sent from. A route whose channel is suppressed (the
+    bot was removed) is skipped and the signal goes out directly again.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, ChannelRoute]] = None, engine: Optional[DeliveryEngine] = None,
+                 bot_bucket: Optional[TokenBucket] = None):
+        self.routes = dict(routes if routes is not None else parse_channel_routes(Config.BROADCAST_CHANNELS))
+        if engine is None:
+            retry_engine = RetryEngine.from_config(bucket_prefix="broadcast:", global_rate=Config.BROADCAST_RATE,
+                                                   bot_bucket=bot_bucket)
+            engine = DeliveryEngine(TelegramAPI(), retry_engine)
+        self.engine = engine
+        self.counts = Counter()
+
+    def route(self, strategy: str) -> Optional[ChannelRoute]:
+        route = self.routes.get((strategy or "").upper()) or self.routes.get("*")
+        if route is None or route.target in self.engine.suppression:
+            return None
+        return route
+
+    def post(self, target, text: str, parse_mode: str = 'HTML') -> DeliveryResult:
+        result = self.engine.send_message(target, text, parse_mode=parse_mode)
+        self.counts["posted" if result.ok else "failed"] += 1
+        return result
+
+    def poster(self, route: ChannelRoute, notice: Callable[[Optional[str]], str],
+               subscribers: Iterable = (), submit: Optional[Callable] = None):
+        """
+        `send(chat_id, text)` for DeliveryScheduler.submit that posts to the channel
+
+        With a notify route, a successful post calls `submit(subscribers, text)`
+        with `notice(link)`, so the notices link to the post and never go out
+        for a post that failed. If the post fails, `submit(subscribers, text)`
+        sends them the full signal directly instead.
+        """
+        subscribers = list(subscribers)
+
+        def send(chat_id, text):
+            result = self.post(chat_id, text)
+            if result.ok and route.notify and subscribers and submit:
+                message = (result.api_result.result or {}) if result.api_result else {}
+                submit(subscribers, notice(post_link(chat_id, message.get("message_id"))))
+                self.counts["notices"] += len(subscribers)
+            elif not result.ok and subscribers and submit:
+                logger.warning(f"Post to {chat_id} failed ({result.outcome}), sending the signal directly")
+                submit(subscribers, text)
+                self.counts["fallbacks"] += len(subscribers)
+            return result
+        return send
+
+    def stats(self) -> Dict:
+        return {
+            "routes": {name: f"{route.target} ({route.mode})" for name, route in self.routes.items()},
+            **self.counts
+        }
@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+from __future__ import annotations
+
 import asyncio
 import logging
 import json
@@ -6,11 +8,33 @@ import os
 import random
 import threading
 from datetime import datetime
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
-import requests
+from typing import TYPE_CHECKING
 from flask import Flask, request, jsonify
-from config import Config
+from config import Config, config_store, install_reload_signal_handler
+from shared_state import get_shared_state
+from strategy_analytics import strategy_analytics
+from strategy_registry import strategy_registry
+from signal_history import format_history, register_history_route, signal_history
+from signal_processor import parse_timestamp
+from delivery import DeliveryEngine, RecipientIndex
+from delivery_scheduler import CLASS_PRICE, CLASS_SIGNAL, DeliveryScheduler
+from live_ticker import LiveTicker
+from channel_broadcast import ChannelBroadcaster, format_notice
+from sparkline import SparklineCharts
+from inline_lookup import InlineLookup
+from price_table import format_price_table, parse_symbols, price_table
+from load_shedding import ShedPolicy, SignalMaxAge
+from loop_monitor import LoopMonitor
+from tenants import build_registry
+from token_pool import TokenPool
+from admin_commands import suppressed_command, restore_command, register_reload_route
+from telegram_webhook import TelegramUpdateBridge, register_update_route, serve_webhook_updates
+from webhook_capture import get_webhook_capture
+
+# python-telegram-bot is imported when the bot is set up, after Flask is already serving
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import ContextTypes
 
 # Configure logging
 logging.basicConfig(
@@ -21,10 +45,19 @@ logger = logging.getLogger(__name__)
 
 # Flask app for webhook
 app = Flask(__name__)
+register_reload_route(app)
+register_history_route(app)
+
+# Telegram updates can be pushed to this same server instead of long polling
+update_bridge = TelegramUpdateBridge()
+register_update_route(app, update_bridge)
 
 # User state storage (in production, use a database)
 user_states = {}
 
+# With SHARED_STATE_PATH set, preferences are shared with the webhook workers
+shared_state = get_shared_state()
+
 # Joke collection for the joke bot
 JOKES = [
     "Why don't traders ever play poker? Because they're always folding!",
@@ -44,41 +77,65 @@ JOKES = [
     "Why did the swing trader go to the park? To practice holding!",
 ]
 
-# Current active strategies (this would come from TradingView in production)
-ACTIVE_STRATEGIES = {
-    "BTC 5min Price Feed": {
-        "symbol": "BTCUSD", 
-        "timeframe": "5m",
-        "status": "Active",
-        "last_signal": "Price Update",
-        "description": "Real-time BTC price monitoring every 5 minutes"
-    },
-    "EMA Cross Strategy": {
-        "symbol": "ETHUSD",
-        "timeframe": "15m", 
-        "status": "Active",
-        "last_signal": "Buy Signal",
-        "description": "EMA 21/50 crossover strategy for ETH"
-    },
-    "RSI Divergence": {
-        "symbol": "ADAUSD",
-        "timeframe": "1h",
-        "status": "Paused", 
-        "last_signal": "Sell Signal",
-        "description": "RSI divergence detection for ADA"
-    }
-}
-
 # Global telegram application variable
 telegram_app = None
 
+# Outbound delivery runs on sender threads, outside the bot's event loop; trade signals
+# are queued ahead of price chatter (DELIVERY_PRICE_SHARE keeps price updates moving).
+# With several BOT_TOKENS each chat is pinned to one of the tokens that can reach it and every token
+# sends at full rate.
+delivery_engine = TokenPool() if len(Config.BOT_TOKENS) > 1 else DeliveryEngine()
+# When the backlog outgrows what Telegram lets through, the least valuable jobs are dropped first
+shed_policy = ShedPolicy()
+signal_max_age = SignalMaxAge()
+delivery_scheduler = DeliveryScheduler(delivery_engine,
+                                       senders=Config.DELIVERY_SENDERS * max(len(Config.BOT_TOKENS), 1),
+                                       shedder=shed_policy)
+
+# Webhook secret -> tenant; the default tenant is WEBHOOK_SECRET with the global filters
+tenant_registry = build_registry(delivery_engine, delivery_scheduler)
+
+# LIVE_TICKER: price updates edit one pinned message per chat and symbol
+live_ticker = LiveTicker(delivery_engine, Config.LIVE_TICKER_FILE) if Config.LIVE_TICKER else None
+
+# BROADCAST_CHANNELS: strategies whose signals are posted once to a channel (own rate budget within the bot's)
+channel_broadcaster = ChannelBroadcaster(
+    bot_bucket=tenant_registry.bot_engine(Config.BOT_TOKEN).rate_limiter.global_bucket)
+
+# SPARKLINES: signals go out as a chart with the message as caption, one upload per chart and bot
+sparkline_charts = SparklineCharts(signal_history, delivery_engine) if Config.SPARKLINES else None
+
+# Inline mode: "@bot ETH" completes symbols and strategies from the signals seen so far
+inline_lookup = InlineLookup()
+inline_lookup.load(signal_history)
+
+# Lag of the bot's event loop; a blocking call in a handler shows up as a stall with its stack
+loop_monitor = LoopMonitor()
+
+# Opt-outs per message type, updated by the notification toggles
+recipient_index = RecipientIndex()
+if shared_state:
+    recipient_index.load(shared_state.all_prefs())
+
+def forget_user(chat_id, reason):
+    """Drop all state kept for a chat that can no longer be reached"""
+    user_states.pop(chat_id, None)
+    recipient_index.forget(chat_id)
+    if live_ticker:
+        live_ticker.forget_chat(chat_id)
+    if shared_state:
+        shared_state.delete_prefs(chat_id)
+
+for tenant in tenant_registry:
+    tenant.engine.on_dead_chat(forget_user)
+
 class UserState:
     def __init__(self, user_id):
         self.user_id = user_id
         self.notifications_enabled = True
         self.price_alerts_enabled = True
         self.signal_alerts_enabled = True
-        self.last_btc_price = None
+        self.last_prices = {}
         
     def to_dict(self):
         return {
@@ -86,16 +143,37 @@ class UserState:
             'notifications_enabled': self.notifications_enabled,
             'price_alerts_enabled': self.price_alerts_enabled,
             'signal_alerts_enabled': self.signal_alerts_enabled,
-            'last_btc_price': self.last_btc_price
+            'last_prices': self.last_prices
         }
+    
+    def update_from_dict(self, prefs):
+        self.notifications_enabled = prefs.get('notifications_enabled', self.notifications_enabled)
+        self.price_alerts_enabled = prefs.get('price_alerts_enabled', self.price_alerts_enabled)
+        self.signal_alerts_enabled = prefs.get('signal_alerts_enabled', self.signal_alerts_enabled)
+        self.last_prices = dict(prefs.get('last_prices') or self.last_prices)
+        # Preferences saved before per-symbol prices only had BTC
+        if prefs.get('last_btc_price') and 'BTC' not in self.last_prices:
+            self.last_prices['BTC'] = prefs['last_btc_price']
 
 def get_user_state(user_id):
     if user_id not in user_states:
         user_states[user_id] = UserState(user_id)
-    return user_states[user_id]
+    user_state = user_states[user_id]
+    if shared_state:
+        prefs = shared_state.get_prefs(user_id)
+        if prefs:
+            user_state.update_from_dict(prefs)
+    return user_state
+
+def save_user_state(user_state):
+    """Persist preferences so every worker process sees the change"""
+    recipient_index.update(user_state.user_id, user_state.to_dict())
+    if shared_state:
+        shared_state.put_prefs(user_state.user_id, user_state.to_dict())
 
 def create_main_menu():
     """Create the main menu keyboard"""
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
         [
             InlineKeyboardButton("📈 Current Strategy", callback_data="menu_strategy"),
@@ -112,12 +190,26 @@ def create_main_menu():
         [
             InlineKeyboardButton("ℹ️ Help", callback_data="menu_help"),
             InlineKeyboardButton("🧪 Test Signal", callback_data="menu_test")
-        ]
+        ],
+        [InlineKeyboardButton("🗂 Signal History", callback_data="menu_history")]
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+def create_history_menu():
+    """Per-symbol history buttons for the most recently active symbols"""
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+    symbols = signal_history.symbols()[:6]
+    keyboard = [
+        [InlineKeyboardButton(symbol, callback_data=f"history_{symbol}") for symbol in symbols[i:i + 3]]
+        for i in range(0, len(symbols), 3)
     ]
+    keyboard.append([InlineKeyboardButton("🔄 Refresh", callback_data="menu_history")])
+    keyboard.append([InlineKeyboardButton("⬅️ Back to Menu", callback_data="back_to_main")])
     return InlineKeyboardMarkup(keyboard)
 
 def create_notifications_menu(user_state):
     """Create notifications control menu"""
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     status_icon = "🟢" if user_state.notifications_enabled else "🔴"
     price_icon = "🟢" if user_state.price_alerts_enabled else "🔴"
     signal_icon = "🟢" if user_state.signal_alerts_enabled else "🔴"
@@ -132,6 +224,7 @@ def create_notifications_menu(user_state):
 
 def create_settings_menu():
     """Create settings menu"""
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
         [
             InlineKeyboardButton("🎯 Alert Frequency", callback_data="settings_frequency"),
@@ -158,7 +251,7 @@ Hello {user.first_name}! Your trading signal bot is ready.
 
 **What I can do:**
 🔔 Send you TradingView alerts
-📊 Show live BTC prices  
+📊 Show live prices (/price BTC ETH)
 📈 Track your trading signals
 ⚙️ Customizable notifications
 😂 Tell you trading jokes!
@@ -174,6 +267,24 @@ Choose an option from the menu below:
         parse_mode='Markdown'
     )
 
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Answer "@bot SYM" from the cached latest signals and prices, for allowed users only"""
+    from telegram import InlineQueryResultArticle, InputTextMessageContent
+    if not config_store.current().is_authorized(update.inline_query.from_user.id):
+        await update.inline_query.answer([], cache_time=Config.INLINE_CACHE_SECONDS, is_personal=True)
+        return
+    results = [
+        InlineQueryResultArticle(
+            id=result["id"],
+            title=result["title"],
+            description=result["description"],
+            input_message_content=InputTextMessageContent(result["text"], parse_mode='HTML')
+        )
+        for result in inline_lookup.answer(update.inline_query.query)
+    ]
+    # Personal: Telegram must not serve one user's cached answer to someone who is not allowed
+    await update.inline_query.answer(results, cache_time=Config.INLINE_CACHE_SECONDS, is_personal=True)
+
 async def menu_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /menu command"""
     await update.message.reply_text(
@@ -182,19 +293,32 @@ async def menu_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode='Markdown'
     )
 
-async def get_btc_price():
-    """Fetch current BTC price from a public API"""
-    try:
-        response = requests.get('https://api.coinbase.com/v2/exchange-rates?currency=BTC', timeout=5)
-        data = response.json()
-        btc_price = float(data['data']['rates']['USD'])
-        return btc_price
-    except Exception as e:
-        logger.error(f"Error fetching BTC price: {e}")
+async def get_prices(symbols):
+    """Prices from the shared rate table; only a stale table is refreshed, on a worker thread"""
+    if price_table.fresh:
+        return price_table.prices(symbols)
+    return await asyncio.to_thread(price_table.prices, symbols)
+
+async def price_text(user_state, symbols):
+    """Price list for `symbols` with the change since this user's last check of each"""
+    prices = await get_prices(symbols)
+    if not any(price is not None for price in prices.values()):
         return None
+    text = format_price_table(prices, user_state.last_prices, price_table.base)
+    user_state.last_prices.update({currency: price for currency, price in prices.items() if price is not None})
+    save_user_state(user_state)
+    return f"{text}\n\n📊 Coinbase rates · updated {datetime.now().strftime('%H:%M:%S')}"
+
+async def price_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /price [SYM ...]"""
+    user_state = get_user_state(update.effective_user.id)
+    symbols = parse_symbols(context.args or [], Config.PRICE_MENU_SYMBOLS)[:20]
+    text = await price_text(user_state, symbols)
+    await update.message.reply_text(text or "❌ Unable to fetch prices. Please try again.", parse_mode='Markdown')
 
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle button callbacks"""
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     query = update.callback_query
     await query.answer()
     
@@ -203,34 +327,12 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     data = query.data
     
     if data == "menu_strategy":
-        text = """
-📈 **Current Trading Strategies**
-
-Here are your active TradingView strategies:
-        """
-        
-        for name, strategy in ACTIVE_STRATEGIES.items():
-            status_icon = "🟢" if strategy["status"] == "Active" else "🟡" if strategy["status"] == "Paused" else "🔴"
-            text += f"""
-{status_icon} **{name}**
-• Symbol: {strategy["symbol"]}
-• Timeframe: {strategy["timeframe"]}
-• Status: {strategy["status"]}
-• Last Signal: {strategy["last_signal"]}
-• Description: {strategy["description"]}
-            """
-        
-        text += f"""
-
-📊 **Total Strategies:** {len(ACTIVE_STRATEGIES)}
-✅ **Active:** {sum(1 for s in ACTIVE_STRATEGIES.values() if s['status'] == 'Active')}
-⏸️ **Paused:** {sum(1 for s in ACTIVE_STRATEGIES.values() if s['status'] == 'Paused')}
-
-💡 Add more strategies in TradingView with your webhook URL
-        """
+        # Cached by the registry until a signal arrives or a strategy is auto-paused
+        text = strategy_registry.render()
         
         keyboard = [
-            [InlineKeyboardButton("🔄 Refresh", callback_data="menu_strategy")],
+            [InlineKeyboardButton("🔄 Refresh", callback_data="menu_strategy"),
+             InlineKeyboardButton("📊 Performance", callback_data="menu_performance")],
             [InlineKeyboardButton("⬅️ Back to Menu", callback_data="back_to_main")]
         ]
         
@@ -265,36 +367,15 @@ Here are your active TradingView strategies:
         )
     
     elif data == "menu_price":
-        btc_price = await get_btc_price()
-        if btc_price:
-            price_change = ""
-            if user_state.last_btc_price:
-                change = btc_price - user_state.last_btc_price
-                change_pct = (change / user_state.last_btc_price) * 100
-                arrow = "📈" if change > 0 else "📉" if change < 0 else "➡️"
-                price_change = f"\n{arrow} Change: ${change:+.2f} ({change_pct:+.2f}%)"
-            
-            user_state.last_btc_price = btc_price
-            
-            text = f"""
-💰 **Live BTC Price**
-
-**Current Price:** ${btc_price:,.2f}{price_change}
-
-📊 **Market Info:**
-• Exchange: Coinbase
-• Updated: {datetime.now().strftime('%H:%M:%S')}
-
-🔄 Tap "Refresh" for latest price
-            """
-            
+        text = await price_text(user_state, Config.PRICE_MENU_SYMBOLS)
+        if text:
+            text += "\n\n🔄 Tap \"Refresh\" for latest prices, or send /price SYM for any other symbol"
             keyboard = [
                 [InlineKeyboardButton("🔄 Refresh", callback_data="menu_price")],
                 [InlineKeyboardButton("⬅️ Back to Menu", callback_data="back_to_main")]
             ]
-            
         else:
-            text = "❌ Unable to fetch BTC price. Please try again."
+            text = "❌ Unable to fetch prices. Please try again."
             keyboard = [[InlineKeyboardButton("⬅️ Back to Menu", callback_data="back_to_main")]]
         
         await query.edit_message_text(
@@ -333,59 +414,108 @@ If you received a test message, your bot is working correctly!
         """
         await context.bot.send_message(chat_id=user_id, text=test_signal, parse_mode='Markdown')
     
-    elif data == "back_to_main":
+    elif data == "menu_notifications":
+        text = f"""
+🔔 **Notification Settings**
+
+Control what alerts you receive:
+
+🟢 = Enabled  🔴 = Disabled
+
+Current Status:
+• All Notifications: {'🟢 ON' if user_state.notifications_enabled else '🔴 OFF'}
+• Price Alerts: {'🟢 ON' if user_state.price_alerts_enabled else '🔴 OFF'}  
+• Trading Signals: {'🟢 ON' if user_state.signal_alerts_enabled else '🔴 OFF'}
+        """
         await query.edit_message_text(
-            "🎛️ **Main Menu**\n\nChoose an option:",
-            reply_markup=create_main_menu(),
+            text,
+            reply_markup=create_notifications_menu(user_state),
             parse_mode='Markdown'
         )
-
-# Flask webhook endpoints
-def should_send_message(chat_id, message_type="signal"):
-    """Check if user wants to receive this type of message"""
-    user_state = get_user_state(chat_id)
     
-    if not user_state.notifications_enabled:
-        return False
+    elif data == "toggle_all_notifications":
+        user_state.notifications_enabled = not user_state.notifications_enabled
+        save_user_state(user_state)
+        status = "enabled" if user_state.notifications_enabled else "disabled"
+        
+        await query.edit_message_text(
+            f"🔔 All notifications have been **{status}**",
+            reply_markup=create_notifications_menu(user_state),
+            parse_mode='Markdown'
+        )
     
-    if message_type == "price" and not user_state.price_alerts_enabled:
-        return False
+    elif data == "toggle_price_alerts":
+        user_state.price_alerts_enabled = not user_state.price_alerts_enabled
+        save_user_state(user_state)
+        status = "enabled" if user_state.price_alerts_enabled else "disabled"
+        
+        await query.edit_message_text(
+            f"📊 Price alerts have been **{status}**",
+            reply_markup=create_notifications_menu(user_state),
+            parse_mode='Markdown'
+        )
     
-    if message_type == "signal" and not user_state.signal_alerts_enabled:
-        return False
+    elif data == "toggle_signal_alerts":
+        user_state.signal_alerts_enabled = not user_state.signal_alerts_enabled
+        save_user_state(user_state)
+        status = "enabled" if user_state.signal_alerts_enabled else "disabled"
+        
+        await query.edit_message_text(
+            f"📈 Trading signal alerts have been **{status}**",
+            reply_markup=create_notifications_menu(user_state),
+            parse_mode='Markdown'
+        )
     
-    return True
-
-def send_telegram_message_sync(chat_id, message, message_type="signal"):
-    """Send message to Telegram using the bot"""
-    global telegram_app
+    elif data == "menu_performance":
+        keyboard = [
+            [InlineKeyboardButton("📈 Strategies", callback_data="menu_strategy")],
+            [InlineKeyboardButton("⬅️ Back to Menu", callback_data="back_to_main")]
+        ]
+        await query.edit_message_text(
+            strategy_analytics.render(),
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode='Markdown'
+        )
+    
+    elif data == "menu_history":
+        await query.edit_message_text(
+            format_history(signal_history.query(limit=10), "Recent Signals"),
+            reply_markup=create_history_menu(),
+            parse_mode='Markdown'
+        )
     
-    if not should_send_message(chat_id, message_type):
-        logger.info(f"Message blocked by user preferences for chat {chat_id}")
-        return True
+    elif data.startswith("history_"):
+        symbol = data[len("history_"):]
+        await query.edit_message_text(
+            format_history(signal_history.query(symbol=symbol, limit=10), f"{symbol} Signals"),
+            reply_markup=create_history_menu(),
+            parse_mode='Markdown'
+        )
     
-    if telegram_app:
-        # Schedule the message to be sent
-        asyncio.create_task(telegram_app.bot.send_message(
-            chat_id=chat_id, 
-            text=message, 
-            parse_mode='HTML'
-        ))
-        return True
-    return False
+    elif data == "back_to_main":
+        await query.edit_message_text(
+            "🎛️ **Main Menu**\n\nChoose an option:",
+            reply_markup=create_main_menu(),
+            parse_mode='Markdown'
+        )
 
+# Flask webhook endpoints
 @app.route('/webhook', methods=['POST'])
 def webhook():
     """Receive TradingView webhook alerts"""
+    capture = get_webhook_capture()
+    if capture:
+        capture.append(request.get_data())
+
     try:
         data = request.get_json()
         logger.info(f"Received webhook: {json.dumps(data, indent=2)}")
         
-        # Verify webhook secret
-        if Config.WEBHOOK_SECRET and Config.WEBHOOK_SECRET != "default_secret":
-            received_secret = data.get('secret')
-            if received_secret != Config.WEBHOOK_SECRET:
-                return jsonify({"error": "Invalid secret"}), 401
+        # The secret picks the tenant: its filters, chats and delivery queue
+        tenant = tenant_registry.resolve(data.get('secret'))
+        if tenant is None:
+            return jsonify({"error": "Invalid secret"}), 401
+        filters = tenant.filters
         
         # Format the signal message
         action = data.get('action', '').upper()
@@ -397,6 +527,15 @@ def webhook():
         if ':' in symbol:
             symbol = symbol.split(':')[-1]
         
+        if not filters.allows_token(symbol) or not filters.allows_strategy(strategy):
+            return jsonify({"status": "filtered", "message": f"{symbol} / {strategy} not enabled"}), 200
+        
+        signal_history.record(symbol, action, strategy, price)
+        if tenant is tenant_registry.default:
+            inline_lookup.observe(symbol, action, strategy, price)
+        strategy_registry.observe({**data, 'symbol': symbol, 'strategy': strategy})
+        strategy_analytics.observe({**data, 'symbol': symbol, 'strategy': strategy})
+        
         emoji = '💰📊' if action in ['PRICE_UPDATE', 'PRICE_MOVEMENT'] else '🟢📈' if action in ['BUY', 'LONG'] else '🔴📉' if action in ['SELL', 'SHORT'] else '🔔'
         
         formatted_message = f"""
@@ -414,17 +553,33 @@ def webhook():
 💡 <i>Use /menu to control notifications</i>
         """
         
-        # Send to allowed chat IDs
-        message_type = "price" if action in ['PRICE_UPDATE', 'PRICE_MOVEMENT'] else "signal"
-        sent_count = 0
-        
-        for chat_id in Config.ALLOWED_CHAT_IDS:
-            if send_telegram_message_sync(chat_id, formatted_message, message_type):
-                sent_count += 1
+        # Queue for allowed chat IDs; the response doesn't wait for Telegram
+        message_type = CLASS_PRICE if action in ['PRICE_UPDATE', 'PRICE_MOVEMENT'] else CLASS_SIGNAL
+        recipients = tenant.engine.deliverable(recipient_index.resolve(filters.chat_id_set, message_type))
+        # A newer price update for the same symbol supersedes a queued one; signals are judged by age
+        job = dict(key=symbol if message_type == CLASS_PRICE else None,
+                   born=parse_timestamp(data.get('timestamp')), strategy=strategy,
+                   max_age=signal_max_age.lookup(strategy, action))
+        route = channel_broadcaster.route(strategy) if tenant is tenant_registry.default else None
+        if message_type == CLASS_PRICE and live_ticker and tenant is tenant_registry.default:
+            live_ticker.publish(recipients, symbol, price, strategy)
+            queued_count = delivery_scheduler.submit(recipients, "", CLASS_PRICE, send=live_ticker.syncer(symbol),
+                                                     **job)
+        elif message_type == CLASS_SIGNAL and route:
+            # One channel post; with a notify route the subscribers get a one-line notice once it is up
+            post = channel_broadcaster.poster(
+                route, lambda link: format_notice(symbol, action, price, strategy, link), recipients,
+                lambda chat_ids, notice: delivery_scheduler.submit(chat_ids, notice, CLASS_SIGNAL, **job))
+            queued_count = delivery_scheduler.submit([route.target], formatted_message, CLASS_SIGNAL, send=post, **job)
+        else:
+            chart = sparkline_charts.chart(symbol) if (sparkline_charts and message_type == CLASS_SIGNAL
+                                                       and tenant is tenant_registry.default) else None
+            send = sparkline_charts.sender(chart) if chart else None
+            queued_count = tenant.scheduler.submit(recipients, formatted_message, message_type, send=send, **job)
         
         return jsonify({
             "status": "success",
-            "message": f"Signal sent to {sent_count} chats",
+            "message": f"Signal queued for {queued_count} chats",
             "symbol": symbol
         }), 200
         
@@ -445,12 +600,24 @@ def health():
             "user_preferences": True,
             "strategy_display": True,
             "joke_bot": True
-        }
+        },
+        "delivery": delivery_scheduler.stats(),
+        "tenants": {tenant.name: tenant.stats() for tenant in tenant_registry if tenant is not tenant_registry.default},
+        "shedding": shed_policy.stats(),
+        "bot_tokens": delivery_engine.stats() if isinstance(delivery_engine, TokenPool) else None,
+        "live_ticker": live_ticker.stats() if live_ticker else None,
+        "channel_broadcast": channel_broadcaster.stats() if channel_broadcaster.routes else None,
+        "sparklines": sparkline_charts.stats() if sparkline_charts else None,
+        "inline_lookup": inline_lookup.stats(),
+        "price_table": price_table.stats(),
+        "event_loop": loop_monitor.stats()
     })
 
 async def setup_telegram_bot():
     """Set up the Telegram bot"""
     global telegram_app
+    from telegram import BotCommand
+    from telegram.ext import Application, CommandHandler, CallbackQueryHandler, InlineQueryHandler
     
     # Create application
     telegram_app = Application.builder().token(Config.BOT_TOKEN).build()
@@ -458,12 +625,17 @@ async def setup_telegram_bot():
     # Add handlers
     telegram_app.add_handler(CommandHandler("start", start_command))
     telegram_app.add_handler(CommandHandler("menu", menu_command))
+    telegram_app.add_handler(CommandHandler("price", price_command))
+    telegram_app.add_handler(CommandHandler("suppressed", suppressed_command))
+    telegram_app.add_handler(CommandHandler("restore", restore_command))
     telegram_app.add_handler(CallbackQueryHandler(button_callback))
+    telegram_app.add_handler(InlineQueryHandler(inline_query))
     
     # Set bot commands
     commands = [
         BotCommand("start", "Start the bot and show welcome message"),
         BotCommand("menu", "Show the main menu"),
+        BotCommand("price", "Prices, e.g. /price BTC ETH SOL"),
     ]
     await telegram_app.bot.set_my_commands(commands)
     
@@ -478,17 +650,28 @@ def run_flask_app():
 
 async def run_telegram_bot():
     """Run the Telegram bot"""
+    if Config.TELEGRAM_UPDATE_MODE == "webhook":
+        logger.info("Starting Telegram bot in webhook mode...")
+        await serve_webhook_updates(telegram_app, update_bridge)
+        return
+    
+    from telegram import Update
     logger.info("Starting Telegram bot...")
     await telegram_app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 async def main():
     """Main function to run both Flask and Telegram bot"""
-    # Setup Telegram bot
-    await setup_telegram_bot()
-    
-    # Start Flask in a separate thread
+    # Serve /health and /webhook first; Telegram updates get 503 (and are redelivered) until the bot is up
     flask_thread = threading.Thread(target=run_flask_app, daemon=True)
     flask_thread.start()
+    install_reload_signal_handler()
+    if Config.LOOP_MONITOR_INTERVAL > 0:
+        loop_monitor.start()
+    if isinstance(delivery_engine, TokenPool):
+        delivery_engine.start_polling()
+    
+    # Setup Telegram bot
+    await setup_telegram_bot()
     
     # Run Telegram bot
     await run_telegram_bot()
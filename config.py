@@ -1,14 +1,246 @@
+import logging
 import os
-from dotenv import load_dotenv
+import signal
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional
+from dotenv import dotenv_values, load_dotenv
 
+_inherited_keys = set(os.environ)
 load_dotenv()
+# Keys .env filled in; everything else came from the process environment, which wins over the file
+_dotenv_keys = frozenset(os.environ.keys() - _inherited_keys)
+
+logger = logging.getLogger(__name__)
 
 class Config:
     BOT_TOKEN = os.getenv("BOT_TOKEN")
+    # Extra tokens multiply broadcast throughput; each chat is pinned to one of them (defaults to BOT_TOKEN)
+    BOT_TOKENS = [token.strip() for token in os.getenv("BOT_TOKENS", "").split(",") if token.strip()] or \
+        ([BOT_TOKEN] if BOT_TOKEN else [])
+    # Chats each extra token has seen (only those may be routed to it), read from its updates every N seconds
+    BOT_REACH_FILE = os.getenv("BOT_REACH_FILE", "bot_reach.json")
+    BOT_REACH_POLL_SECONDS = float(os.getenv("BOT_REACH_POLL_SECONDS", "30"))
     WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "default_secret")
+    # Several trading groups: JSON file of tenants, each with its own secret, chats, filters and rate
+    TENANTS_FILE = os.getenv("TENANTS_FILE")
     ALLOWED_CHAT_IDS = [int(id.strip()) for id in os.getenv("ALLOWED_CHAT_IDS", "").split(",") if id.strip()]
     WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+    ADMIN_CHAT_IDS = [int(id.strip()) for id in os.getenv("ADMIN_CHAT_IDS", "").split(",") if id.strip()]
     
     # TradingView signal filtering
     ALLOWED_TOKENS = os.getenv("ALLOWED_TOKENS", "").split(",") if os.getenv("ALLOWED_TOKENS") else []
-    ALLOWED_STRATEGIES = os.getenv("ALLOWED_STRATEGIES", "").split(",") if os.getenv("ALLOWED_STRATEGIES") else []
\ No newline at end of file
+    ALLOWED_STRATEGIES = os.getenv("ALLOWED_STRATEGIES", "").split(",") if os.getenv("ALLOWED_STRATEGIES") else []
+    
+    # Telegram delivery: Bot API endpoint, rate budget and retry behaviour
+    TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org")
+    TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+    TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "4"))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "60"))
+    
+    # Chats that blocked the bot or no longer exist are parked here
+    SUPPRESSION_FILE = os.getenv("SUPPRESSION_FILE", "suppressed_chats.json")
+    
+    # Telegram update ingestion: "polling" (getUpdates) or "webhook" (pushed to our HTTP server)
+    TELEGRAM_UPDATE_MODE = os.getenv("TELEGRAM_UPDATE_MODE", "polling").lower()
+    TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL")
+    TELEGRAM_WEBHOOK_PATH = os.getenv("TELEGRAM_WEBHOOK_PATH", "/telegram")
+    TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+    
+    # Multi-worker deployments: SQLite file shared by all workers (unset = process-local state)
+    SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH")
+    DEDUPE_TTL_SECONDS = float(os.getenv("DEDUPE_TTL_SECONDS", "60"))
+    
+    # Sharded fan-out for very large subscriber lists (1 = send from the web process)
+    DELIVERY_SHARDS = int(os.getenv("DELIVERY_SHARDS", "1"))
+    DELIVERY_THREADS_PER_SHARD = int(os.getenv("DELIVERY_THREADS_PER_SHARD", "8"))
+    # Longest a sharded broadcast may hold the request; keep it below gunicorn's timeout (60s)
+    DELIVERY_SHARD_TIMEOUT = float(os.getenv("DELIVERY_SHARD_TIMEOUT", "50"))
+
+    # Queued delivery (combined bot): sender threads and the share of sends reserved for price updates
+    DELIVERY_SENDERS = int(os.getenv("DELIVERY_SENDERS", "4"))
+    DELIVERY_PRICE_SHARE = float(os.getenv("DELIVERY_PRICE_SHARE", "0.1"))
+    # Load shedding once the queue would take this long to drain: superseded price updates first,
+    # then signals older than their strategy's freshness budget ("Strategy=seconds,...", 0 = never stale)
+    SHED_PRICE_AFTER = float(os.getenv("SHED_PRICE_AFTER", "5"))
+    SHED_SIGNAL_AFTER = float(os.getenv("SHED_SIGNAL_AFTER", "30"))
+    SIGNAL_FRESHNESS = os.getenv("SIGNAL_FRESHNESS", "")
+    SIGNAL_FRESHNESS_DEFAULT = float(os.getenv("SIGNAL_FRESHNESS_DEFAULT", "300"))
+    # Signals older than this when they are about to be sent are dropped, backlog or not
+    # ("Strategy:ACTION=seconds", "Strategy=seconds" or "*:ACTION=seconds"; 0 = no limit)
+    SIGNAL_MAX_AGE = os.getenv("SIGNAL_MAX_AGE", "")
+    SIGNAL_MAX_AGE_DEFAULT = float(os.getenv("SIGNAL_MAX_AGE_DEFAULT", "0"))
+
+    # Price updates edit one pinned message per chat and symbol instead of sending new ones
+    LIVE_TICKER = os.getenv("LIVE_TICKER", "false").lower() in ("1", "true", "yes")
+    LIVE_TICKER_FILE = os.getenv("LIVE_TICKER_FILE", "live_tickers.json")
+
+    # Signals carry a PNG sparkline of the last SPARKLINE_BARS bars from the signal history
+    SPARKLINES = os.getenv("SPARKLINES", "false").lower() in ("1", "true", "yes")
+    SPARKLINE_TIMEFRAME = os.getenv("SPARKLINE_TIMEFRAME", "15m")
+    SPARKLINE_BARS = int(os.getenv("SPARKLINE_BARS", "48"))
+    SPARKLINE_CACHE_BYTES = int(os.getenv("SPARKLINE_CACHE_BYTES", str(2 * 1024 * 1024)))
+
+    # /price and the price menu: one exchange-rates table for every symbol, fetched at most once per refresh
+    PRICE_API_URL = os.getenv("PRICE_API_URL", "https://api.coinbase.com/v2/exchange-rates")
+    PRICE_BASE_CURRENCY = os.getenv("PRICE_BASE_CURRENCY", "USD")
+    PRICE_REFRESH_SECONDS = float(os.getenv("PRICE_REFRESH_SECONDS", "30"))
+    PRICE_MENU_SYMBOLS = [s.strip().upper() for s in os.getenv("PRICE_MENU_SYMBOLS", "BTC,ETH,SOL").split(",")
+                          if s.strip()]
+
+    # Inline mode (@bot ETH): results per answer (max 50) and how long Telegram may cache them
+    INLINE_MAX_RESULTS = int(os.getenv("INLINE_MAX_RESULTS", "20"))
+    INLINE_CACHE_SECONDS = int(os.getenv("INLINE_CACHE_SECONDS", "10"))
+
+    # Per-strategy channel mode: post once to a channel/group instead of every subscriber
+    # ("Strategy=@channel" or "Strategy=-100123:notify" to also send subscribers a one-line notice; "*" = all)
+    BROADCAST_CHANNELS = os.getenv("BROADCAST_CHANNELS", "")
+    # Own budget for channel posts, msg/s over all channels (Telegram allows ~20 posts/minute per group)
+    BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "0.33"))
+
+    # Event loop lag sampling; a wake-up this late counts as a stall and its stack is logged (0 = off)
+    LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))
+    LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.25"))
+    
+    # Hot reload: file re-read on SIGHUP or POST /admin/reload (X-Admin-Token)
+    CONFIG_FILE = os.getenv("CONFIG_FILE", ".env")
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+    
+    # Recent signals kept per symbol for /history (HISTORY_DIR also keeps them across restarts)
+    HISTORY_PER_SYMBOL = int(os.getenv("HISTORY_PER_SYMBOL", "500"))
+    HISTORY_DIR = os.getenv("HISTORY_DIR")
+    
+    # Strategies without a signal for this long are shown as paused (0 = never)
+    STRATEGY_SILENCE_SECONDS = float(os.getenv("STRATEGY_SILENCE_SECONDS", "86400"))
+    
+    # Raw /webhook bodies are captured here for offline replay (unset = off)
+    WEBHOOK_CAPTURE_DIR = os.getenv("WEBHOOK_CAPTURE_DIR")
+    WEBHOOK_CAPTURE_SEGMENT_MB = float(os.getenv("WEBHOOK_CAPTURE_SEGMENT_MB", "64"))
+
+
+# Settings that can change without a restart
+RELOADABLE_KEYS = ("ALLOWED_TOKENS", "ALLOWED_STRATEGIES", "ALLOWED_CHAT_IDS", "ADMIN_CHAT_IDS")
+
+
+def parse_id_list(value: Optional[str]) -> List[int]:
+    return [int(item.strip()) for item in (value or "").split(",") if item.strip()]
+
+
+def parse_name_list(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class FilterConfig:
+    """
+    Immutable snapshot of the reloadable settings
+
+    Membership sets are compiled once when the snapshot is built, so the
+    signal path only does frozenset lookups. Take one snapshot per signal
+    (`config_store.current()`) and use it throughout to never mix versions.
+    """
+
+    def __init__(self, allowed_tokens: Iterable[str] = (), allowed_strategies: Iterable[str] = (),
+                 allowed_chat_ids: Iterable[int] = (), admin_chat_ids: Iterable[int] = (), version: int = 0):
+        self.allowed_tokens = tuple(allowed_tokens)
+        self.allowed_strategies = tuple(allowed_strategies)
+        self.chat_ids = tuple(dict.fromkeys(allowed_chat_ids))
+        self.admin_chat_ids = frozenset(admin_chat_ids)
+        self.token_set = frozenset(t.strip().upper() for t in self.allowed_tokens if t.strip())
+        self.strategy_set = frozenset(s.strip().upper() for s in self.allowed_strategies if s.strip())
+        self.chat_id_set = frozenset(self.chat_ids)
+        self.version = version
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str], version: int = 0) -> "FilterConfig":
+        return cls(
+            allowed_tokens=parse_name_list(env.get("ALLOWED_TOKENS")),
+            allowed_strategies=parse_name_list(env.get("ALLOWED_STRATEGIES")),
+            allowed_chat_ids=parse_id_list(env.get("ALLOWED_CHAT_IDS")),
+            admin_chat_ids=parse_id_list(env.get("ADMIN_CHAT_IDS")),
+            version=version
+        )
+
+    def allows_token(self, token: str) -> bool:
+        return not self.token_set or (token or "").upper() in self.token_set
+
+    def allows_strategy(self, strategy: str) -> bool:
+        return not self.strategy_set or (strategy or "").upper() in self.strategy_set
+
+    def is_authorized(self, chat_id: int) -> bool:
+        return not self.chat_id_set or chat_id in self.chat_id_set
+
+    def summary(self) -> Dict:
+        return {
+            "version": self.version,
+            "allowed_tokens": len(self.token_set),
+            "allowed_strategies": len(self.strategy_set),
+            "allowed_chats": len(self.chat_ids),
+            "admin_chats": len(self.admin_chat_ids)
+        }
+
+
+class ConfigStore:
+    """
+    Holds the current FilterConfig and swaps it on reload
+
+    The new snapshot is fully built before a single reference assignment
+    publishes it, so readers see either the old or the new config.
+    """
+
+    def __init__(self, snapshot: Optional[FilterConfig] = None, path: Optional[str] = None):
+        self._snapshot = snapshot or FilterConfig.from_env(os.environ)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def current(self) -> FilterConfig:
+        return self._snapshot
+
+    def reload(self, overrides: Optional[Mapping[str, str]] = None) -> FilterConfig:
+        """
+        Rebuild from the config file, the process environment (wins over the
+        file, as with load_dotenv at start) and explicit overrides (win over
+        both), then swap it in
+
+        Raises ValueError if a value does not parse; the old config stays.
+        """
+        with self._lock:
+            env = {}
+            if self.path and os.path.exists(self.path):
+                env.update({k: v for k, v in dotenv_values(self.path).items() if v is not None})
+            # Values load_dotenv copied into os.environ at start are stale file values, not env
+            env.update({k: v for k, v in os.environ.items() if k not in _dotenv_keys})
+            env.update({k: str(v) for k, v in (overrides or {}).items() if k in RELOADABLE_KEYS})
+            snapshot = self.swap(FilterConfig.from_env(env, version=self._snapshot.version + 1))
+        logger.info(f"Config reloaded (version {snapshot.version}): {snapshot.summary()}")
+        return snapshot
+
+    def swap(self, snapshot: FilterConfig) -> FilterConfig:
+        """Publish an already built snapshot"""
+        self._snapshot = snapshot
+        # Legacy readers of the Config attributes (counts in /status and /health)
+        Config.ALLOWED_TOKENS = list(snapshot.allowed_tokens)
+        Config.ALLOWED_STRATEGIES = list(snapshot.allowed_strategies)
+        Config.ALLOWED_CHAT_IDS = list(snapshot.chat_ids)
+        Config.ADMIN_CHAT_IDS = list(snapshot.admin_chat_ids)
+        return snapshot
+
+
+config_store = ConfigStore(path=Config.CONFIG_FILE)
+
+
+def install_reload_signal_handler(store: Optional[ConfigStore] = None) -> bool:
+    """Reload on SIGHUP; the rebuild runs on a helper thread, not inside the handler"""
+    store = store or config_store
+    if not hasattr(signal, "SIGHUP") or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def _reload():
+        try:
+            store.reload()
+        except Exception as e:
+            logger.error(f"Config reload failed, keeping version {store.current().version}: {e}")
+
+    signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(target=_reload, daemon=True).start())
+    logger.info("SIGHUP reloads the signal filters and chat lists")
+    return True
@@ -0,0 +1,73 @@
+import pytest
+from telegram_api import ApiResult
+
+
+class FakeClock:
+    """Monotonic clock the test moves by hand; `sleep` advances it"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeAPI:
+    """
+    Stands in for TelegramAPI and records every call as (method, chat_id, text)
+
+    `responses` answers sendMessage per chat id, chats in `fail_chats` have
+    blocked the bot, everything else succeeds with increasing message ids.
+    `edit_response` answers editMessageText and `updates` getUpdates.
+    """
+
+    def __init__(self, token="123:abc", responses=None, fail_chats=(), updates=()):
+        self.token = token
+        self.responses = responses or {}
+        self.fail_chats = fail_chats
+        self.updates = list(updates)
+        self.edit_response = None
+        self.calls = []
+        self.sent = []
+        self._next_id = 100
+
+    def send_message(self, chat_id, text, parse_mode='HTML', **params):
+        self.calls.append(('sendMessage', chat_id, text))
+        self.sent.append(chat_id)
+        if chat_id in self.fail_chats:
+            return ApiResult(False, 403, "Forbidden: bot was blocked by the user")
+        if chat_id in self.responses:
+            return self.responses[chat_id]
+        self._next_id += 1
+        return ApiResult(True, result={'message_id': self._next_id})
+
+    def call(self, method, **params):
+        if method == 'getUpdates':
+            return ApiResult(True, result=[update for update in self.updates
+                                           if update['update_id'] >= params['offset']])
+        self.calls.append((method, params['chat_id'], params.get('text')))
+        if method == 'editMessageText' and self.edit_response:
+            return self.edit_response
+        return ApiResult(True, result=True)
+
+    def methods(self):
+        return [call[0] for call in self.calls]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def make_api():
+    """FakeAPI factory, for tests that need several or configured ones"""
+    return FakeAPI
+
+
+@pytest.fixture
+def api(make_api):
+    return make_api()
@@ -0,0 +1,117 @@
+import logging
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+from retry_engine import RetryEngine, DeliveryResult
+from suppression import SuppressionList, suppressed_chats
+from telegram_api import TelegramAPI
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_SUPPRESSED = "suppressed"
+
+# Preference flag that mutes each message type (on top of notifications_enabled)
+MESSAGE_TYPE_PREFS = {"signal": "signal_alerts_enabled", "price": "price_alerts_enabled"}
+
+
+class DeliveryEngine:
+    """Synchronous delivery layer: Bot API client plus the shared retry engine"""
+
+    def __init__(self, api: Optional[TelegramAPI] = None, retry_engine: Optional[RetryEngine] = None,
+                 suppression: Optional[SuppressionList] = None):
+        self.api = api or TelegramAPI()
+        self.retry_engine = retry_engine or RetryEngine.from_config()
+        self.suppression = suppression if suppression is not None else suppressed_chats
+        self._dead_chat_listeners: List[Callable] = []
+
+    def on_dead_chat(self, listener: Callable):
+        """Register `listener(chat_id, reason)`, called once per newly suppressed chat"""
+        self._dead_chat_listeners.append(listener)
+
+    def deliverable(self, chat_ids: Iterable) -> List:
+        """Routing step: drop suppressed chats before any budget is spent"""
+        return self.suppression.filter(chat_ids)
+
+    def handle_result(self, result: DeliveryResult) -> DeliveryResult:
+        """Record permanent failures in the suppression list and notify listeners"""
+        if self.suppression.record(result):
+            for listener in self._dead_chat_listeners:
+                listener(result.chat_id, result.api_result.dead_reason)
+        return result
+
+    def _run(self, chat_id, attempt: Callable) -> DeliveryResult:
+        if chat_id in self.suppression:
+            return DeliveryResult(chat_id, OUTCOME_SUPPRESSED, 0)
+        return self.handle_result(self.retry_engine.run(chat_id, attempt))
+
+    def send_message(self, chat_id, text: str, parse_mode: str = 'HTML', **params) -> DeliveryResult:
+        """Send one message with retries, honoring retry_after and the chat's breaker"""
+        result = self._run(chat_id, lambda: self.api.send_message(chat_id, text, parse_mode=parse_mode, **params))
+        if result.ok:
+            logger.info(f"Message sent successfully to chat {chat_id}")
+        return result
+
+    def call(self, chat_id, method: str, **params) -> DeliveryResult:
+        """Any other chat-scoped Bot API method (editMessageText, pinChatMessage...) under the same rules"""
+        return self._run(chat_id, lambda: self.api.call(method, chat_id=chat_id, **params))
+
+    def broadcast(self, chat_ids: Iterable, text: str, parse_mode: str = 'HTML') -> List[DeliveryResult]:
+        """Send the same message to every deliverable chat in order"""
+        return [self.send_message(chat_id, text, parse_mode=parse_mode) for chat_id in self.deliverable(chat_ids)]
+
+
+class RecipientIndex:
+    """
+    Chats that muted each message type, kept in step with the menu toggles
+
+    Chats are opted in until they say otherwise, so only opt-outs are
+    stored: per message type, the chats that turned that type or all
+    notifications off. A toggle touches one chat's entries; resolving a
+    broadcast is a set difference, cached until the next toggle.
+    """
+
+    def __init__(self):
+        self._muted: Dict[str, set] = {message_type: set() for message_type in MESSAGE_TYPE_PREFS}
+        self._cache: Dict = {}
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def update(self, chat_id, prefs: Dict):
+        """Apply a chat's preferences (UserState.to_dict() or the shared store's copy)"""
+        enabled = prefs.get('notifications_enabled', True)
+        with self._lock:
+            for message_type, flag in MESSAGE_TYPE_PREFS.items():
+                if enabled and prefs.get(flag, True):
+                    self._muted[message_type].discard(chat_id)
+                else:
+                    self._muted[message_type].add(chat_id)
+            self.version += 1
+            self._cache.clear()
+
+    def load(self, items: Iterable):
+        """Seed from (chat_id, prefs) pairs, e.g. SharedStateStore.all_prefs()"""
+        for chat_id, prefs in items:
+            self.update(chat_id, prefs)
+
+    def forget(self, chat_id):
+        with self._lock:
+            for muted in self._muted.values():
+                muted.discard(chat_id)
+            self.version += 1
+            self._cache.clear()
+
+    def wants(self, chat_id, message_type: str = "signal") -> bool:
+        return chat_id not in self._muted[message_type]
+
+    def resolve(self, chat_ids: FrozenSet, message_type: str = "signal") -> FrozenSet:
+        """Chats in `chat_ids` that take `message_type` (pass a FilterConfig's chat_id_set)"""
+        key = (chat_ids, message_type)
+        with self._lock:
+            recipients = self._cache.get(key)
+            if recipients is None:
+                if len(self._cache) >= 256:
+                    self._cache.clear()  # snapshots replaced by config reloads (one chat set per tenant)
+                recipients = self._cache[key] = frozenset(chat_ids) - self._muted[message_type]
+            return recipients
+
+    def muted_count(self, message_type: str) -> int:
+        return len(self._muted[message_type])
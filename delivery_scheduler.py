@@ -0,0 +1,255 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Dict, Iterable, Optional
+from config import Config
+from delivery import DeliveryEngine
+from load_shedding import SHED_EXPIRED, ShedPolicy
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+CLASS_SIGNAL = "signal"
+CLASS_PRICE = "price"
+
+
+class DeliveryJob:
+    """One message for one chat, waiting in its class queue"""
+
+    def __init__(self, chat_id, text: str, message_class: str, enqueued_at: float, finish: float,
+                 parse_mode: str = 'HTML', send: Optional[Callable] = None, key: Optional[str] = None,
+                 born: Optional[float] = None, strategy: str = "", seq: int = 0, max_age: float = 0):
+        self.chat_id = chat_id
+        self.text = text
+        self.message_class = message_class
+        self.enqueued_at = enqueued_at
+        self.finish = finish
+        self.parse_mode = parse_mode
+        self.send = send
+        self.key = key
+        self.born = born
+        self.strategy = strategy
+        self.seq = seq
+        self.max_age = max_age
+
+
+class DeliveryScheduler:
+    """
+    Weighted fair queuing between message classes in front of DeliveryEngine
+
+    Each class has a FIFO queue. On enqueue a job is stamped with a virtual
+    finish time, max(virtual now, class's last finish) + 1 / weight, and
+    senders always take the head with the smallest stamp (self-clocked WFQ).
+    A trade signal arriving behind a backlog of price updates is therefore
+    sent next, while a backlogged class still gets its weight's share of
+    the sends. Every send still goes through the engine's rate limiter and
+    retries. The time each job spent queued is recorded per class.
+
+    With a ShedPolicy, jobs it no longer considers worth sending are
+    dropped as they reach the head of their queue. A job submitted with a
+    `key` (e.g. the symbol of a price update) is superseded by any later
+    job for the same chat, class and key. A job past its `max_age` is
+    always dropped. Per class, the time from enqueue to delivery and the
+    age of the signal when delivered are recorded too.
+    """
+
+    def __init__(self, engine: Optional[DeliveryEngine] = None, weights: Optional[Dict[str, float]] = None,
+                 senders: Optional[int] = None, clock=time.monotonic, shedder: Optional[ShedPolicy] = None,
+                 wall_clock=time.time):
+        self.engine = engine or DeliveryEngine()
+        if weights is None:
+            share = min(max(Config.DELIVERY_PRICE_SHARE, 0.01), 0.99)
+            weights = {CLASS_SIGNAL: 1 - share, CLASS_PRICE: share}
+        self.weights = dict(weights)
+        self.senders = senders if senders is not None else Config.DELIVERY_SENDERS
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.shedder = shedder
+        if shedder is not None:
+            shedder.concurrency = max(self.senders, 1)
+        self._queues: Dict[str, deque] = {name: deque() for name in self.weights}
+        self._last_finish = {name: 0.0 for name in self.weights}
+        self._virtual = 0.0
+        self._seq = 0
+        self._latest: Dict = {}
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closed = False
+        self.delays = {name: LatencyHistogram() for name in self.weights}
+        self.latencies = {name: LatencyHistogram() for name in self.weights}
+        self.ages = {name: LatencyHistogram() for name in self.weights}
+        self.sent = Counter()
+        self.failed = Counter()
+        self.shed = Counter()
+        self.expired = Counter()
+
+    def submit(self, chat_ids: Iterable, text: str, message_class: str = CLASS_SIGNAL,
+               parse_mode: str = 'HTML', send: Optional[Callable] = None, key: Optional[str] = None,
+               born: Optional[float] = None, strategy: str = "", max_age: float = 0) -> int:
+        """
+        Queue `text` for every chat; returns how many jobs were queued
+
+        `send(chat_id, text)` replaces the plain sendMessage, e.g. to edit a
+        live ticker; it must return a DeliveryResult. `born` is the signal's
+        payload time (epoch seconds) freshness and `max_age` are judged by.
+        """
+        if message_class not in self._queues:
+            raise ValueError(f"Unknown message class {message_class!r}")
+        step = 1.0 / self.weights[message_class]
+        queued = 0
+        with self._cond:
+            now = self.clock()
+            queue = self._queues[message_class]
+            finish = self._last_finish[message_class]
+            for chat_id in chat_ids:
+                finish = max(self._virtual, finish) + step
+                self._seq += 1
+                if key is not None:
+                    self._latest[(message_class, chat_id, key)] = self._seq
+                queue.append(DeliveryJob(chat_id, text, message_class, now, finish, parse_mode, send,
+                                         key, born, strategy, self._seq, max_age))
+                queued += 1
+            self._last_finish[message_class] = finish
+            self._cond.notify(queued)
+        if queued:
+            self._start()
+        return queued
+
+    def _start(self):
+        if len(self._threads) >= self.senders:
+            return
+        with self._cond:
+            while len(self._threads) < self.senders and not self._closed:
+                thread = threading.Thread(target=self._send_loop, daemon=True,
+                                          name=f"delivery-sender-{len(self._threads)}")
+                self._threads.append(thread)
+                thread.start()
+
+    def next_job(self, timeout: Optional[float] = None) -> Optional[DeliveryJob]:
+        """
+        Take the job with the smallest finish stamp, waiting up to `timeout` (None = forever)
+
+        Jobs the shed policy drops on the way are counted and skipped.
+        """
+        with self._cond:
+            deadline = None if timeout is None else self.clock() + timeout
+            while True:
+                heads = [queue[0] for queue in self._queues.values() if queue]
+                if heads:
+                    job = min(heads, key=lambda head: head.finish)
+                    self._queues[job.message_class].popleft()
+                    self._virtual = job.finish
+                    if self._should_shed(job):
+                        self._cond.notify_all()
+                        continue
+                    self._in_flight += 1
+                    break
+                if self._closed:
+                    return None
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+        self.delays[job.message_class].observe(self.clock() - job.enqueued_at)
+        return job
+
+    def _should_shed(self, job: DeliveryJob) -> bool:
+        """Called with the lock held, `job` already off its queue"""
+        superseded = False
+        if job.key is not None:
+            latest_key = (job.message_class, job.chat_id, job.key)
+            superseded = self._latest.get(latest_key) != job.seq
+            if not superseded:
+                del self._latest[latest_key]
+        if job.max_age and job.born is not None and self.wall_clock() - job.born > job.max_age:
+            reason = SHED_EXPIRED
+            self.expired[job.message_class] += 1
+        elif self.shedder is not None:
+            self.shedder.update(sum(len(queue) for queue in self._queues.values()) + 1)
+            reason = self.shedder.reason(job, superseded)
+        else:
+            reason = None
+        if reason is None:
+            return False
+        if self.shedder is not None:
+            self.shedder.record(job, reason)
+        self.shed[job.message_class] += 1
+        return True
+
+    def deliver(self, job: DeliveryJob) -> bool:
+        """Send a job taken with next_job"""
+        started = self.clock()
+        try:
+            if job.send:
+                ok = job.send(job.chat_id, job.text).ok
+            else:
+                ok = self.engine.send_message(job.chat_id, job.text, parse_mode=job.parse_mode).ok
+        except Exception as e:
+            logger.error(f"Delivery to chat {job.chat_id} raised: {e}")
+            ok = False
+        finished = self.clock()
+        if self.shedder is not None:
+            self.shedder.record_send(finished - started)
+        if ok:
+            self.latencies[job.message_class].observe(finished - job.enqueued_at)
+            if job.born is not None:
+                self.ages[job.message_class].observe(max(self.wall_clock() - job.born, 0.0))
+        with self._cond:
+            (self.sent if ok else self.failed)[job.message_class] += 1
+            self._in_flight -= 1
+            self._cond.notify_all()
+        return ok
+
+    def _send_loop(self):
+        while True:
+            job = self.next_job()
+            if job is None:
+                return
+            self.deliver(job)
+
+    def queued(self, message_class: Optional[str] = None) -> int:
+        with self._cond:
+            if message_class:
+                return len(self._queues[message_class])
+            return sum(len(queue) for queue in self._queues.values())
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued job has been sent; False on timeout"""
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._cond:
+            while self._in_flight or any(self._queues.values()):
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> Dict:
+        """Per class: weight, queue length, sends and queueing delay"""
+        with self._cond:
+            lengths = {name: len(queue) for name, queue in self._queues.items()}
+        return {
+            name: {
+                "weight": round(weight, 4),
+                "queued": lengths[name],
+                "sent": self.sent[name],
+                "failed": self.failed[name],
+                "shed": self.shed[name],
+                "expired": self.expired[name],
+                "queue_delay": self.delays[name].summary(),
+                "delivery_latency": self.latencies[name].summary(),
+                "signal_age": self.ages[name].summary()
+            }
+            for name, weight in self.weights.items()
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Let senders drain the queues, then stop them"""
+        self.wait_idle(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
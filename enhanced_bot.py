@@ -7,8 +7,11 @@ import random
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
-import requests
 from config import Config
+from price_table import price_table
+from shared_state import get_shared_state
+from signal_history import SegmentFollower
+from strategy_registry import strategy_registry
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +23,12 @@ logger = logging.getLogger(__name__)
 # User state storage (in production, use a database)
 user_states = {}
 
+# With SHARED_STATE_PATH set, preferences are shared with the webhook workers
+shared_state = get_shared_state()
+
+# This bot receives no webhooks; the strategy menu follows the signals the webhook workers store in HISTORY_DIR
+history_follower = SegmentFollower(Config.HISTORY_DIR) if Config.HISTORY_DIR else None
+
 # Joke collection for the joke bot
 JOKES = [
     "Why don't traders ever play poker? Because they're always folding!",
@@ -39,31 +48,6 @@ JOKES = [
     "Why did the swing trader go to the park? To practice holding!",
 ]
 
-# Current active strategies (this would come from TradingView in production)
-ACTIVE_STRATEGIES = {
-    "BTC 5min Price Feed": {
-        "symbol": "BTCUSD", 
-        "timeframe": "5m",
-        "status": "Active",
-        "last_signal": "Price Update",
-        "description": "Real-time BTC price monitoring every 5 minutes"
-    },
-    "EMA Cross Strategy": {
-        "symbol": "ETHUSD",
-        "timeframe": "15m", 
-        "status": "Active",
-        "last_signal": "Buy Signal",
-        "description": "EMA 21/50 crossover strategy for ETH"
-    },
-    "RSI Divergence": {
-        "symbol": "ADAUSD",
-        "timeframe": "1h",
-        "status": "Paused", 
-        "last_signal": "Sell Signal",
-        "description": "RSI divergence detection for ADA"
-    }
-}
-
 class UserState:
     def __init__(self, user_id):
         self.user_id = user_id
@@ -80,11 +64,27 @@ class UserState:
             'signal_alerts_enabled': self.signal_alerts_enabled,
             'last_btc_price': self.last_btc_price
         }
+    
+    def update_from_dict(self, prefs):
+        self.notifications_enabled = prefs.get('notifications_enabled', self.notifications_enabled)
+        self.price_alerts_enabled = prefs.get('price_alerts_enabled', self.price_alerts_enabled)
+        self.signal_alerts_enabled = prefs.get('signal_alerts_enabled', self.signal_alerts_enabled)
+        self.last_btc_price = prefs.get('last_btc_price', self.last_btc_price)
 
 def get_user_state(user_id):
     if user_id not in user_states:
         user_states[user_id] = UserState(user_id)
-    return user_states[user_id]
+    user_state = user_states[user_id]
+    if shared_state:
+        prefs = shared_state.get_prefs(user_id)
+        if prefs:
+            user_state.update_from_dict(prefs)
+    return user_state
+
+def save_user_state(user_state):
+    """Persist preferences so every worker process sees the change"""
+    if shared_state:
+        shared_state.put_prefs(user_state.user_id, user_state.to_dict())
 
 def create_main_menu():
     """Create the main menu keyboard"""
@@ -92,7 +92,7 @@ def create_main_menu():
         [
             InlineKeyboardButton("📈 Current Strategy", callback_data="menu_strategy"),
             InlineKeyboardButton("😂 Joke Bot", callback_data="menu_joke")
-        ],
+        ] if history_follower else [InlineKeyboardButton("😂 Joke Bot", callback_data="menu_joke")],
         [
             InlineKeyboardButton("🔔 Notifications", callback_data="menu_notifications"),
             InlineKeyboardButton("📊 Price Check", callback_data="menu_price")
@@ -193,16 +193,18 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     await update.message.reply_text(status_text, parse_mode='Markdown')
 
+def fetch_btc_price():
+    """Current BTC price from the shared rate table (blocking on a refresh, use get_btc_price from handlers)"""
+    return price_table.price("BTC")
+
 async def get_btc_price():
-    """Fetch current BTC price from a public API"""
-    try:
-        response = requests.get('https://api.coinbase.com/v2/exchange-rates?currency=BTC', timeout=5)
-        data = response.json()
-        btc_price = float(data['data']['rates']['USD'])
-        return btc_price
-    except Exception as e:
-        logger.error(f"Error fetching BTC price: {e}")
-        return None
+    """Fetch current BTC price on a worker thread so the event loop keeps serving other users"""
+    return await asyncio.to_thread(fetch_btc_price)
+
+def refresh_strategies():
+    """Feed the registry the signals stored in HISTORY_DIR since the last look (blocking)"""
+    for entry in history_follower.poll():
+        strategy_registry.observe(entry, ts=entry["time"])
 
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle button callbacks"""
@@ -214,31 +216,10 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     data = query.data
     
     if data == "menu_strategy":
-        text = """
-📈 **Current Trading Strategies**
-
-Here are your active TradingView strategies:
-        """
-        
-        for name, strategy in ACTIVE_STRATEGIES.items():
-            status_icon = "🟢" if strategy["status"] == "Active" else "🟡" if strategy["status"] == "Paused" else "🔴"
-            text += f"""
-{status_icon} **{name}**
-• Symbol: {strategy["symbol"]}
-• Timeframe: {strategy["timeframe"]}
-• Status: {strategy["status"]}
-• Last Signal: {strategy["last_signal"]}
-• Description: {strategy["description"]}
-            """
-        
-        text += f"""
-
-📊 **Total Strategies:** {len(ACTIVE_STRATEGIES)}
-✅ **Active:** {sum(1 for s in ACTIVE_STRATEGIES.values() if s['status'] == 'Active')}
-⏸️ **Paused:** {sum(1 for s in ACTIVE_STRATEGIES.values() if s['status'] == 'Paused')}
-
-💡 Add more strategies in TradingView with your webhook URL
-        """
+        if history_follower:
+            await asyncio.to_thread(refresh_strategies)
+        # Cached by the registry until a signal arrives or a strategy is auto-paused
+        text = strategy_registry.render()
         
         keyboard = [
             [InlineKeyboardButton("🔄 Refresh", callback_data="menu_strategy")],
@@ -305,6 +286,7 @@ Current Status:
                 price_change = f"\n{arrow} Change: ${change:+.2f} ({change_pct:+.2f}%)"
             
             user_state.last_btc_price = btc_price
+            save_user_state(user_state)
             
             text = f"""
 💰 **Live BTC Price**
@@ -416,6 +398,7 @@ You can also test by visiting:
     
     elif data == "toggle_all_notifications":
         user_state.notifications_enabled = not user_state.notifications_enabled
+        save_user_state(user_state)
         status = "enabled" if user_state.notifications_enabled else "disabled"
         
         await query.edit_message_text(
@@ -426,6 +409,7 @@ You can also test by visiting:
     
     elif data == "toggle_price_alerts":
         user_state.price_alerts_enabled = not user_state.price_alerts_enabled
+        save_user_state(user_state)
         status = "enabled" if user_state.price_alerts_enabled else "disabled"
         
         await query.edit_message_text(
@@ -436,6 +420,7 @@ You can also test by visiting:
     
     elif data == "toggle_signal_alerts":
         user_state.signal_alerts_enabled = not user_state.signal_alerts_enabled
+        save_user_state(user_state)
         status = "enabled" if user_state.signal_alerts_enabled else "disabled"
         
         await query.edit_message_text(
@@ -501,7 +486,9 @@ async def main():
     
     await application.bot.set_my_commands(commands)
     
-    # Start the bot
+    # Start the bot (this entry point has no HTTP server, so it always polls)
+    if Config.TELEGRAM_UPDATE_MODE == "webhook":
+        logger.warning("Webhook mode is served by combined_bot.py, enhanced_bot.py keeps polling")
     logger.info("Enhanced TradePods Bot starting...")
     await application.run_polling(allowed_updates=Update.ALL_TYPES)
 
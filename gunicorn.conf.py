@@ -0,0 +1,20 @@
+import os
+
+# Railway/Heroku provide PORT and WEB_CONCURRENCY
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+# Sharded broadcasts give up after DELIVERY_SHARD_TIMEOUT (50s), before this kills the worker
+timeout = 60
+accesslog = "-"
+
+# Workers share dedupe, rate-limit buckets, counters and user preferences
+# through this SQLite file; set it explicitly to put it on a persistent volume
+os.environ.setdefault("SHARED_STATE_PATH", "/tmp/tradepods_state.sqlite3")
+
+
+def post_worker_init(worker):
+    """`kill -HUP <master>` rolls workers onto the new file; this makes HUP to one worker reload it in place"""
+    from config import install_reload_signal_handler
+    install_reload_signal_handler()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Streaming versions of the Pine Script strategies
+
+Each indicator takes one bar at a time and updates in O(1): moving averages
+keep a running sum or the previous value, the 20-bar highest/lowest keep a
+monotonic deque. `None` plays the part of Pine's `na` (warm-up), and any
+comparison with it is false, like in Pine.
+
+Strategies mirror the scripts in tradingview_scripts/ and the watchlist
+script and emit the dict `SignalProcessor.parse_signal` would build from
+the script's alert message, so they go through the same filters and
+delivery as webhooks.
+
+Run the strategies over bars exported from a TradingView chart (CSV with
+time, open, high, low, close columns):
+
+    python indicators.py BTCUSDT.csv --symbol BTCUSDT --exchange BINANCE
+"""
+import argparse
+import csv
+import logging
+from collections import deque, namedtuple
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# time is epoch seconds of the bar open
+Bar = namedtuple("Bar", ["time", "open", "high", "low", "close"])
+
+
+class SMA:
+    """ta.sma: running sum over a fixed window"""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.window = deque()
+        self.total = 0.0
+        self.value = None
+
+    def update(self, x: Optional[float]) -> Optional[float]:
+        if x is None:
+            return self.value
+        self.window.append(x)
+        self.total += x
+        if len(self.window) > self.length:
+            self.total -= self.window.popleft()
+        self.value = self.total / self.length if len(self.window) == self.length else None
+        return self.value
+
+
+class EMA:
+    """ta.ema (alpha 2/(n+1)), seeded with the SMA of the first n values like Pine"""
+
+    def __init__(self, length: int, alpha: Optional[float] = None):
+        self.length = length
+        self.alpha = alpha if alpha is not None else 2.0 / (length + 1)
+        self.seed = SMA(length)
+        self.value = None
+
+    def update(self, x: Optional[float]) -> Optional[float]:
+        if x is None:
+            return self.value
+        if self.value is None:
+            self.value = self.seed.update(x)
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class RMA(EMA):
+    """ta.rma, Wilder's smoothing (alpha 1/n)"""
+
+    def __init__(self, length: int):
+        super().__init__(length, alpha=1.0 / length)
+
+
+class RSI:
+    """ta.rsi: RMA of gains over RMA of losses"""
+
+    def __init__(self, length: int = 14):
+        self.up = RMA(length)
+        self.down = RMA(length)
+        self.previous = None
+        self.value = None
+
+    def update(self, x: float) -> Optional[float]:
+        if self.previous is not None:
+            up = self.up.update(max(x - self.previous, 0.0))
+            down = self.down.update(max(self.previous - x, 0.0))
+            if up is not None and down is not None:
+                self.value = 100.0 if down == 0 else 0.0 if up == 0 else 100.0 - 100.0 / (1.0 + up / down)
+        self.previous = x
+        return self.value
+
+
+class MACD:
+    """ta.macd: fast EMA - slow EMA, and an EMA of that as the signal line"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self.macd = None
+
+    def update(self, x: float):
+        fast, slow = self.fast.update(x), self.slow.update(x)
+        self.macd = fast - slow if fast is not None and slow is not None else None
+        return self.macd, self.signal.update(self.macd)
+
+
+class RollingExtreme:
+    """ta.highest / ta.lowest over `length` bars with a monotonic deque"""
+
+    def __init__(self, length: int = 20, highest: bool = True):
+        self.length = length
+        self.highest = highest
+        self.window = deque()  # (bar index, value), values monotonic from the front
+        self.count = 0
+
+    def update(self, x: float) -> Optional[float]:
+        if self.highest:
+            while self.window and self.window[-1][1] <= x:
+                self.window.pop()
+        else:
+            while self.window and self.window[-1][1] >= x:
+                self.window.pop()
+        self.window.append((self.count, x))
+        self.count += 1
+        if self.window[0][0] <= self.count - 1 - self.length:
+            self.window.popleft()
+        return self.window[0][1] if self.count >= self.length else None
+
+
+class Cross:
+    """ta.crossover / ta.crossunder of two series (false while either is na)"""
+
+    def __init__(self):
+        self.previous = (None, None)
+
+    def update(self, a: Optional[float], b: Optional[float]) -> int:
+        """1 on a cross over, -1 on a cross under, else 0"""
+        prev_a, prev_b = self.previous
+        self.previous = (a, b)
+        if None in (a, b, prev_a, prev_b):
+            return 0
+        if a > b and prev_a <= prev_b:
+            return 1
+        if a < b and prev_a >= prev_b:
+            return -1
+        return 0
+
+
+def _gt(a: Optional[float], b: Optional[float]) -> bool:
+    return a is not None and b is not None and a > b
+
+
+def _lt(a: Optional[float], b: Optional[float]) -> bool:
+    return a is not None and b is not None and a < b
+
+
+def format_price(value: float, decimals: Optional[int] = None) -> str:
+    """str.tostring(close) / str.tostring(close, '#.##'): no trailing zeros"""
+    text = f"{value:.{decimals}f}" if decimals is not None else repr(float(value))
+    if "." in text and "e" not in text:
+        text = text.rstrip("0").rstrip(".")
+    return text
+
+
+class Strategy:
+    """One Pine strategy on one symbol; `update` returns BUY, SELL or None per bar"""
+
+    name = ""
+    price_decimals: Optional[int] = None
+
+    def update(self, bar: Bar) -> Optional[str]:
+        raise NotImplementedError
+
+    def message(self, action: str, timeframe: str) -> str:
+        return f"{action.capitalize()} signal triggered on {timeframe} timeframe"
+
+
+class EmaRsiStrategy(Strategy):
+    """ema_rsi_strategy.pine: EMA cross confirmed by RSI not being stretched"""
+
+    name = "EMA Cross + RSI"
+
+    def __init__(self, fast: int = 9, slow: int = 21, rsi_length: int = 14,
+                 overbought: float = 70, oversold: float = 30):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.rsi = RSI(rsi_length)
+        self.cross = Cross()
+        self.overbought = overbought
+        self.oversold = oversold
+
+    def update(self, bar: Bar) -> Optional[str]:
+        rsi = self.rsi.update(bar.close)
+        cross = self.cross.update(self.fast.update(bar.close), self.slow.update(bar.close))
+        if cross == 1 and _lt(rsi, self.overbought):
+            return "BUY"
+        if cross == -1 and _gt(rsi, self.oversold):
+            return "SELL"
+        return None
+
+    def message(self, action: str, timeframe: str) -> str:
+        direction = "above" if action == "BUY" else "below"
+        return f"Fast EMA crossed {direction} Slow EMA with RSI confirmation"
+
+
+class EmaCrossStrategy(Strategy):
+    """multi_strategy_alerts.pine, "EMA Cross\""""
+
+    name = "EMA Cross"
+    price_decimals = 2
+
+    def __init__(self, fast: int = 9, slow: int = 21):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.cross = Cross()
+
+    def update(self, bar: Bar) -> Optional[str]:
+        cross = self.cross.update(self.fast.update(bar.close), self.slow.update(bar.close))
+        return "BUY" if cross == 1 else "SELL" if cross == -1 else None
+
+
+class RsiLevelsStrategy(Strategy):
+    """multi_strategy_alerts.pine, "RSI Levels": RSI back above the buy level / below the sell level"""
+
+    name = "RSI Levels"
+    price_decimals = 2
+
+    def __init__(self, length: int = 14, buy_level: float = 30, sell_level: float = 70):
+        self.rsi = RSI(length)
+        self.buy_cross = Cross()
+        self.sell_cross = Cross()
+        self.buy_level = buy_level
+        self.sell_level = sell_level
+
+    def update(self, bar: Bar) -> Optional[str]:
+        rsi = self.rsi.update(bar.close)
+        buy = self.buy_cross.update(rsi, self.buy_level) == 1
+        sell = self.sell_cross.update(rsi, self.sell_level) == -1
+        return "BUY" if buy else "SELL" if sell else None
+
+
+class MacdStrategy(Strategy):
+    """multi_strategy_alerts.pine, "MACD": MACD crosses its signal line, up below zero (BUY), down above (SELL)"""
+
+    name = "MACD"
+    price_decimals = 2
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.macd = MACD(fast, slow, signal)
+        self.cross = Cross()
+
+    def update(self, bar: Bar) -> Optional[str]:
+        macd, signal = self.macd.update(bar.close)
+        cross = self.cross.update(macd, signal)
+        if cross == 1 and macd < 0:
+            return "BUY"
+        if cross == -1 and macd > 0:
+            return "SELL"
+        return None
+
+
+class SupportResistanceStrategy(Strategy):
+    """multi_strategy_alerts.pine, "Support/Resistance": close breaks the previous 20-bar range"""
+
+    name = "Support/Resistance"
+    price_decimals = 2
+
+    def __init__(self, length: int = 20):
+        self.support = RollingExtreme(length, highest=False)
+        self.resistance = RollingExtreme(length, highest=True)
+        self.previous = (None, None, None)  # close, support, resistance of the last bar
+
+    def update(self, bar: Bar) -> Optional[str]:
+        prev_close, prev_support, prev_resistance = self.previous
+        self.previous = (bar.close, self.support.update(bar.low), self.resistance.update(bar.high))
+        if prev_close is None:
+            return None
+        if _gt(bar.close, prev_resistance) and prev_close <= prev_resistance:
+            return "BUY"
+        if _lt(bar.close, prev_support) and prev_close >= prev_support:
+            return "SELL"
+        return None
+
+
+class MaCrossStrategy(Strategy):
+    """watchlist_strategy.pine: SMA cross with an optional RSI filter"""
+
+    def __init__(self, name: str = "Custom Strategy", fast: int = 9, slow: int = 21, use_rsi_filter: bool = True,
+                 rsi_length: int = 14, oversold: float = 30, overbought: float = 70):
+        self.name = name
+        self.fast_length, self.slow_length = fast, slow
+        self.fast = SMA(fast)
+        self.slow = SMA(slow)
+        self.rsi = RSI(rsi_length)
+        self.cross = Cross()
+        self.use_rsi_filter = use_rsi_filter
+        self.oversold = oversold
+        self.overbought = overbought
+
+    def update(self, bar: Bar) -> Optional[str]:
+        rsi = self.rsi.update(bar.close)
+        cross = self.cross.update(self.fast.update(bar.close), self.slow.update(bar.close))
+        if cross == 1 and (not self.use_rsi_filter or _lt(rsi, self.overbought)):
+            return "BUY"
+        if cross == -1 and (not self.use_rsi_filter or _gt(rsi, self.oversold)):
+            return "SELL"
+        return None
+
+    def message(self, action: str, timeframe: str) -> str:
+        direction = "above" if action == "BUY" else "below"
+        return f"Fast MA({self.fast_length}) crossed {direction} Slow MA({self.slow_length})"
+
+
+DEFAULT_STRATEGIES = (EmaRsiStrategy, EmaCrossStrategy, RsiLevelsStrategy, MacdStrategy,
+                      SupportResistanceStrategy, MaCrossStrategy)
+
+
+class IndicatorEngine:
+    """
+    Runs a set of strategies per symbol on closed bars
+
+    `strategies` are factories (classes or lambdas) called once per new
+    symbol. Bars of a symbol must arrive in time order, once each.
+    """
+
+    def __init__(self, strategies: Iterable[Callable[[], Strategy]] = DEFAULT_STRATEGIES,
+                 timeframe: str = "1", exchange: str = ""):
+        self.factories = list(strategies)
+        self.timeframe = timeframe
+        self.exchange = exchange
+        self._symbols: Dict[str, List[Strategy]] = {}
+
+    def update(self, symbol: str, bar: Bar, exchange: Optional[str] = None) -> List[Dict]:
+        """Feed one closed bar; returns the signals it triggered"""
+        symbol = symbol.split(':')[-1]
+        strategies = self._symbols.get(symbol)
+        if strategies is None:
+            strategies = self._symbols[symbol] = [factory() for factory in self.factories]
+
+        signals = []
+        for strategy in strategies:
+            action = strategy.update(bar)
+            if action:
+                signals.append({
+                    'action': action,
+                    'token': symbol,
+                    'strategy': strategy.name,
+                    'price': format_price(bar.close, strategy.price_decimals),
+                    'exchange': exchange or self.exchange or None,
+                    'message': strategy.message(action, self.timeframe),
+                    'timestamp': str(int(bar.time * 1000))
+                })
+        return signals
+
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+
+def read_bars(path: str) -> List[Bar]:
+    """Bars from a TradingView chart export (time as epoch seconds or ISO 8601)"""
+    from datetime import datetime
+
+    bars = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): v for k, v in row.items() if k}
+            stamp = row["time"]
+            try:
+                ts = float(stamp)
+            except ValueError:
+                ts = datetime.fromisoformat(stamp.replace("Z", "+00:00")).timestamp()
+            bars.append(Bar(ts, float(row["open"]), float(row["high"]), float(row["low"]), float(row["close"])))
+    return bars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('bars', help="CSV with time, open, high, low, close")
+    parser.add_argument('--symbol', required=True)
+    parser.add_argument('--exchange', default="")
+    parser.add_argument('--timeframe', default="1", help="timeframe.period, only used in messages")
+    args = parser.parse_args()
+
+    engine = IndicatorEngine(timeframe=args.timeframe, exchange=args.exchange)
+    for bar in read_bars(args.bars):
+        for signal in engine.update(args.symbol, bar):
+            print(f"{signal['timestamp']} {signal['strategy']:<20} {signal['action']:<4} {signal['price']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import html
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+KIND_SYMBOL = "symbol"
+KIND_STRATEGY = "strategy"
+
+PRICE_ACTIONS = ("PRICE_UPDATE", "PRICE_MOVEMENT")
+
+
+class PrefixIndex:
+    """
+    Sorted list of (KEY, kind, name) answering prefix queries with bisect
+
+    A prefix is one binary search plus a walk over the matches. Strategies
+    are also indexed under every later word of their name, so "rsi" finds
+    "EMA Cross + RSI". Names arrive rarely, so insort's O(n) insert is fine.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, str, str]] = []
+        self._names = set()
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, item: Tuple[str, str]) -> bool:
+        return item in self._names
+
+    def add(self, name: str, kind: str) -> bool:
+        if not name or (kind, name) in self._names:
+            return False
+        self._names.add((kind, name))
+        words = name.upper().split()
+        keys = {name.upper()}
+        if kind == KIND_STRATEGY:
+            keys.update(" ".join(words[i:]) for i in range(1, len(words)))
+        for key in keys:
+            insort(self._keys, (key, kind, name))
+        return True
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[str, str]]:
+        """(kind, name) of up to `limit` names matching `prefix` in key order (an exact match sorts first)"""
+        prefix = prefix.strip().upper()
+        found = []
+        for key, kind, name in self._keys[bisect_left(self._keys, (prefix,)):]:
+            if not key.startswith(prefix) or len(found) >= limit:
+                break
+            if (kind, name) not in found:
+                found.append((kind, name))
+        return found
+
+
+class InlineLookup:
+    """
+    Answers inline queries (`@bot ETH`) from the signals the bot has seen
+
+    Every accepted webhook updates the latest signal and price per symbol
+    and the latest signal per strategy, and adds new names to the prefix
+    index. Answers are built from those dicts only; the rendered results
+    are cached per query until the next webhook changes anything (and for
+    at most 30s, so "5m ago" stays roughly right).
+    """
+
+    def __init__(self, max_results: Optional[int] = None, clock=time.time):
+        self.max_results = min(max_results or Config.INLINE_MAX_RESULTS, 50)
+        self.clock = clock
+        self.index = PrefixIndex()
+        self.version = 0
+        self._signals: Dict[str, Dict] = {}      # symbol -> latest trading signal
+        self._prices: Dict[str, Tuple] = {}      # symbol -> (price, time)
+        self._strategies: Dict[str, Dict] = {}   # strategy -> its latest signal
+        self._answers: Dict[str, List[Dict]] = {}
+        self._answers_stamp = None
+        self._lock = threading.Lock()
+
+    def observe(self, symbol: str, action: str, strategy: str = "", price=None, ts: Optional[float] = None):
+        """Record one accepted webhook"""
+        symbol = (symbol or "").split(':')[-1].upper()
+        action = (action or "").upper()
+        if not symbol:
+            return
+        now = self.clock() if ts is None else ts
+        with self._lock:
+            self.index.add(symbol, KIND_SYMBOL)
+            if price is not None:
+                self._prices[symbol] = (price, now)
+            if action not in PRICE_ACTIONS:
+                entry = {"symbol": symbol, "action": action, "strategy": strategy, "price": price, "time": now}
+                self._signals[symbol] = entry
+                if strategy:
+                    self.index.add(strategy, KIND_STRATEGY)
+                    self._strategies[strategy] = entry
+            self.version += 1
+
+    def load(self, history):
+        """Seed from the signal history (replayed from disk on start), oldest first"""
+        entries = sorted(history.query(limit=history.per_symbol * max(len(history.symbols()), 1)),
+                         key=lambda entry: (entry["time"], entry["seq"]))
+        for entry in entries:
+            self.observe(entry["symbol"], entry["action"], entry["strategy"], entry["price"], entry["time"])
+        if entries:
+            logger.info(f"Inline lookup seeded with {len(self.index)} symbols and strategies")
+
+    def answer(self, query: str) -> List[Dict]:
+        """Inline results as dicts: id, title, description, text (HTML)"""
+        query = (query or "").strip()
+        with self._lock:
+            stamp = (self.version, int(self.clock() // 30))
+            if self._answers_stamp != stamp:
+                self._answers.clear()
+                self._answers_stamp = stamp
+            cached = self._answers.get(query.upper())
+            if cached is not None:
+                return cached
+            if query:
+                matches = self.index.search(query, self.max_results)
+            else:
+                recent = sorted(self._signals.values(), key=lambda entry: entry["time"], reverse=True)
+                matches = [(KIND_SYMBOL, entry["symbol"]) for entry in recent[:self.max_results]]
+            results = [self._result(kind, name) for kind, name in matches]
+            if len(self._answers) > 1000:
+                self._answers.clear()
+            self._answers[query.upper()] = results
+            return results
+
+    def _result(self, kind: str, name: str) -> Dict:
+        if kind == KIND_STRATEGY:
+            entry = self._strategies[name]
+            title = f"📈 {name}"
+            age = _ago(self.clock() - entry['time'])
+            description = f"Last: {entry['action']} {entry['symbol']}{_at(entry['price'])} · {age}"
+            text = (f"📈 <b>{html.escape(name)}</b>\n"
+                    f"Last signal: <b>{html.escape(entry['action'])} {html.escape(entry['symbol'])}</b>"
+                    f"{html.escape(_at(entry['price']))} ({age})")
+            return {"id": f"strategy:{name}"[:64], "title": title, "description": description, "text": text}
+
+        entry = self._signals.get(name)
+        price = self._prices.get(name)
+        title = f"📊 {name}" + (f" ${price[0]}" if price else "")
+        lines = [f"📊 <b>{html.escape(name)}</b>"]
+        if price:
+            lines.append(f"💰 Price: ${html.escape(str(price[0]))} ({_ago(self.clock() - price[1])})")
+        if entry:
+            description = f"Last: {entry['action']}{_at(entry['price'])} · {entry['strategy'] or 'Manual'} · " \
+                          f"{_ago(self.clock() - entry['time'])}"
+            lines.append(f"🎯 Last signal: <b>{html.escape(entry['action'])}</b>{html.escape(_at(entry['price']))} "
+                         f"({html.escape(entry['strategy'] or 'Manual')}, {_ago(self.clock() - entry['time'])})")
+        else:
+            description = "No signals yet"
+        return {"id": f"symbol:{name}"[:64], "title": title, "description": description, "text": "\n".join(lines)}
+
+    def stats(self) -> Dict:
+        return {"names": len(self.index), "symbols": len(self._signals.keys() | self._prices.keys()),
+                "strategies": len(self._strategies), "cached_answers": len(self._answers)}
+
+
+def _at(price) -> str:
+    return f" @ ${price}" if price is not None else ""
+
+
+def _ago(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return f"{seconds}s ago"
+    if seconds < 3600:
+        return f"{seconds // 60}m ago"
+    if seconds < 86400:
+        return f"{seconds // 3600}h ago"
+    return f"{seconds // 86400}d ago"
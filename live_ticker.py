@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from delivery import DeliveryEngine
+from retry_engine import DeliveryResult
+from telegram_api import OUTCOME_OK
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_UNCHANGED = "unchanged"
+
+# editMessageText failures that mean the ticker message has to be sent again
+GONE_FRAGMENTS = ("message to edit not found", "message can't be edited", "message_id_invalid")
+
+
+class LiveTicker:
+    """
+    One pinned message per (chat, symbol), edited in place on every price update
+
+    `publish` records what a chat's ticker should show; `sync` brings the
+    Telegram message up to date: the first sync sends and pins it, later
+    ones call editMessageText only if the text differs from what was last
+    applied. A sync queued behind a newer update therefore applies the
+    newest text once and the rest cost nothing. Message ids are kept in a
+    JSON file so a restart keeps editing the same messages.
+    """
+
+    def __init__(self, engine: Optional[DeliveryEngine] = None, path: Optional[str] = None,
+                 pin: bool = True):
+        self.engine = engine or DeliveryEngine()
+        self.path = path
+        self.pin = pin
+        self._message_ids: Dict[Tuple[int, str], int] = {}
+        self._wanted: Dict[Tuple[int, str], str] = {}
+        self._applied: Dict[Tuple[int, str], str] = {}
+        self._prices: Dict[str, float] = {}
+        self._key_locks: Dict[Tuple[int, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                raw = json.load(f)
+            for key, message_id in raw.items():
+                chat_id, symbol = key.split(":", 1)
+                self._message_ids[(int(chat_id), symbol)] = int(message_id)
+            logger.info(f"Loaded {len(self._message_ids)} live tickers from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load live tickers {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({f"{chat_id}:{symbol}": message_id
+                           for (chat_id, symbol), message_id in self._message_ids.items()}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not persist live tickers {self.path}: {e}")
+
+    def publish(self, chat_ids, symbol: str, price, strategy: str = "") -> str:
+        """Render a price update and make it the wanted text of these chats' tickers"""
+        with self._lock:
+            text = render_ticker(symbol, price, self._prices.get(symbol), strategy)
+            value = _to_price(price)
+            if value is not None:
+                self._prices[symbol] = value
+            for chat_id in chat_ids:
+                self._wanted[(int(chat_id), symbol)] = text
+        return text
+
+    def sync(self, chat_id, symbol: str) -> DeliveryResult:
+        """Apply the newest text for this ticker, sending and pinning it the first time"""
+        key = (int(chat_id), symbol)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                text = self._wanted.get(key)
+                message_id = self._message_ids.get(key)
+                unchanged = text is None or self._applied.get(key) == text
+            if unchanged:
+                self.counts[OUTCOME_UNCHANGED] += 1
+                return DeliveryResult(chat_id, OUTCOME_OK, 0)
+
+            if message_id is not None:
+                result = self.engine.call(chat_id, 'editMessageText', message_id=message_id, text=text,
+                                          parse_mode='HTML')
+                description = result.api_result.description.lower() if result.api_result else ""
+                if result.ok or "message is not modified" in description:
+                    self.counts["edited"] += 1
+                    self._applied[key] = text
+                    return DeliveryResult(chat_id, OUTCOME_OK, result.attempts, result.api_result)
+                if not any(fragment in description for fragment in GONE_FRAGMENTS):
+                    return result
+                logger.info(f"Ticker {symbol} in chat {chat_id} is gone, sending a new one")
+
+            result = self.engine.send_message(chat_id, text, disable_notification='true')
+            if not result.ok:
+                return result
+            self.counts["sent"] += 1
+            message_id = (result.api_result.result or {}).get('message_id')
+            with self._lock:
+                self._applied[key] = text
+                if message_id is not None:
+                    self._message_ids[key] = message_id
+                    self._save()
+            if self.pin and message_id is not None:
+                pinned = self.engine.call(chat_id, 'pinChatMessage', message_id=message_id,
+                                          disable_notification='true')
+                if pinned.ok:
+                    self.counts["pinned"] += 1
+                else:
+                    logger.warning(f"Could not pin ticker {symbol} in chat {chat_id}: {pinned}")
+            return result
+
+    def syncer(self, symbol: str):
+        """`send(chat_id, text)` for DeliveryScheduler.submit; the text applied is always the newest"""
+        return lambda chat_id, text: self.sync(chat_id, symbol)
+
+    def forget_chat(self, chat_id):
+        with self._lock:
+            for store in (self._message_ids, self._wanted, self._applied, self._key_locks):
+                for key in [key for key in store if key[0] == chat_id]:
+                    del store[key]
+            self._save()
+
+    def stats(self) -> Dict:
+        return {"tickers": len(self._message_ids), **self.counts}
+
+
+def _to_price(value) -> Optional[float]:
+    try:
+        return float(str(value).replace(',', '').lstrip('$'))
+    except (TypeError, ValueError):
+        return None
+
+
+def render_ticker(symbol: str, price, previous: Optional[float] = None, strategy: str = "") -> str:
+    """HTML ticker text; only the price line changes between updates"""
+    value = _to_price(price)
+    price_text = f"${value:,.2f}" if value is not None else f"${price}"
+    change = ""
+    if value is not None and previous:
+        delta = value - previous
+        arrow = "▲" if delta > 0 else "▼" if delta < 0 else "•"
+        change = f"  {arrow} {delta / previous:+.2%}"
+    source = f"\n<i>{strategy}</i>" if strategy else ""
+    return f"💰 <b>{symbol}</b> {price_text}{change}{source}"
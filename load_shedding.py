@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Mapping, Optional, Tuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SHED_SUPERSEDED = "superseded"
+SHED_STALE = "stale"
+SHED_EXPIRED = "expired"
+
+# Shedding levels, each one drops everything the previous one did
+LEVEL_NORMAL = 0
+LEVEL_PRICE = 1    # drop price updates a newer one for the same chat and symbol replaces
+LEVEL_SIGNAL = 2   # also drop signals older than their strategy's freshness budget
+
+
+def parse_budgets(value: Optional[str]) -> Dict[str, float]:
+    """"EMA Cross + RSI=120,Support/Resistance=600" -> {"EMA CROSS + RSI": 120.0, ...}"""
+    budgets = {}
+    for item in (value or "").split(","):
+        name, sep, seconds = item.rpartition("=")
+        if sep and name.strip():
+            budgets[name.strip().upper()] = float(seconds)
+    return budgets
+
+
+def parse_max_ages(value: Optional[str]) -> Dict[Tuple[str, str], float]:
+    """
+    "EMA Cross + RSI:BUY=120,*:SELL=300,Support/Resistance=600" -> {(strategy, action): seconds}
+
+    Without ":ACTION" the limit covers every action of the strategy ("*").
+    """
+    ages = {}
+    for item in (value or "").split(","):
+        name, sep, seconds = item.rpartition("=")
+        if not sep or not name.strip():
+            continue
+        strategy, colon, action = name.rpartition(":")
+        if not colon:
+            strategy, action = name, "*"
+        ages[(strategy.strip().upper() or "*", action.strip().upper() or "*")] = float(seconds)
+    return ages
+
+
+class SignalMaxAge:
+    """
+    Hard age limit of a signal at delivery time, by strategy and action
+
+    The most specific entry wins: strategy and action, then strategy, then
+    action, then `default`. 0 means no limit. Unlike the freshness budgets
+    this applies with or without a backlog, e.g. to replays.
+    """
+
+    def __init__(self, ages: Optional[Mapping[Tuple[str, str], float]] = None, default: Optional[float] = None):
+        self.ages = dict(ages if ages is not None else parse_max_ages(Config.SIGNAL_MAX_AGE))
+        self.default = default if default is not None else Config.SIGNAL_MAX_AGE_DEFAULT
+
+    def lookup(self, strategy: str, action: str) -> float:
+        strategy = (strategy or "").upper()
+        action = (action or "").upper()
+        for key in ((strategy, action), (strategy, "*"), ("*", action)):
+            if key in self.ages:
+                return self.ages[key]
+        return self.default
+
+    def expired(self, born: Optional[float], strategy: str, action: str, now: Optional[float] = None) -> bool:
+        """True if a signal from `born` (epoch seconds) is past its limit"""
+        max_age = self.lookup(strategy, action)
+        if born is None or max_age <= 0:
+            return False
+        return (time.time() if now is None else now) - born > max_age
+
+
+class ShedPolicy:
+    """
+    Decides which queued deliveries are no longer worth a Telegram call
+
+    The backlog is measured in seconds: queued jobs divided by the rate
+    the senders can achieve, `concurrency` over the moving average time of
+    one delivery (rate limiter waits, retry_after pauses and slow responses
+    all make it longer). Past `price_after` seconds, price updates that
+    a newer update for the same chat and symbol replaces are dropped; past
+    `signal_after` seconds, signals whose payload timestamp is older than
+    their strategy's freshness budget are dropped too. Every decision is
+    counted and kept in a short trace for /health.
+    """
+
+    def __init__(self, price_after: Optional[float] = None, signal_after: Optional[float] = None,
+                 freshness: Optional[Mapping[str, float]] = None, default_freshness: Optional[float] = None,
+                 initial_rate: Optional[float] = None, trace_size: int = 100, wall_clock=time.time):
+        self.price_after = price_after if price_after is not None else Config.SHED_PRICE_AFTER
+        self.signal_after = signal_after if signal_after is not None else Config.SHED_SIGNAL_AFTER
+        self.freshness = {name.upper(): seconds for name, seconds in
+                          (freshness if freshness is not None else parse_budgets(Config.SIGNAL_FRESHNESS)).items()}
+        self.default_freshness = (default_freshness if default_freshness is not None
+                                  else Config.SIGNAL_FRESHNESS_DEFAULT)
+        self.wall_clock = wall_clock
+        self.initial_rate = float(initial_rate if initial_rate is not None else Config.TELEGRAM_GLOBAL_RATE)
+        self.concurrency = 1
+        self._send_seconds = None
+        self.level = LEVEL_NORMAL
+        self.backlog_seconds = 0.0
+        self.counts = Counter()
+        self.trace = deque(maxlen=trace_size)
+        self._lock = threading.Lock()
+
+    def record_send(self, seconds: float):
+        """Feed the duration of one finished delivery into the measured rate"""
+        with self._lock:
+            if self._send_seconds is None:
+                self._send_seconds = seconds
+            else:
+                self._send_seconds += 0.05 * (seconds - self._send_seconds)
+
+    @property
+    def rate(self) -> float:
+        """Deliveries per second the senders currently manage"""
+        if self._send_seconds is None:
+            return self.initial_rate
+        return self.concurrency / max(self._send_seconds, 1e-4)
+
+    def update(self, queued: int) -> int:
+        """Re-evaluate the level for `queued` waiting jobs"""
+        self.backlog_seconds = queued / max(self.rate, 0.01)
+        if self.backlog_seconds > self.signal_after:
+            level = LEVEL_SIGNAL
+        elif self.backlog_seconds > self.price_after:
+            level = LEVEL_PRICE
+        else:
+            level = LEVEL_NORMAL
+        if level != self.level:
+            logger.warning(f"Load shedding level {self.level} -> {level} "
+                           f"({queued} queued, ~{self.backlog_seconds:.0f}s backlog at {self.rate:.1f} msg/s)")
+            self.level = level
+        return level
+
+    def budget(self, strategy: str) -> float:
+        return self.freshness.get((strategy or "").upper(), self.default_freshness)
+
+    def reason(self, job, superseded: bool) -> Optional[str]:
+        """Why `job` should be dropped at the current level, or None to send it"""
+        if self.level >= LEVEL_PRICE and superseded:
+            return SHED_SUPERSEDED
+        if self.level >= LEVEL_SIGNAL and job.born is not None:
+            budget = self.budget(job.strategy)
+            if budget > 0 and self.wall_clock() - job.born > budget:
+                return SHED_STALE
+        return None
+
+    def record(self, job, reason: str):
+        age = self.wall_clock() - job.born if job.born is not None else None
+        self.counts[reason] += 1
+        self.trace.append({
+            "at": self.wall_clock(),
+            "chat_id": job.chat_id,
+            "class": job.message_class,
+            "key": job.key,
+            "strategy": job.strategy,
+            "reason": reason,
+            "age_s": round(age, 1) if age is not None else None,
+            "backlog_s": round(self.backlog_seconds, 1)
+        })
+        logger.debug(f"Shed {job.message_class} for chat {job.chat_id} ({reason})")
+
+    def stats(self) -> Dict:
+        return {
+            "level": self.level,
+            "backlog_s": round(self.backlog_seconds, 1),
+            "rate": round(self.rate, 1),
+            "shed": dict(self.counts),
+            "recent": list(self.trace)[-20:]
+        }
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+from config import Config
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Frames kept from the blocked loop thread's stack, innermost last
+STACK_DEPTH = 12
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and catches what blocks the loop
+
+    A heartbeat task sleeps `interval` and records how late it woke up. A
+    watchdog thread watches the heartbeat; once it is more than `threshold`
+    overdue, the watchdog snapshots the loop thread's stack, which is the
+    code doing the blocking (a sync HTTP call in a handler, say). When the
+    loop gets going again the stall is counted and logged with that stack.
+    """
+
+    def __init__(self, interval: Optional[float] = None, threshold: Optional[float] = None,
+                 recent: int = 20, clock=time.monotonic):
+        self.interval = interval if interval is not None else Config.LOOP_MONITOR_INTERVAL
+        self.threshold = threshold if threshold is not None else Config.LOOP_STALL_THRESHOLD
+        self.clock = clock
+        self.lag = LatencyHistogram()
+        self.stall_lengths = LatencyHistogram()
+        self.stalls = 0
+        self.recent = deque(maxlen=recent)
+        self._last_beat = None
+        self._pending_stack: Optional[List[str]] = None
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start monitoring; call from the loop being watched (or pass it)"""
+        loop = loop or asyncio.get_running_loop()
+        if self._task is not None:
+            return
+        self._stopped.clear()
+        self._last_beat = self.clock()
+        self._task = loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, daemon=True, name="loop-watchdog")
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (stall threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(1.0)
+            self._watchdog = None
+
+    async def _heartbeat(self):
+        self._loop_thread_id = threading.get_ident()
+        while not self._stopped.is_set():
+            expected = self.clock() + self.interval
+            await asyncio.sleep(self.interval)
+            now = self.clock()
+            lag = max(now - expected, 0.0)
+            self._last_beat = now
+            self.lag.observe(lag)
+            if lag >= self.threshold:
+                self._record_stall(lag)
+
+    def _record_stall(self, lag: float):
+        with self._lock:
+            stack, self._pending_stack = self._pending_stack, None
+            self.stalls += 1
+            self.recent.append({"at": time.time(), "lag_ms": round(lag * 1000, 1), "stack": stack or []})
+        self.stall_lengths.observe(lag)
+        where = "".join(stack).rstrip() if stack else "(stack not captured)"
+        logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms in:\n{where}")
+
+    def _watch(self):
+        captured_for = None
+        while not self._stopped.wait(min(self.interval, self.threshold) / 2):
+            last_beat = self._last_beat
+            if last_beat == captured_for or self.clock() - last_beat < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            with self._lock:
+                self._pending_stack = traceback.format_stack(frame)[-STACK_DEPTH:]
+            captured_for = last_beat
+
+    def stats(self) -> Dict:
+        """Lag histogram, stall count and the most recent stall's stack, for /health"""
+        with self._lock:
+            last = self.recent[-1] if self.recent else None
+        return {
+            "lag": self.lag.summary(),
+            "stalls": self.stalls,
+            "stall_length": self.stall_lengths.summary(),
+            "last_stall": last
+        }
@@ -4,7 +4,8 @@ import time
 from flask import Flask
 from telegram_bot import TelegramBot
 from webhook_server import app
-from config import Config
+from config import Config, install_reload_signal_handler
+from telegram_webhook import TelegramUpdateBridge, register_update_route
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +15,8 @@ class TradingBot:
     def __init__(self):
         self.telegram_bot = TelegramBot()
         self.flask_app = app
+        self.update_bridge = TelegramUpdateBridge()
+        register_update_route(self.flask_app, self.update_bridge)
         
     def run_flask(self):
         """Run Flask server in a separate thread"""
@@ -32,9 +35,14 @@ class TradingBot:
         # Give Flask a moment to start
         time.sleep(1)
         
+        install_reload_signal_handler()
+        
         # Start Telegram bot in main thread
         logger.info("Starting Telegram bot...")
-        asyncio.run(self.telegram_bot.start_polling())
+        if Config.TELEGRAM_UPDATE_MODE == "webhook":
+            asyncio.run(self.telegram_bot.start_webhook(self.update_bridge))
+        else:
+            asyncio.run(self.telegram_bot.start_polling())
 
 if __name__ == "__main__":
     if not Config.BOT_TOKEN:
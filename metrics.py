@@ -0,0 +1,60 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List
+
+
+class LatencyHistogram:
+    """
+    Fixed log-spaced latency buckets (about 19% wide, 0.1ms to ~100s)
+
+    Recording is one binary search and a counter increment, so it can sit
+    on hot paths; percentiles are read from the buckets and are accurate to
+    a bucket's width.
+    """
+
+    def __init__(self, smallest: float = 0.0001, largest: float = 100.0, growth: float = 2 ** 0.25):
+        bounds: List[float] = []
+        bound = smallest
+        while bound < largest:
+            bounds.append(bound)
+            bound *= growth
+        bounds.append(largest)
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket: above `largest`
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (0-100), in seconds"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, round(self.count * p / 100.0))
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self) -> Dict:
+        """Milliseconds, for /health"""
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3)
+        }
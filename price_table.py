@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+from config import Config
+from signal_history import escape_markdown
+
+logger = logging.getLogger(__name__)
+
+# Quote suffixes stripped from exchange tickers: BTCUSDT -> BTC, BINANCE:ETHUSD -> ETH
+QUOTE_SUFFIXES = ("USDT", "USDC", "BUSD", "USD")
+
+
+def fetch_rates(base: str) -> Dict[str, float]:
+    """Coinbase exchange rates: units of each currency per 1 `base` (blocking)"""
+    import requests
+    response = requests.get(f"{Config.PRICE_API_URL}?currency={base}", timeout=5)
+    response.raise_for_status()
+    return {currency: float(rate) for currency, rate in response.json()['data']['rates'].items()}
+
+
+class RateTable:
+    """
+    Every currency's price in `base` from one cached upstream table
+
+    A single exchange-rates request returns the rate of every currency, so
+    any number of symbols and users cost at most one request per `ttl`.
+    Concurrent lookups of a stale table wait for one refresh instead of
+    each fetching; if the refresh fails the previous table keeps being
+    served and the fetch is not retried for min(ttl, 5s).
+    """
+
+    RETRY_SECONDS = 5
+
+    def __init__(self, base: Optional[str] = None, ttl: Optional[float] = None,
+                 fetch: Optional[Callable[[str], Dict[str, float]]] = None, clock=time.monotonic):
+        self.base = (base or Config.PRICE_BASE_CURRENCY).upper()
+        self.ttl = ttl if ttl is not None else Config.PRICE_REFRESH_SECONDS
+        self.fetch = fetch or fetch_rates
+        self.clock = clock
+        self.fetched_at = None
+        self.failed_at = None
+        self.fetches = 0
+        self.errors = 0
+        self._rates: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the table is served as is: younger than `ttl`, or right after a failed refresh"""
+        now = self.clock()
+        if self.failed_at is not None and now - self.failed_at < min(self.ttl, self.RETRY_SECONDS):
+            return True
+        return self.fetched_at is not None and now - self.fetched_at < self.ttl
+
+    def rates(self) -> Dict[str, float]:
+        """The current table, refreshed first if it is older than `ttl`"""
+        if self.fresh:
+            return self._rates
+        with self._lock:
+            if not self.fresh:
+                self.refresh()
+        return self._rates
+
+    def refresh(self):
+        self.fetches += 1
+        try:
+            rates = self.fetch(self.base)
+        except Exception as e:
+            self.errors += 1
+            self.failed_at = self.clock()
+            logger.error(f"Error fetching {self.base} exchange rates: {e}")
+            return
+        self._rates = {currency.upper(): rate for currency, rate in rates.items()}
+        self.fetched_at = self.clock()
+        self.failed_at = None
+
+    def resolve(self, symbol: str) -> str:
+        """Currency code for a symbol as users and TradingView write it"""
+        symbol = (symbol or "").split(':')[-1].upper().lstrip('$')
+        if symbol in self._rates:
+            return symbol
+        for suffix in QUOTE_SUFFIXES:
+            if symbol.endswith(suffix) and symbol[:-len(suffix)] in self._rates:
+                return symbol[:-len(suffix)]
+        return symbol
+
+    def prices(self, symbols: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Price of one unit of each symbol in `base`, None for unknown symbols"""
+        rates = self.rates()
+        prices = {}
+        for symbol in symbols:
+            currency = self.resolve(symbol)
+            rate = rates.get(currency)
+            prices[currency] = 1 / rate if rate else None
+        return prices
+
+    def price(self, symbol: str) -> Optional[float]:
+        return next(iter(self.prices([symbol]).values()))
+
+    def stats(self) -> Dict:
+        return {
+            "base": self.base,
+            "currencies": len(self._rates),
+            "age_s": round(self.clock() - self.fetched_at, 1) if self.fetched_at is not None else None,
+            "fetches": self.fetches,
+            "errors": self.errors
+        }
+
+
+def parse_symbols(args: Iterable[str], default: Iterable[str] = ()) -> list:
+    """/price arguments ("btc eth,SOL") as unique upper-case symbols in order"""
+    symbols = [part.upper() for arg in args for part in arg.replace(',', ' ').split()]
+    return list(dict.fromkeys(symbols or list(default)))
+
+
+def format_price_table(prices: Dict[str, Optional[float]], last: Dict[str, float], base: str = "USD") -> str:
+    """Markdown price list with the change since the user's previous check of each symbol"""
+    lines = [f"💰 **Live Prices ({base})**", ""]
+    for currency, price in prices.items():
+        if price is None:
+            lines.append(f"• **{escape_markdown(currency)}**: unknown symbol")
+            continue
+        decimals = 2 if price >= 1 else 6
+        line = f"• **{escape_markdown(currency)}**: ${price:,.{decimals}f}"
+        previous = last.get(currency)
+        if previous:
+            change = price - previous
+            arrow = "📈" if change > 0 else "📉" if change < 0 else "➡️"
+            line += f"  {arrow} {change:+,.{decimals}f} ({change / previous * 100:+.2f}%)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+price_table = RateTable()
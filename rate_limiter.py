@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that hands out reservations
+
+    `reserve()` never blocks: it books a token (possibly in the future) and
+    returns how long the caller has to wait before using it, so the same
+    bucket serves both threaded and asyncio senders.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Book `tokens` and return the delay in seconds until they are available"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take `tokens` only if they are available right now"""
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def refund(self, tokens: float = 1):
+        """Give back tokens that were reserved but never spent"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+
+class RateLimiter:
+    """
+    Telegram send budget: one global bucket shared by every chat plus a small
+    bucket per chat (Telegram allows ~30 msg/s per bot and ~1 msg/s per chat)
+
+    `bucket_factory(name, rate)` lets the buckets live outside the process,
+    e.g. `shared_state.SharedTokenBucket` for multi-worker deployments.
+    A `bot_bucket` shared with other limiters caps them together: each
+    message takes a token from this limiter's global bucket and from it.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, clock=time.monotonic,
+                 bucket_factory: Optional[Callable[[str, float], TokenBucket]] = None,
+                 bot_bucket: Optional[TokenBucket] = None):
+        self._bucket_factory = bucket_factory or (lambda name, rate: TokenBucket(rate, clock=clock))
+        self.global_bucket = self._bucket_factory("global", global_rate)
+        self.bot_bucket = bot_bucket
+        self.chat_rate = chat_rate
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            with self._lock:
+                bucket = self._chat_buckets.get(chat_id)
+                if bucket is None:
+                    bucket = self._chat_buckets[chat_id] = self._bucket_factory(f"chat:{chat_id}", self.chat_rate)
+        return bucket
+
+    def reserve(self, chat_id) -> float:
+        """Reserve one message for `chat_id` and return the required wait"""
+        wait = max(self._chat_bucket(chat_id).reserve(), self.global_bucket.reserve())
+        if self.bot_bucket is not None:
+            wait = max(wait, self.bot_bucket.reserve())
+        return wait
+
+    def forget(self, chat_id):
+        """Drop per-chat state, e.g. once a chat is no longer deliverable"""
+        with self._lock:
+            self._chat_buckets.pop(chat_id, None)
@@ -0,0 +1,253 @@
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from config import Config
+from rate_limiter import RateLimiter, TokenBucket
+from shared_state import SharedTokenBucket, get_shared_state
+from telegram_api import ApiResult, OUTCOME_OK, OUTCOME_RETRY_AFTER, OUTCOME_TRANSIENT, OUTCOME_DEAD_CHAT
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_CIRCUIT_OPEN = "circuit_open"
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 30.0,
+                 rng: Optional[random.Random] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return self._rng.uniform(0, ceiling)
+
+
+class RetryAfterGate:
+    """
+    Global pause shared by every sender
+
+    Telegram's 429 `retry_after` applies to the whole bot, not to the chat
+    that happened to trigger it, so every chat waits it out together.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._until = max(self._until, self._clock() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self._until - self._clock())
+
+
+class CircuitBreaker:
+    """Per-chat breaker: closed -> open after N failures -> half-open after a cooldown"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self.opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a send may be attempted; half-open lets exactly one trial through"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self.opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class CircuitBreakerRegistry:
+    """Lazily created breakers keyed by chat id"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._breakers: Dict[int, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, chat_id) -> CircuitBreaker:
+        breaker = self._breakers.get(chat_id)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    chat_id, CircuitBreaker(self.failure_threshold, self.reset_timeout, self._clock)
+                )
+        return breaker
+
+    def open_chats(self) -> list:
+        return [chat_id for chat_id, breaker in list(self._breakers.items()) if breaker.state != CircuitBreaker.CLOSED]
+
+    def forget(self, chat_id):
+        with self._lock:
+            self._breakers.pop(chat_id, None)
+
+
+class DeliveryResult:
+    """Final outcome of delivering one message to one chat"""
+
+    def __init__(self, chat_id, outcome: str, attempts: int, api_result: Optional[ApiResult] = None):
+        self.chat_id = chat_id
+        self.outcome = outcome
+        self.attempts = attempts
+        self.api_result = api_result
+
+    @property
+    def ok(self) -> bool:
+        return self.outcome == OUTCOME_OK
+
+    def __repr__(self):
+        return f"DeliveryResult(chat_id={self.chat_id}, outcome={self.outcome}, attempts={self.attempts})"
+
+
+class RetryEngine:
+    """
+    Runs Bot API attempts for one chat under the shared retry rules
+
+    Order of checks per attempt: the chat's circuit breaker (an open chat
+    never touches the rate budget), the global retry_after gate, then a
+    reservation from the rate limiter.
+    """
+
+    def __init__(self, policy: Optional[RetryPolicy] = None, gate: Optional[RetryAfterGate] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.policy = policy or RetryPolicy()
+        self.gate = gate or RetryAfterGate()
+        self.breakers = breakers or CircuitBreakerRegistry()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._sleep = sleep
+
+    @classmethod
+    def from_config(cls, bucket_prefix: str = "", global_rate: Optional[float] = None,
+                    bot_bucket: Optional[TokenBucket] = None, chat_rate: Optional[float] = None,
+                    **overrides) -> "RetryEngine":
+        # With several workers the rate budget must be shared, breakers stay per process;
+        # `bucket_prefix` keeps the shared buckets of different bot tokens (or tenants) apart,
+        # `bot_bucket` additionally caps this engine by the budget of the bot it sends from
+        store = get_shared_state()
+        bucket_factory = None
+        if store:
+            bucket_factory = lambda name, rate: SharedTokenBucket(store, f"{bucket_prefix}{name}", rate)
+        options = dict(
+            policy=RetryPolicy(max_attempts=Config.DELIVERY_MAX_ATTEMPTS),
+            breakers=CircuitBreakerRegistry(Config.BREAKER_FAILURE_THRESHOLD, Config.BREAKER_RESET_SECONDS),
+            rate_limiter=RateLimiter(global_rate or Config.TELEGRAM_GLOBAL_RATE,
+                                     chat_rate or Config.TELEGRAM_CHAT_RATE,
+                                     bucket_factory=bucket_factory, bot_bucket=bot_bucket),
+        )
+        options.update(overrides)
+        return cls(**options)
+
+    def _next_delay(self, result: ApiResult, attempt: int) -> Optional[float]:
+        """Delay before the next attempt, or None when the result is final"""
+        if result.outcome == OUTCOME_RETRY_AFTER:
+            self.gate.pause(result.retry_after or self.policy.backoff(attempt))
+            return 0.0
+        if result.outcome == OUTCOME_TRANSIENT and attempt < self.policy.max_attempts:
+            return self.policy.backoff(attempt)
+        return None
+
+    def _finish(self, chat_id, breaker: CircuitBreaker, result: ApiResult, attempts: int) -> DeliveryResult:
+        if result.ok:
+            breaker.record_success()
+        elif result.outcome == OUTCOME_RETRY_AFTER:
+            # Flood control is bot-wide, it says nothing about this chat
+            logger.warning(f"Delivery to chat {chat_id} still rate limited after {attempts} attempt(s)")
+        elif result.outcome == OUTCOME_DEAD_CHAT:
+            # The chat is gone for good, drop its per-chat state
+            logger.warning(f"Chat {chat_id} is permanently undeliverable: {result.dead_reason}")
+            self.breakers.forget(chat_id)
+            self.rate_limiter.forget(chat_id)
+        else:
+            breaker.record_failure()
+            logger.error(f"Delivery to chat {chat_id} failed after {attempts} attempt(s): {result.description}")
+        return DeliveryResult(chat_id, result.outcome, attempts, result)
+
+    def run(self, chat_id, attempt: Callable[[], ApiResult]) -> DeliveryResult:
+        """Deliver synchronously, sleeping the calling thread between attempts"""
+        breaker = self.breakers.get(chat_id)
+        result = None
+        attempts = 0
+        while attempts < self.policy.max_attempts:
+            if not breaker.allow():
+                return DeliveryResult(chat_id, OUTCOME_CIRCUIT_OPEN, attempts, result)
+            self._sleep(self.gate.remaining())
+            self._sleep(self.rate_limiter.reserve(chat_id))
+            attempts += 1
+            result = attempt()
+            delay = self._next_delay(result, attempts)
+            if delay is None:
+                return self._finish(chat_id, breaker, result, attempts)
+            self._sleep(delay)
+        return self._finish(chat_id, breaker, result, attempts)
+
+    async def run_async(self, chat_id, attempt: Callable[[], Awaitable]) -> DeliveryResult:
+        """
+        Deliver from an event loop
+
+        `attempt` returns an awaitable yielding either an ApiResult or any
+        other value (treated as success); exceptions are classified with
+        `ApiResult.from_exception`.
+        """
+        import asyncio
+        breaker = self.breakers.get(chat_id)
+        result = None
+        attempts = 0
+        while attempts < self.policy.max_attempts:
+            if not breaker.allow():
+                return DeliveryResult(chat_id, OUTCOME_CIRCUIT_OPEN, attempts, result)
+            await asyncio.sleep(self.gate.remaining())
+            await asyncio.sleep(self.rate_limiter.reserve(chat_id))
+            attempts += 1
+            try:
+                value = await attempt()
+                result = value if isinstance(value, ApiResult) else ApiResult(True, result=value)
+            except Exception as e:
+                result = ApiResult.from_exception(e)
+            delay = self._next_delay(result, attempts)
+            if delay is None:
+                return self._finish(chat_id, breaker, result, attempts)
+            await asyncio.sleep(delay)
+        return self._finish(chat_id, breaker, result, attempts)
@@ -12,6 +12,9 @@ async def main():
         logger.error("BOT_TOKEN not found in environment variables")
         return
     
+    if Config.TELEGRAM_UPDATE_MODE == "webhook":
+        logger.warning("Webhook mode needs an HTTP server, use main.py or combined_bot.py. Falling back to polling.")
+    
     logger.info("Starting Telegram Trading Bot...")
     telegram_bot = TelegramBot()
     
@@ -0,0 +1,259 @@
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(chat_id, shards: int) -> int:
+    """Stable chat -> shard mapping (same answer in every process and run)"""
+    return zlib.crc32(str(chat_id).encode()) % shards
+
+
+def partition(chat_ids: Iterable, shards: int) -> List[List]:
+    """Split recipients by shard, keeping their relative order"""
+    parts = [[] for _ in range(shards)]
+    for chat_id in chat_ids:
+        parts[shard_for(chat_id, shards)].append(chat_id)
+    return parts
+
+
+class ShardResult:
+    """What one shard did with its slice of a broadcast"""
+
+    def __init__(self, shard: int, sent: int = 0, failed: int = 0, dead: Optional[Dict] = None,
+                 elapsed: float = 0.0):
+        self.shard = shard
+        self.sent = sent
+        self.failed = failed
+        self.dead = dead or {}
+        self.elapsed = elapsed
+
+
+class BroadcastReport:
+    """Gathered per-shard results of one broadcast; `missing` shards did not report in time or died"""
+
+    def __init__(self, results: List[ShardResult], elapsed: float, missing: Optional[List[int]] = None):
+        self.results = results
+        self.elapsed = elapsed
+        self.missing = missing or []
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    @property
+    def sent(self) -> int:
+        return sum(r.sent for r in self.results)
+
+    @property
+    def failed(self) -> int:
+        return sum(r.failed for r in self.results)
+
+    @property
+    def dead(self) -> Dict:
+        merged = {}
+        for r in self.results:
+            merged.update(r.dead)
+        return merged
+
+
+def _shard_main(shard: int, jobs, results, rate_slice: float, global_rate: float, chat_rate: float,
+                threads: int, base_url: Optional[str]):
+    """
+    Worker process loop
+
+    Owns a DeliveryEngine with its own HTTP pool. With shared state every
+    shard takes its tokens from the bot's one shared bucket (the one the
+    web workers use too); otherwise it gets `rate_slice` of the global
+    budget. Dead chats are reported back instead of written locally so the
+    coordinator stays the only writer of the suppression list.
+    """
+    import requests
+    from delivery import DeliveryEngine
+    from retry_engine import RetryEngine
+    from shared_state import get_shared_state
+    from suppression import SuppressionList
+    from telegram_api import TelegramAPI
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=threads)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    engine = DeliveryEngine(
+        TelegramAPI(base_url=base_url, session=session),
+        RetryEngine.from_config(global_rate=global_rate if get_shared_state() else rate_slice, chat_rate=chat_rate),
+        SuppressionList(None)
+    )
+    pool = ThreadPoolExecutor(max_workers=threads)
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, text, parse_mode, chat_ids = job
+        started = time.perf_counter()
+        outcome = ShardResult(shard)
+        for result in pool.map(lambda chat_id: engine.send_message(chat_id, text, parse_mode=parse_mode), chat_ids):
+            if result.ok:
+                outcome.sent += 1
+            else:
+                outcome.failed += 1
+                if result.api_result is not None and result.api_result.dead_reason:
+                    outcome.dead[result.chat_id] = (result.api_result.dead_reason, result.api_result.description)
+        outcome.elapsed = time.perf_counter() - started
+        results.put((job_id, outcome))
+
+    pool.shutdown()
+
+
+class ShardedDelivery:
+    """
+    Coordinator for delivery spread over worker processes
+
+    Each recipient is hash-pinned to one shard, so its per-chat rate bucket
+    and message order live in exactly one process; the global budget is
+    divided evenly between shards.
+    """
+
+    def __init__(self, shards: Optional[int] = None, threads_per_shard: Optional[int] = None,
+                 global_rate: Optional[float] = None, chat_rate: Optional[float] = None,
+                 base_url: Optional[str] = None, suppression=None):
+        self.shards = shards or Config.DELIVERY_SHARDS
+        self.threads_per_shard = threads_per_shard or Config.DELIVERY_THREADS_PER_SHARD
+        self.global_rate = global_rate or Config.TELEGRAM_GLOBAL_RATE
+        self.chat_rate = chat_rate or Config.TELEGRAM_CHAT_RATE
+        self.base_url = base_url
+        self.suppression = suppression
+        self._context = multiprocessing.get_context("spawn")
+        self._jobs = []
+        self._results = None
+        self._processes = []
+        self._job_ids = itertools.count(1)
+        self._pending: Dict[int, list] = {}
+        self._abandoned: Dict[int, set] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> "ShardedDelivery":
+        if self._processes:
+            return self
+        self._results = self._context.Queue()
+        self._jobs, self._processes = [None] * self.shards, [None] * self.shards
+        for shard in range(self.shards):
+            self._spawn(shard)
+        logger.info(f"Started {self.shards} delivery shards ({self.global_rate / self.shards:g} msg/s each)")
+        return self
+
+    def _spawn(self, shard: int):
+        jobs = self._context.Queue()
+        process = self._context.Process(
+            target=_shard_main,
+            args=(shard, jobs, self._results, self.global_rate / self.shards, self.global_rate, self.chat_rate,
+                  self.threads_per_shard, self.base_url),
+            daemon=True,
+            name=f"delivery-shard-{shard}"
+        )
+        process.start()
+        self._jobs[shard] = jobs
+        self._processes[shard] = process
+
+    def stop(self):
+        for jobs in self._jobs:
+            jobs.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+        self._jobs, self._processes = [], []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _collect(self, job_id: int, shards: List[int], timeout: float):
+        """
+        Wait for the results of `job_id` from `shards`, parking results of other jobs
+
+        Returns (results, missing shards). A shard that died is given up on
+        at once, shards still busy at the deadline are given up on then;
+        late results of those are dropped.
+        """
+        deadline = time.monotonic() + timeout
+        lost = []
+        while True:
+            with self._lock:
+                done = {result.shard for result in self._pending.get(job_id, [])}
+                if len(done) + len(lost) >= len(shards):
+                    return self._pending.pop(job_id, []), lost
+                try:
+                    other_id, result = self._results.get(timeout=max(0.0, min(0.05, deadline - time.monotonic())))
+                    self._park(other_id, result)
+                    continue
+                except queue.Empty:
+                    pass
+                for shard in shards:
+                    if shard not in done and shard not in lost and not self._processes[shard].is_alive():
+                        # Respawn so the next broadcast has every shard again; this one's slice is lost
+                        logger.error(f"Delivery shard {shard} exited with code {self._processes[shard].exitcode}")
+                        self._spawn(shard)
+                        lost.append(shard)
+                        for other_id, outstanding in list(self._abandoned.items()):
+                            outstanding.discard(shard)
+                            if not outstanding:
+                                del self._abandoned[other_id]
+                late = {shard for shard in shards if shard not in done and shard not in lost}
+                if late and time.monotonic() > deadline:
+                    self._abandoned[job_id] = late
+                    logger.error(f"Broadcast {job_id} timed out waiting for shard(s) {sorted(late)}")
+                    return self._pending.pop(job_id, []), sorted(late | set(lost))
+
+    def _park(self, job_id: int, result: ShardResult):
+        """Keep a result for the broadcast waiting on it; drop late ones of abandoned broadcasts"""
+        outstanding = self._abandoned.get(job_id)
+        if outstanding is None:
+            self._pending.setdefault(job_id, []).append(result)
+            return
+        outstanding.discard(result.shard)
+        if not outstanding:
+            del self._abandoned[job_id]
+        # The chats were still messaged; keep their dead chats out of later broadcasts
+        self._suppress(result.dead)
+
+    def _suppress(self, dead: Dict):
+        if self.suppression is not None:
+            for chat_id, (reason, description) in dead.items():
+                self.suppression.suppress(chat_id, reason, description)
+
+    def broadcast(self, chat_ids: Iterable, text: str, parse_mode: str = 'HTML',
+                  timeout: Optional[float] = None) -> BroadcastReport:
+        """
+        Split recipients across shards, send in parallel and gather the results
+
+        Runs on the request thread, so `timeout` (DELIVERY_SHARD_TIMEOUT)
+        must stay below gunicorn's worker timeout. Shards that die or miss
+        the deadline are listed in the report's `missing` instead of failing
+        the broadcast: the other slices were already sent, and an error
+        would make TradingView retry and message those chats twice.
+        """
+        self.start()
+        started = time.perf_counter()
+        job_id = next(self._job_ids)
+        parts = partition(chat_ids, self.shards)
+        shards = []
+        for shard, part in enumerate(parts):
+            if part:
+                self._jobs[shard].put((job_id, text, parse_mode, part))
+                shards.append(shard)
+
+        timeout = timeout if timeout is not None else Config.DELIVERY_SHARD_TIMEOUT
+        results, missing = self._collect(job_id, shards, timeout) if shards else ([], [])
+        report = BroadcastReport(sorted(results, key=lambda r: r.shard), time.perf_counter() - started, missing)
+        self._suppress(report.dead)
+        return report
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedupe (key TEXT PRIMARY KEY, expires REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS user_prefs (user_id INTEGER PRIMARY KEY, prefs TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+class SharedStateStore:
+    """
+    Cross-process state for multi-worker deployments, backed by one SQLite file
+
+    Every gunicorn worker opens the same file; WAL mode lets readers run
+    alongside the single writer and `BEGIN IMMEDIATE` serializes the
+    read-modify-write updates (token buckets, dedupe).
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        # A forked worker must not reuse the parent's connection
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        store = self
+
+        class Transaction:
+            def __enter__(self):
+                self.conn = store._connection()
+                self.conn.execute("BEGIN IMMEDIATE")
+                return self.conn
+
+            def __exit__(self, exc_type, exc, tb):
+                self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return Transaction()
+
+    # --- dedupe ----------------------------------------------------------
+
+    def first_seen(self, key: str, ttl: float) -> bool:
+        """Atomically mark `key` as seen for `ttl` seconds; True only for the first caller"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM dedupe WHERE key = ? AND expires < ?", (key, now))
+            cursor = conn.execute("INSERT OR IGNORE INTO dedupe (key, expires) VALUES (?, ?)", (key, now + ttl))
+            inserted = cursor.rowcount == 1
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM dedupe WHERE expires < ?", (now,))
+        return inserted
+
+    # --- token buckets ---------------------------------------------------
+
+    def take_tokens(self, name: str, rate: float, capacity: float, tokens: float = 1,
+                    only_if_available: bool = False) -> float:
+        """
+        Refill and debit bucket `name` in one transaction
+
+        Returns the tokens left after the debit (negative means the caller
+        reserved future tokens). With `only_if_available` nothing is debited
+        unless enough tokens are present.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+            level = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+            if not only_if_available or level >= tokens:
+                level = min(capacity, level - tokens)
+                debited = True
+            else:
+                debited = False
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (name, level, now)
+            )
+        return level if debited else level - tokens
+
+    # --- user preferences ------------------------------------------------
+
+    def get_prefs(self, user_id: int) -> Optional[Dict]:
+        row = self._connection().execute("SELECT prefs FROM user_prefs WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_prefs(self, user_id: int, prefs: Dict):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO user_prefs (user_id, prefs) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET prefs = excluded.prefs",
+                (user_id, json.dumps(prefs))
+            )
+
+    def all_prefs(self) -> List[Tuple[int, Dict]]:
+        rows = self._connection().execute("SELECT user_id, prefs FROM user_prefs").fetchall()
+        return [(user_id, json.loads(prefs)) for user_id, prefs in rows]
+
+    def delete_prefs(self, user_id: int):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM user_prefs WHERE user_id = ?", (user_id,))
+
+    # --- counters --------------------------------------------------------
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount)
+            )
+            return conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()[0]
+
+    def counters(self) -> Dict[str, int]:
+        return dict(self._connection().execute("SELECT name, value FROM counters").fetchall())
+
+
+class SharedTokenBucket:
+    """TokenBucket-compatible bucket whose level lives in the shared store"""
+
+    def __init__(self, store: SharedStateStore, name: str, rate: float, capacity: Optional[float] = None):
+        self.store = store
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+
+    def reserve(self, tokens: float = 1) -> float:
+        level = self.store.take_tokens(self.name, self.rate, self.capacity, tokens)
+        return 0.0 if level >= 0 else -level / self.rate
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        return self.store.take_tokens(self.name, self.rate, self.capacity, tokens, only_if_available=True) >= 0
+
+    def refund(self, tokens: float = 1):
+        self.store.take_tokens(self.name, self.rate, self.capacity, -tokens)
+
+    @property
+    def available(self) -> float:
+        return self.store.take_tokens(self.name, self.rate, self.capacity, 0)
+
+
+class Deduplicator:
+    """
+    Drops repeated webhook bodies within `ttl` seconds
+
+    Uses the shared store when one is configured so a retry landing on a
+    different worker is still caught, otherwise a local expiring map.
+    """
+
+    def __init__(self, ttl: float, store: Optional[SharedStateStore] = None):
+        self.ttl = ttl
+        self.store = store
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def first_seen(self, body: bytes) -> bool:
+        key = hashlib.sha256(body).hexdigest()
+        if self.store is not None:
+            return self.store.first_seen(key, self.ttl)
+
+        now = time.monotonic()
+        with self._lock:
+            while self._seen and next(iter(self._seen.values())) < now:
+                self._seen.popitem(last=False)
+            if key in self._seen:
+                return False
+            self._seen[key] = now + self.ttl
+            return True
+
+
+class StateCounters:
+    """Named counters, summed across workers when a shared store is configured"""
+
+    def __init__(self, store: Optional[SharedStateStore] = None):
+        self.store = store
+        self._local = Counter()
+
+    def incr(self, name: str, amount: int = 1):
+        if self.store is not None:
+            self.store.incr(name, amount)
+        else:
+            self._local[name] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        return self.store.counters() if self.store is not None else dict(self._local)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_shared_state() -> Optional[SharedStateStore]:
+    """Process-wide store when SHARED_STATE_PATH is configured, otherwise None"""
+    global _store
+    if not Config.SHARED_STATE_PATH:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SharedStateStore(Config.SHARED_STATE_PATH)
+                logger.info(f"Using shared state at {Config.SHARED_STATE_PATH}")
+    return _store
@@ -0,0 +1,470 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional
+from flask import Flask, jsonify, request
+from admin_commands import has_admin_token
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolRing:
+    """
+    Fixed-capacity ring of one symbol's signals in parallel typed arrays
+
+    About 30 bytes per signal instead of a dict each. Entries are kept in
+    time order (a late timestamp is clamped to the newest one), so a time
+    range is two binary searches over the logical order.
+    """
+
+    def __init__(self, capacity: int, symbol: str = ""):
+        self.capacity = capacity
+        self.symbol = symbol
+        self.times = array('d', [0.0]) * capacity
+        self.prices = array('d', [0.0]) * capacity
+        self.actions = array('i', [0]) * capacity
+        self.strategies = array('i', [0]) * capacity
+        self.seqs = array('q', [0]) * capacity
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> float:
+        """Time of the index-th oldest entry (lets bisect search the ring)"""
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return self.times[(self.start + index) % self.capacity]
+
+    @property
+    def newest_time(self) -> float:
+        return self[self.size - 1] if self.size else float('-inf')
+
+    def append(self, ts: float, price: float, action: int, strategy: int, seq: int):
+        """Store one entry over the oldest if full; returns (slot, stored time)"""
+        ts = max(ts, self.newest_time)
+        if self.size < self.capacity:
+            slot = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[slot] = ts
+        self.prices[slot] = price
+        self.actions[slot] = action
+        self.strategies[slot] = strategy
+        self.seqs[slot] = seq
+        return slot, ts
+
+    def span(self, since: Optional[float], until: Optional[float]):
+        """Logical index range [lo, hi) of entries with since <= time <= until"""
+        lo = bisect_left(self, since) if since is not None else 0
+        hi = bisect_right(self, until) if until is not None else self.size
+        return lo, hi
+
+    def slot(self, index: int) -> int:
+        return (self.start + index) % self.capacity
+
+    def walk(self, lo: int, hi: int) -> Iterator:
+        """(ring, slot) of the entries in [lo, hi), newest first"""
+        for index in range(hi - 1, lo - 1, -1):
+            yield self, self.slot(index)
+
+
+class TimeIndex:
+    """
+    Time-sorted references (time, seq, ring, slot) to ring entries sharing one key
+
+    Rings overwrite their oldest entries without telling the index: a
+    reference whose slot now holds another seq is stale. Stale references
+    are skipped on reads and dropped once they outnumber the live ones, so
+    the index stays within about twice the entries it covers.
+    """
+
+    def __init__(self):
+        self.times = array('d')
+        self.seqs = array('q')
+        self.slots = array('i')
+        self.rings: List[SymbolRing] = []
+        self.live = 0
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def add(self, ts: float, seq: int, ring: SymbolRing, slot: int):
+        if not self.times or ts >= self.times[-1]:
+            self.times.append(ts)
+            self.seqs.append(seq)
+            self.slots.append(slot)
+            self.rings.append(ring)
+        else:
+            # A late timestamp from another symbol; rare, so the O(n) insert is fine
+            index = bisect_right(self.times, ts)
+            self.times.insert(index, ts)
+            self.seqs.insert(index, seq)
+            self.slots.insert(index, slot)
+            self.rings.insert(index, ring)
+        self.live += 1
+
+    def evict(self):
+        """One covered entry was overwritten in its ring"""
+        self.live -= 1
+        if len(self.times) > 2 * self.live + 64:
+            keep = [i for i in range(len(self.times)) if self.rings[i].seqs[self.slots[i]] == self.seqs[i]]
+            self.times = array('d', (self.times[i] for i in keep))
+            self.seqs = array('q', (self.seqs[i] for i in keep))
+            self.slots = array('i', (self.slots[i] for i in keep))
+            self.rings = [self.rings[i] for i in keep]
+
+    def span(self, since: Optional[float], until: Optional[float]):
+        lo = bisect_left(self.times, since) if since is not None else 0
+        hi = bisect_right(self.times, until) if until is not None else len(self.times)
+        return lo, hi
+
+    def walk(self, lo: int, hi: int) -> Iterator:
+        """(ring, slot) of the live references in [lo, hi), newest first"""
+        for index in range(hi - 1, lo - 1, -1):
+            ring, slot = self.rings[index], self.slots[index]
+            if ring.seqs[slot] == self.seqs[index]:
+                yield ring, slot
+
+
+class SignalHistory:
+    """
+    Bounded per-symbol history of normalized signals
+
+    Each symbol keeps its newest `per_symbol` signals. Strategy and action
+    names are interned to small ints. Besides the per-symbol rings, time
+    indexes over all signals, per strategy (case-insensitive) and per
+    action let a query bisect to its time range in whichever is narrowest
+    and walk only that. With `directory` set every signal is
+    also appended to NDJSON segments there, which are replayed on start so
+    history survives restarts; segments roll at `segment_bytes` and only the
+    newest `max_segments` are kept.
+    """
+
+    def __init__(self, per_symbol: int = 500, directory: Optional[str] = None,
+                 segment_bytes: int = 4 * 1024 * 1024, max_segments: int = 8, clock=time.time):
+        self.per_symbol = per_symbol
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.clock = clock
+        self._rings: Dict[str, SymbolRing] = {}
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._seq = 0
+        self._all = TimeIndex()
+        self._by_strategy: Dict[str, TimeIndex] = {}
+        self._by_action: Dict[str, TimeIndex] = {}
+        self._lock = threading.Lock()
+        self._segment = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._replay()
+
+    def _intern(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return name_id
+
+    def record(self, symbol: str, action: str, strategy: str = "", price=None,
+               ts: Optional[float] = None) -> Dict:
+        """Store one signal; returns it as a history entry"""
+        price = _to_float(price)
+        entry = {
+            "symbol": (symbol or "UNKNOWN").split(':')[-1].upper(),
+            "action": (action or "").upper(),
+            "strategy": strategy or "",
+            "price": None if math.isnan(price) else price,
+            "time": self.clock() if ts is None else ts
+        }
+        with self._lock:
+            self._append(entry)
+            if self.directory:
+                self._spill(entry)
+        return entry
+
+    def record_signal(self, signal: Dict) -> Dict:
+        """Store a parsed webhook payload (TradingView field names)"""
+        return self.record(
+            symbol=signal.get('symbol') or signal.get('token') or signal.get('ticker'),
+            action=signal.get('action'),
+            strategy=signal.get('strategy') or signal.get('indicator') or "",
+            price=signal.get('price', signal.get('close'))
+        )
+
+    def _append(self, entry: Dict):
+        ring = self._rings.get(entry["symbol"])
+        if ring is None:
+            ring = self._rings[entry["symbol"]] = SymbolRing(self.per_symbol, entry["symbol"])
+        if len(ring) == ring.capacity:
+            for index in self._indexes(ring.actions[ring.start], ring.strategies[ring.start]):
+                index.evict()
+        self._seq += 1
+        action, strategy = self._intern(entry["action"]), self._intern(entry["strategy"])
+        slot, ts = ring.append(entry["time"], _to_float(entry["price"]), action, strategy, self._seq)
+        for index in self._indexes(action, strategy, create=True):
+            index.add(ts, self._seq, ring, slot)
+
+    def _indexes(self, action_id: int, strategy_id: int, create: bool = False) -> List[TimeIndex]:
+        """The time indexes an entry with these interned names belongs to"""
+        indexes = [self._all]
+        for by_name, name in ((self._by_action, self._names[action_id]),
+                              (self._by_strategy, self._names[strategy_id].upper())):
+            if name:
+                if create and name not in by_name:
+                    by_name[name] = TimeIndex()
+                indexes.append(by_name[name])
+        return indexes
+
+    def symbols(self) -> List[str]:
+        """Symbols with history, most recently active first"""
+        with self._lock:
+            return sorted(self._rings, key=lambda s: self._rings[s].newest_time, reverse=True)
+
+    def query(self, symbol: Optional[str] = None, strategy: Optional[str] = None, action: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None, limit: int = 50) -> List[Dict]:
+        """
+        Newest-first signals matching every given filter
+
+        The time range is bisected in the symbol's ring and in the strategy
+        and action indexes that apply; the narrowest of those ranges is
+        walked back from its newest entry, checking the other filters and
+        stopping at `limit`. Strategy and action match case-insensitively.
+        """
+        with self._lock:
+            sources = [self._all]
+            if symbol:
+                symbol = symbol.split(':')[-1].upper()
+                sources.append(self._rings.get(symbol))
+            if strategy:
+                strategy = strategy.upper()
+                sources.append(self._by_strategy.get(strategy))
+            if action:
+                action = action.upper()
+                sources.append(self._by_action.get(action))
+            if None in sources:
+                return []
+
+            spans = [(source, source.span(since, until)) for source in sources]
+            source, (lo, hi) = min(spans, key=lambda item: item[1][1] - item[1][0])
+            results = []
+            for ring, slot in source.walk(lo, hi):
+                if len(results) >= limit:
+                    break
+                entry_action = self._names[ring.actions[slot]]
+                entry_strategy = self._names[ring.strategies[slot]]
+                if (symbol and ring.symbol != symbol) or (action and entry_action != action) or \
+                        (strategy and entry_strategy.upper() != strategy):
+                    continue
+                price = ring.prices[slot]
+                results.append({
+                    "symbol": ring.symbol,
+                    "action": entry_action,
+                    "strategy": entry_strategy,
+                    "price": None if math.isnan(price) else price,
+                    "time": ring.times[slot],
+                    "seq": ring.seqs[slot]
+                })
+            return results
+
+    def latest(self, **filters) -> Optional[Dict]:
+        found = self.query(limit=1, **filters)
+        return found[0] if found else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "symbols": len(self._rings),
+                "signals": sum(len(ring) for ring in self._rings.values()),
+                "per_symbol": self.per_symbol,
+                "spill": bool(self.directory)
+            }
+
+    # Append-only segments
+
+    def _segments(self) -> List[str]:
+        return _segment_paths(self.directory)
+
+    def _prunable(self) -> List[str]:
+        """Own segments beyond the newest `max_segments`, and those of writers that have exited"""
+        own, gone = [], []
+        for path in self._segments():
+            pid = _segment_pid(path)
+            if pid == os.getpid():
+                own.append(path)
+            elif pid is None or not _pid_alive(pid):
+                gone.append(path)
+        return own[:-self.max_segments] + gone[:-self.max_segments]
+
+    def _spill(self, entry: Dict):
+        try:
+            if self._segment is None or self._segment.tell() >= self.segment_bytes:
+                self._roll()
+            self._segment.write(json.dumps(entry, separators=(',', ':')) + "\n")
+            self._segment.flush()
+        except OSError as e:
+            logger.error(f"Could not spill signal history to {self.directory}: {e}")
+
+    def _roll(self):
+        if self._segment is not None:
+            self._segment.close()
+        path = os.path.join(self.directory, f"signals-{int(self.clock() * 1000):015d}-{os.getpid()}.ndjson")
+        self._segment = open(path, "a", encoding="utf-8")
+        for old in self._prunable():
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass  # pruned by another worker at the same time
+
+    def _replay(self):
+        entries = read_segments(self.directory)
+        for entry in entries:
+            self._append(entry)
+        if entries:
+            logger.info(f"Replayed {len(entries)} signals from {self.directory}")
+
+    def close(self):
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+
+class SegmentFollower:
+    """
+    Reads the entries other processes append to a HISTORY_DIR's segments
+
+    Each poll returns what was written since the previous one, oldest
+    first. A torn last line is left for the next poll, and segments that
+    were pruned are forgotten.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._offsets: Dict[str, int] = {}
+
+    def poll(self) -> List[Dict]:
+        entries, offsets = [], {}
+        for path in _segment_paths(self.directory):
+            offset = self._offsets.get(path, 0)
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                continue  # pruned by its writer meanwhile
+            complete = data.rfind(b"\n") + 1
+            for line in data[:complete].splitlines():
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # torn line left by a crash
+            offsets[path] = offset + complete
+        self._offsets = offsets
+        # Workers' segments interleave in time; a stable sort keeps each writer's order within a timestamp
+        entries.sort(key=lambda entry: entry["time"])
+        return entries
+
+
+def read_segments(directory: str) -> List[Dict]:
+    """Every entry stored in a HISTORY_DIR, oldest first"""
+    return SegmentFollower(directory).poll()
+
+
+def _segment_paths(directory: str) -> List[str]:
+    names = sorted(n for n in os.listdir(directory) if n.startswith("signals-") and n.endswith(".ndjson"))
+    return [os.path.join(directory, n) for n in names]
+
+
+def _segment_pid(path: str) -> Optional[int]:
+    """Writer pid of a segment (signals-<ms>-<pid>.ndjson); None for segments from before pids were added"""
+    parts = os.path.basename(path)[:-len(".ndjson")].split("-")
+    return int(parts[2]) if len(parts) == 3 and parts[2].isdigit() else None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # running under another user
+    return True
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return math.nan
+    try:
+        return float(str(value).replace(',', '').lstrip('$'))
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def escape_markdown(text: str) -> str:
+    """Escape legacy Markdown markers (strategy names like EMA_Cross)"""
+    for char in ('_', '*', '`', '['):
+        text = text.replace(char, '\\' + char)
+    return text
+
+
+def format_history(entries: List[Dict], title: str = "Recent Signals") -> str:
+    """Telegram (Markdown) rendering of query results"""
+    if not entries:
+        return f"🗂 **{title}**\n\nNo signals recorded yet."
+    lines = [f"🗂 **{title}**", ""]
+    for entry in entries:
+        when = time.strftime('%m-%d %H:%M', time.localtime(entry["time"]))
+        price = f" @ ${entry['price']:,.2f}" if entry["price"] is not None else ""
+        strategy = f" ({escape_markdown(entry['strategy'])})" if entry["strategy"] else ""
+        lines.append(f"• {when} {escape_markdown(entry['symbol'])} {escape_markdown(entry['action'])}{price}{strategy}")
+    return "\n".join(lines)
+
+
+def register_history_route(app: Flask, history: Optional[SignalHistory] = None, path: str = "/history"):
+    """
+    Serve history queries on an existing Flask app
+
+    Query string: symbol, strategy, action, since/until (epoch seconds) and
+    limit (1 to 500). ADMIN_TOKEN must be sent as X-Admin-Token; without an
+    ADMIN_TOKEN configured the route always answers 401. Each worker
+    answers from its own in-memory history.
+    """
+    def history_query():
+        """Recent signals, newest first"""
+        history_store = history or signal_history
+        if not has_admin_token():
+            return jsonify({"error": "Unauthorized"}), 401
+        try:
+            since = request.args.get('since', type=float)
+            until = request.args.get('until', type=float)
+            limit = max(1, min(int(request.args.get('limit', 50)), 500))
+        except ValueError:
+            return jsonify({"error": "since, until and limit must be numbers"}), 400
+        entries = history_store.query(
+            symbol=request.args.get('symbol'),
+            strategy=request.args.get('strategy'),
+            action=request.args.get('action'),
+            since=since,
+            until=until,
+            limit=limit
+        )
+        for entry in entries:
+            del entry["seq"]
+        return jsonify({"count": len(entries), "signals": entries, "stats": history_store.stats()}), 200
+
+    app.add_url_rule(path, 'history', history_query, methods=['GET'])
+
+
+signal_history = SignalHistory(Config.HISTORY_PER_SYMBOL, Config.HISTORY_DIR)
@@ -1,14 +1,52 @@
 import logging
+import math
+import threading
 from datetime import datetime
 from typing import Dict, Optional
-from config import Config
-from telegram_bot import TelegramBot
+from config import FilterConfig, config_store
+from signal_history import signal_history
+from strategy_analytics import strategy_analytics
+from strategy_registry import strategy_registry
 
 logger = logging.getLogger(__name__)
 
+
+def parse_timestamp(value) -> Optional[float]:
+    """
+    Epoch seconds of a payload `timestamp`, or None if it can't be read
+
+    Takes what the Pine scripts and the server-side engines send: epoch
+    milliseconds (`timenow`) or seconds, as numbers or strings, and ISO 8601
+    (a trailing Z is UTC, no offset is local time).
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        try:
+            return datetime.fromisoformat(str(value).strip()).timestamp()
+        except ValueError:
+            return None
+    if not math.isfinite(number):
+        return None
+    return number / 1000.0 if number > 1e11 else number
+
+
 class SignalProcessor:
-    def __init__(self):
-        self.telegram_bot = TelegramBot()
+    def __init__(self, telegram_bot=None):
+        self._telegram_bot = telegram_bot
+        self._telegram_bot_lock = threading.Lock()
+    
+    @property
+    def telegram_bot(self):
+        """Built on the first signal so importing the web app doesn't pay for python-telegram-bot"""
+        if self._telegram_bot is None:
+            with self._telegram_bot_lock:
+                if self._telegram_bot is None:
+                    from telegram_bot import TelegramBot
+                    self._telegram_bot = TelegramBot()
+        return self._telegram_bot
     
     async def process_signal(self, raw_data: Dict) -> bool:
         """
@@ -33,6 +71,10 @@ class SignalProcessor:
                 logger.info(f"Signal filtered out: {signal.get('token')} - {signal.get('strategy')}")
                 return False
             
+            signal_history.record_signal(signal)
+            strategy_registry.observe(signal)
+            strategy_analytics.observe(signal)
+            
             # Send to Telegram
             await self.telegram_bot.send_signal(signal)
             logger.info(f"Signal processed successfully: {signal.get('token')} - {signal.get('action')}")
@@ -57,6 +99,9 @@ class SignalProcessor:
             "exchange": "Binance",
             "timestamp": "2025-01-01T12:00:00Z"
         }
+        
+        `timestamp` is kept as sent; `epoch` holds it in epoch seconds (None
+        if it can't be read).
         """
         try:
             # Handle different possible field names from TradingView
@@ -78,6 +123,9 @@ class SignalProcessor:
             # Normalize action to uppercase
             signal['action'] = signal['action'].upper()
             
+            # Parsed once here; freshness checks at delivery time compare against it
+            signal['epoch'] = parse_timestamp(signal['timestamp'])
+            
             # Clean up token symbol (remove exchange prefix if present)
             if signal['token']:
                 signal['token'] = signal['token'].split(':')[-1]  # Remove exchange prefix like "BINANCE:BTCUSDT"
@@ -95,31 +143,31 @@ class SignalProcessor:
                 return str(data[key])
         return None
     
-    def should_process_signal(self, signal: Dict) -> bool:
+    def should_process_signal(self, signal: Dict, filters: Optional[FilterConfig] = None) -> bool:
         """
         Apply filtering logic to determine if signal should be processed
         
         Args:
             signal: Normalized signal data
+            filters: Config snapshot to apply (default: the current one)
             
         Returns:
             bool: True if signal should be processed, False otherwise
         """
+        # One snapshot for the whole decision, a concurrent reload can't mix old and new lists
+        filters = filters if filters is not None else config_store.current()
+        
         # Check if token is in allowed list (if configured)
-        if Config.ALLOWED_TOKENS:
-            token = signal.get('token', '').upper()
-            allowed_tokens_upper = [t.upper() for t in Config.ALLOWED_TOKENS if t.strip()]
-            if token not in allowed_tokens_upper:
-                logger.info(f"Token {token} not in allowed list: {allowed_tokens_upper}")
-                return False
+        token = signal.get('token', '').upper()
+        if not filters.allows_token(token):
+            logger.info(f"Token {token} not in allowed list: {sorted(filters.token_set)}")
+            return False
         
         # Check if strategy is in allowed list (if configured)
-        if Config.ALLOWED_STRATEGIES:
-            strategy = signal.get('strategy', '').upper()
-            allowed_strategies_upper = [s.upper() for s in Config.ALLOWED_STRATEGIES if s.strip()]
-            if strategy not in allowed_strategies_upper:
-                logger.info(f"Strategy {strategy} not in allowed list: {allowed_strategies_upper}")
-                return False
+        strategy = signal.get('strategy', '').upper()
+        if not filters.allows_strategy(strategy):
+            logger.info(f"Strategy {strategy} not in allowed list: {sorted(filters.strategy_set)}")
+            return False
         
         # Validate action is supported
         valid_actions = ['BUY', 'SELL', 'LONG', 'SHORT']
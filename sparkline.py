@@ -0,0 +1,247 @@
+import logging
+import struct
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import Config
+from retry_engine import DeliveryResult
+from token_pool import TokenPool, bot_id
+
+logger = logging.getLogger(__name__)
+
+# Telegram's limit for photo captions; longer signals go out as plain text
+CAPTION_LIMIT = 1024
+
+BACKGROUND = (255, 255, 255)
+UP = (22, 163, 74)
+DOWN = (220, 38, 38)
+
+TIMEFRAME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_timeframe(value: str) -> int:
+    """"5m" -> 300, "1h" -> 3600; a bare number is minutes like TradingView's interval"""
+    value = str(value).strip().lower()
+    if value[-1:] in TIMEFRAME_UNITS:
+        return int(float(value[:-1]) * TIMEFRAME_UNITS[value[-1]])
+    return int(float(value) * 60)
+
+
+def bar_closes(prices: Sequence[Tuple[float, float]], timeframe: int, bars: int, now: float) -> List[float]:
+    """
+    Close of each of the last `bars` bars from (time, price) points
+
+    A bar without a price repeats the previous close, so gaps show as
+    flat stretches; bars before the first price are left out.
+    """
+    first_bucket = int(now // timeframe) - bars + 1
+    closes: List[Optional[float]] = [None] * bars
+    for ts, price in sorted(prices):
+        index = int(ts // timeframe) - first_bucket
+        if 0 <= index < bars:
+            closes[index] = price
+    result, last = [], None
+    for close in closes:
+        last = close if close is not None else last
+        if last is not None:
+            result.append(last)
+    return result
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+
+def encode_png(rows: List[bytearray], palette: Sequence[Tuple[int, int, int]]) -> bytes:
+    """8-bit palette PNG from rows of palette indexes"""
+    height, width = len(rows), len(rows[0])
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+    return (b"\x89PNG\r\n\x1a\n"
+            + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+            + _chunk(b"PLTE", b"".join(bytes(color) for color in palette))
+            + _chunk(b"IDAT", zlib.compress(raw, 9))
+            + _chunk(b"IEND", b""))
+
+
+def render_sparkline(values: Sequence[float], width: int = 240, height: int = 60) -> bytes:
+    """
+    PNG line chart of `values` with a tinted area under the line
+
+    Green if the last value is at or above the first, red otherwise. Pure
+    Python: a palette image drawn point by point and deflated with zlib.
+    """
+    if len(values) < 2:
+        raise ValueError("A sparkline needs at least two values")
+    color = UP if values[-1] >= values[0] else DOWN
+    tint = tuple(channel + (255 - channel) * 4 // 5 for channel in color)
+    palette = [BACKGROUND, tint, color]
+
+    low, high = min(values), max(values)
+    span = (high - low) or 1.0
+    pad = 3
+    xs = [pad + round(i * (width - 2 * pad - 1) / (len(values) - 1)) for i in range(len(values))]
+    ys = [pad + round((high - value) * (height - 2 * pad - 1) / span) if high > low else height // 2
+          for value in values]
+
+    rows = [bytearray(width) for _ in range(height)]
+    # The line's y at every x column, interpolated between the points
+    line_y = [None] * width
+    for (x0, y0), (x1, y1) in zip(zip(xs, ys), zip(xs[1:], ys[1:])):
+        for x in range(x0, x1 + 1):
+            line_y[x] = y0 + (y1 - y0) * (x - x0) / ((x1 - x0) or 1)
+    for x, y in enumerate(line_y):
+        if y is not None:
+            for row in range(int(round(y)), height):
+                rows[row][x] = 1
+
+    def plot(x, y):
+        for dy in (0, 1):
+            if 0 <= y + dy < height:
+                rows[y + dy][x] = 2
+
+    # Bresenham between consecutive points, two pixels thick
+    for (x0, y0), (x1, y1) in zip(zip(xs, ys), zip(xs[1:], ys[1:])):
+        dx, dy = abs(x1 - x0), -abs(y1 - y0)
+        sx, sy = (1 if x0 < x1 else -1), (1 if y0 < y1 else -1)
+        err = dx + dy
+        while True:
+            plot(x0, y0)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+    return encode_png(rows, palette)
+
+
+class Sparkline:
+    """One rendered chart and the file_id each bot got for it after the first upload"""
+
+    def __init__(self, key: Tuple, png: bytes):
+        self.key = key
+        self.png = png
+        self.file_ids: Dict[str, str] = {}
+        self.upload_lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self.png) + 200
+
+
+class SparklineCache:
+    """LRU of rendered charts bounded by the bytes of PNG it holds"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._charts: "OrderedDict[Tuple, Sparkline]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[Sparkline]:
+        with self._lock:
+            chart = self._charts.get(key)
+            if chart is not None:
+                self._charts.move_to_end(key)
+            return chart
+
+    def put(self, chart: Sparkline):
+        with self._lock:
+            old = self._charts.pop(chart.key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self._charts[chart.key] = chart
+            self.bytes += chart.size
+            while self.bytes > self.max_bytes and len(self._charts) > 1:
+                _, evicted = self._charts.popitem(last=False)
+                self.bytes -= evicted.size
+
+    def __len__(self):
+        return len(self._charts)
+
+
+class SparklineCharts:
+    """
+    Price sparklines attached to signals, rendered once and uploaded once
+
+    Charts are built from the prices in the signal history, one close per
+    `timeframe` bar, and cached by (symbol, timeframe, bar): every signal
+    for a symbol within the same bar shares one chart. The first recipient
+    on each bot uploads the PNG; the others wait for that upload and send
+    the returned file_id, so one render and one upload serve a broadcast.
+    """
+
+    def __init__(self, history, engine, timeframe: Optional[str] = None, bars: Optional[int] = None,
+                 max_bytes: Optional[int] = None, clock=time.time):
+        self.history = history
+        self.engine = engine
+        self.timeframe = timeframe or Config.SPARKLINE_TIMEFRAME
+        self.timeframe_seconds = parse_timeframe(self.timeframe)
+        self.bars = bars or Config.SPARKLINE_BARS
+        self.cache = SparklineCache(max_bytes if max_bytes is not None else Config.SPARKLINE_CACHE_BYTES)
+        self.clock = clock
+        self.counts = Counter()
+        self._render_lock = threading.Lock()
+
+    def chart(self, symbol: str) -> Optional[Sparkline]:
+        """The chart for `symbol` in the current bar, or None without enough history"""
+        now = self.clock()
+        symbol = symbol.split(':')[-1].upper()
+        key = (symbol, self.timeframe, int(now // self.timeframe_seconds))
+        with self._render_lock:
+            chart = self.cache.get(key)
+            if chart is not None:
+                self.counts["hits"] += 1
+                return chart
+            since = now - self.bars * self.timeframe_seconds
+            prices = [(entry["time"], entry["price"]) for entry in
+                      self.history.query(symbol=symbol, since=since, limit=self.history.per_symbol)
+                      if entry["price"] is not None]
+            closes = bar_closes(prices, self.timeframe_seconds, self.bars, now)
+            if len(closes) < 2:
+                self.counts["no_history"] += 1
+                return None
+            chart = Sparkline(key, render_sparkline(closes))
+            self.cache.put(chart)
+            self.counts["renders"] += 1
+            return chart
+
+    def _bot(self, chat_id) -> str:
+        engine = self.engine.engine_for(chat_id) if isinstance(self.engine, TokenPool) else self.engine
+        return bot_id(engine.api.token)
+
+    def send(self, chat_id, chart: Sparkline, caption: str, parse_mode: str = 'HTML') -> DeliveryResult:
+        if len(caption) > CAPTION_LIMIT:
+            return self.engine.send_message(chat_id, caption, parse_mode=parse_mode)
+        bot = self._bot(chat_id)
+        file_id = chart.file_ids.get(bot)
+        if file_id is None:
+            with chart.upload_lock:
+                file_id = chart.file_ids.get(bot)
+                if file_id is None:
+                    result = self.engine.call(chat_id, 'sendPhoto', caption=caption, parse_mode=parse_mode,
+                                              files={'photo': ('sparkline.png', chart.png, 'image/png')})
+                    if result.ok:
+                        photo = (result.api_result.result or {}).get('photo') or [{}]
+                        if photo[-1].get('file_id'):
+                            chart.file_ids[bot] = photo[-1]['file_id']
+                        self.counts["uploads"] += 1
+                    return result
+        self.counts["reused"] += 1
+        result = self.engine.call(chat_id, 'sendPhoto', photo=file_id, caption=caption, parse_mode=parse_mode)
+        if not result.ok and self._bot(chat_id) != bot:
+            # The pool moved the chat to its primary bot, which cannot use this bot's file id
+            return self.send(chat_id, chart, caption, parse_mode)
+        return result
+
+    def sender(self, chart: Sparkline):
+        """`send(chat_id, text)` for DeliveryScheduler.submit: the text becomes the chart's caption"""
+        return lambda chat_id, text: self.send(chat_id, chart, text.strip())
+
+    def stats(self) -> Dict:
+        return {"cached": len(self.cache), "cache_bytes": self.cache.bytes, **self.counts}
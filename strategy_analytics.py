@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Per-strategy trade performance from the signal stream
+
+Every action is a target position for its (strategy, symbol): BUY/LONG go
+long, SHORT goes short, SELL/EXIT/CLOSE go flat. A trade closes whenever a
+non-flat position changes, so BUY -> SELL is a long trade and LONG -> SHORT
+closes the long and opens a short. A repeat of the current target does
+nothing (no pyramiding), and signals without a usable price are skipped.
+
+Returns are per trade on a fixed stake (side * (exit / entry - 1)); the
+equity curve is their running sum in close order, which is what drawdown is
+measured on.
+
+Report over stored history (HISTORY_DIR segments):
+
+    python strategy_analytics.py --history-dir signal_history
+"""
+import argparse
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+from signal_history import escape_markdown, read_segments
+
+logger = logging.getLogger(__name__)
+
+TARGETS = {"BUY": 1, "LONG": 1, "SHORT": -1, "SELL": 0, "EXIT": 0, "CLOSE": 0, "FLAT": 0}
+
+
+class StrategyStats:
+    """Running aggregates for one strategy, all updated in O(1) per closed trade"""
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.total_return = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.open_positions = 0
+
+    def close_trade(self, trade_return: float):
+        self.trades += 1
+        if trade_return > 0:
+            self.wins += 1
+        self.total_return += trade_return
+        self.peak = max(self.peak, self.total_return)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.total_return)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trades if self.trades else 0.0
+
+    @property
+    def avg_return(self) -> float:
+        return self.total_return / self.trades if self.trades else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "trades": self.trades,
+            "wins": self.wins,
+            "win_rate": self.win_rate,
+            "avg_return": self.avg_return,
+            "total_return": self.total_return,
+            "max_drawdown": self.max_drawdown,
+            "open_positions": self.open_positions
+        }
+
+
+class StrategyAnalytics:
+    """Incremental performance per strategy, fed one accepted signal at a time"""
+
+    def __init__(self):
+        self._positions: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._stats: Dict[str, StrategyStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, signal: Dict) -> Optional[float]:
+        """Apply one signal; returns the return of the trade it closed, if any"""
+        target = TARGETS.get((signal.get('action') or "").upper())
+        price = _to_price(signal.get('price', signal.get('close')))
+        if target is None or price is None:
+            return None
+        strategy = signal.get('strategy') or signal.get('indicator') or "Manual Alert"
+        symbol = str(signal.get('symbol') or signal.get('token') or signal.get('ticker') or "UNKNOWN")
+        symbol = symbol.split(':')[-1].upper()
+
+        with self._lock:
+            stats = self._stats.get(strategy)
+            if stats is None:
+                stats = self._stats[strategy] = StrategyStats()
+            side, entry = self._positions.get((strategy, symbol), (0, 0.0))
+            if target == side:
+                return None
+
+            closed = None
+            if side:
+                closed = side * (price / entry - 1)
+                stats.close_trade(closed)
+                stats.open_positions -= 1
+            if target:
+                stats.open_positions += 1
+            self._positions[(strategy, symbol)] = (target, price)
+            return closed
+
+    def stats(self, strategy: str) -> Optional[Dict]:
+        with self._lock:
+            stats = self._stats.get(strategy)
+            return stats.to_dict() if stats else None
+
+    def report(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+    def render(self) -> str:
+        """Markdown performance table for the bot menu"""
+        return render_report(self.report())
+
+
+def _to_price(value) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        price = float(str(value).replace(',', '').lstrip('$'))
+    except ValueError:
+        return None
+    return price if price > 0 and math.isfinite(price) else None
+
+
+def render_report(report: Dict[str, Dict]) -> str:
+    if not report:
+        return "📊 **Strategy Performance**\n\nNo trades yet."
+    lines = ["📊 **Strategy Performance**", ""]
+    for name, stats in sorted(report.items(), key=lambda item: item[1]["total_return"], reverse=True):
+        lines += [
+            f"**{escape_markdown(name)}**",
+            f"• Trades: {stats['trades']} (open {stats['open_positions']})",
+            f"• Win rate: {stats['win_rate']:.0%}",
+            f"• Avg return: {stats['avg_return']:+.2%}  Total: {stats['total_return']:+.2%}",
+            f"• Max drawdown: {stats['max_drawdown']:.2%}",
+            ""
+        ]
+    lines.append("💡 Fixed stake per trade, returns from signal prices")
+    return "\n".join(lines)
+
+
+def recompute(strategies: List[str], symbols: List[str], actions: List[str], prices) -> Dict[str, Dict]:
+    """
+    Vectorized full-history report, same numbers as replaying through
+    StrategyAnalytics; inputs are parallel sequences in arrival order
+
+    Needs NumPy (imported here so the web servers never load it).
+    """
+    import numpy as np
+
+    action_names, action_ids = np.unique(np.asarray(actions, dtype=str), return_inverse=True)
+    target_of_action = np.array([TARGETS.get(a.upper(), 2) for a in action_names], dtype=np.int8)
+    targets = target_of_action[action_ids] if len(action_names) else np.zeros(0, dtype=np.int8)
+    prices = np.asarray(prices, dtype=np.float64)
+
+    # Unknown actions (2) and unusable prices never reach the position model
+    with np.errstate(invalid='ignore'):
+        valid = (targets != 2) & np.isfinite(prices) & (prices > 0)
+    strategy_names, strategy_ids = np.unique(np.asarray(strategies, dtype=str)[valid], return_inverse=True)
+    _, symbol_ids = np.unique(np.asarray(symbols, dtype=str)[valid], return_inverse=True)
+    targets, prices = targets[valid], prices[valid]
+    order = np.arange(len(targets))
+    group = strategy_ids.astype(np.int64) * (symbol_ids.max(initial=0) + 1) + symbol_ids
+    by_group = order[np.argsort(group, kind='stable')]
+    group = np.sort(group, kind='stable')
+    targets, prices, strategy_of = targets[by_group], prices[by_group], strategy_ids[by_group]
+
+    # Position after a signal is its target; before it, the previous target in the group (flat at the start)
+    first = np.ones(len(group), dtype=bool)
+    first[1:] = group[1:] != group[:-1]
+    position = targets
+    held = np.empty_like(position)
+    held[1:] = position[:-1]
+    held[first] = 0
+
+    # Repeats of the held target are no-ops, so trades only start and end where the position changes
+    events = np.flatnonzero(position != held)
+    closes = events[held[events] != 0]
+    # The open of a closing trade is the previous position change in the same group
+    event_rank = np.searchsorted(events, closes)
+    entries = events[event_rank - 1]
+    returns = held[closes] * (prices[closes] / prices[entries] - 1)
+
+    n = len(strategy_names)
+    close_strategy = strategy_of[closes]
+    trades = np.bincount(close_strategy, minlength=n)
+    wins = np.bincount(close_strategy, weights=(returns > 0), minlength=n)
+    totals = np.bincount(close_strategy, weights=returns, minlength=n)
+    last_of_group = np.flatnonzero(np.append(first[1:], True)) if len(group) else np.zeros(0, dtype=np.int64)
+    open_positions = np.bincount(strategy_of[last_of_group], weights=(position[last_of_group] != 0), minlength=n)
+
+    # Equity per strategy in arrival order of the closing signal; offsets keep the running max per strategy
+    chrono = np.lexsort((by_group[closes], close_strategy))
+    curve_strategy, curve_returns = close_strategy[chrono], returns[chrono]
+    max_drawdown = np.zeros(n)
+    if len(curve_returns):
+        starts = np.flatnonzero(np.append(True, curve_strategy[1:] != curve_strategy[:-1]))
+        cumulative = np.cumsum(curve_returns)
+        base = np.repeat(cumulative[starts] - curve_returns[starts], np.diff(np.append(starts, len(cumulative))))
+        equity = cumulative - base
+        offset = curve_strategy * (2 * np.abs(curve_returns).sum() + 1)
+        peak = np.maximum(np.maximum.accumulate(equity + offset) - offset, 0.0)
+        max_drawdown[curve_strategy[starts]] = np.maximum.reduceat(peak - equity, starts)
+
+    report = {}
+    for index, name in enumerate(strategy_names):
+        count = int(trades[index])
+        report[str(name)] = {
+            "trades": count,
+            "wins": int(wins[index]),
+            "win_rate": wins[index] / count if count else 0.0,
+            "avg_return": totals[index] / count if count else 0.0,
+            "total_return": float(totals[index]),
+            "max_drawdown": float(max_drawdown[index]),
+            "open_positions": int(open_positions[index])
+        }
+    return report
+
+
+def load_segments(directory: str) -> Tuple[List[str], List[str], List[str], List[Optional[float]]]:
+    """Columns of every signal stored in a HISTORY_DIR, oldest first"""
+    strategies, symbols, actions, prices = [], [], [], []
+    for entry in read_segments(directory):
+        strategies.append(entry.get("strategy") or "Manual Alert")
+        symbols.append(entry.get("symbol") or "UNKNOWN")
+        actions.append(entry.get("action") or "")
+        price = entry.get("price")
+        prices.append(float("nan") if price is None else price)
+    return strategies, symbols, actions, prices
+
+
+strategy_analytics = StrategyAnalytics()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--history-dir', required=True, help="HISTORY_DIR with signals-*.ndjson segments")
+    args = parser.parse_args()
+
+    columns = load_segments(args.history_dir)
+    report = recompute(*columns)
+    print(f"{len(columns[0])} signals, {len(report)} strategies")
+    print(f"{'strategy':<32} {'trades':>7} {'win%':>6} {'avg':>8} {'total':>9} {'max dd':>8} {'open':>5}")
+    for name, stats in sorted(report.items(), key=lambda item: item[1]["total_return"], reverse=True):
+        print(f"{name[:32]:<32} {stats['trades']:>7} {stats['win_rate']:>6.0%} {stats['avg_return']:>+8.2%} "
+              f"{stats['total_return']:>+9.2%} {stats['max_drawdown']:>8.2%} {stats['open_positions']:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+from config import Config
+from signal_history import escape_markdown
+
+logger = logging.getLogger(__name__)
+
+STATUS_ACTIVE = "Active"
+STATUS_PAUSED = "Paused"
+
+
+class StrategyRecord:
+    """What the registry knows about one TradingView strategy"""
+
+    def __init__(self, name: str, first_seen: float):
+        self.name = name
+        self.symbol = ""
+        self.timeframe = ""
+        self.description = ""
+        self.status = STATUS_ACTIVE
+        self.last_signal = ""
+        self.last_price = None
+        self.last_seen = first_seen
+        self.signal_count = 0
+        self.action_counts = Counter()
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "symbol": self.symbol,
+            "timeframe": self.timeframe,
+            "description": self.description,
+            "status": self.status,
+            "last_signal": self.last_signal,
+            "last_price": self.last_price,
+            "last_seen": self.last_seen,
+            "signal_count": self.signal_count,
+            "action_counts": dict(self.action_counts)
+        }
+
+
+class StrategyRegistry:
+    """
+    Live view of the strategies sending webhooks
+
+    Active strategies sit in an OrderedDict ordered by last signal, so
+    auto-pausing the ones silent for `silence_seconds` only looks at the
+    oldest entries, and the Active/Paused totals are the sizes of the two
+    groups. Every change bumps `version`, which keys the cached menu text.
+    """
+
+    def __init__(self, silence_seconds: Optional[float] = None, clock=time.time):
+        self.silence_seconds = silence_seconds if silence_seconds is not None else Config.STRATEGY_SILENCE_SECONDS
+        self.clock = clock
+        self.version = 0
+        self.total_signals = 0
+        self._records: Dict[str, StrategyRecord] = {}
+        self._active: "OrderedDict[str, StrategyRecord]" = OrderedDict()
+        self._rendered = (-1, "")
+        self._lock = threading.RLock()
+
+    def observe(self, signal: Dict, ts: Optional[float] = None) -> StrategyRecord:
+        """Update the strategy that sent an accepted webhook (received at `ts`, default now)"""
+        name = signal.get('strategy') or signal.get('indicator') or "Manual Alert"
+        now = self.clock() if ts is None else ts
+        with self._lock:
+            record = self._records.get(name)
+            if record is None:
+                record = self._records[name] = StrategyRecord(name, now)
+            elif record.status == STATUS_PAUSED:
+                logger.info(f"Strategy {name} is sending signals again")
+
+            symbol = signal.get('symbol') or signal.get('token') or signal.get('ticker')
+            if symbol:
+                record.symbol = str(symbol).split(':')[-1]
+            record.timeframe = str(signal.get('timeframe') or signal.get('interval') or record.timeframe)
+            record.description = str(signal.get('description') or record.description)
+            record.last_signal = (signal.get('action') or "").upper()
+            price = signal.get('price', signal.get('close'))
+            if price is not None:
+                record.last_price = price
+            record.last_seen = now
+            record.signal_count += 1
+            record.action_counts[record.last_signal] += 1
+            record.status = STATUS_ACTIVE
+
+            self._active[name] = record
+            self._active.move_to_end(name)
+            self.total_signals += 1
+            self.version += 1
+            self.sweep(now)
+            return record
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Pause strategies silent for longer than silence_seconds, returns how many"""
+        if not self.silence_seconds:
+            return 0
+        cutoff = (self.clock() if now is None else now) - self.silence_seconds
+        paused = 0
+        with self._lock:
+            while self._active:
+                name, record = next(iter(self._active.items()))
+                if record.last_seen >= cutoff:
+                    break
+                self._active.popitem(last=False)
+                record.status = STATUS_PAUSED
+                paused += 1
+                logger.info(f"Strategy {name} paused after {self.silence_seconds:g}s without signals")
+            if paused:
+                self.version += 1
+        return paused
+
+    def get(self, name: str) -> Optional[StrategyRecord]:
+        return self._records.get(name)
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    @property
+    def paused_count(self) -> int:
+        return len(self._records) - len(self._active)
+
+    def summary(self) -> Dict:
+        self.sweep()
+        return {
+            "strategies": len(self._records),
+            "active": self.active_count,
+            "paused": self.paused_count,
+            "signals": self.total_signals
+        }
+
+    def snapshot(self) -> Dict[str, Dict]:
+        self.sweep()
+        with self._lock:
+            return {name: record.to_dict() for name, record in self._records.items()}
+
+    def render(self) -> str:
+        """Markdown strategy overview for the bot menu, rebuilt only after a change"""
+        self.sweep()
+        with self._lock:
+            version, text = self._rendered
+            if version != self.version:
+                text = self._render()
+                self._rendered = (self.version, text)
+            return text
+
+    def _render(self) -> str:
+        if not self._records:
+            return (
+                "📈 **Current Trading Strategies**\n\n"
+                "No strategy has sent a signal yet.\n\n"
+                "💡 Add strategies in TradingView with your webhook URL"
+            )
+
+        lines = ["📈 **Current Trading Strategies**", "", "Here are your TradingView strategies:"]
+        for name, record in self._records.items():
+            status_icon = "🟢" if record.status == STATUS_ACTIVE else "🟡"
+            price = f" @ ${record.last_price}" if record.last_price is not None else ""
+            last_seen = time.strftime('%Y-%m-%d %H:%M', time.localtime(record.last_seen))
+            lines += [
+                "",
+                f"{status_icon} **{escape_markdown(name)}**",
+                f"• Symbol: {escape_markdown(record.symbol or 'n/a')}",
+                f"• Timeframe: {escape_markdown(record.timeframe or 'n/a')}",
+                f"• Status: {record.status}",
+                f"• Last Signal: {escape_markdown(record.last_signal + price)}",
+                f"• Signals: {record.signal_count} (last {last_seen})"
+            ]
+            if record.description:
+                lines.append(f"• Description: {escape_markdown(record.description)}")
+        lines += [
+            "",
+            f"📊 **Total Strategies:** {len(self._records)}",
+            f"✅ **Active:** {self.active_count}",
+            f"⏸️ **Paused:** {self.paused_count}",
+            "",
+            "💡 Add more strategies in TradingView with your webhook URL"
+        ]
+        return "\n".join(lines)
+
+
+strategy_registry = StrategyRegistry()
@@ -0,0 +1,136 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+from config import Config
+from telegram_api import OUTCOME_DEAD_CHAT
+
+logger = logging.getLogger(__name__)
+
+
+def chat_key(chat_id):
+    """Numeric chat ids as int; channel usernames ("@name") stay strings"""
+    return int(chat_id) if str(chat_id).lstrip('-').isdigit() else str(chat_id)
+
+
+class SuppressionList:
+    """
+    Persisted set of chats that must not be messaged anymore
+
+    Lookups are plain dict membership checks; every change is written
+    back to a JSON file atomically so restarts keep the list. Changes are
+    read-modify-write under an flock on `<path>.lock`, so workers that
+    suppress different chats at the same time don't drop each other's.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[object, Dict] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            mtime = self._file_mtime()
+            with open(self.path) as f:
+                raw = json.load(f)
+            self._entries = {chat_key(chat_id): entry for chat_id, entry in raw.items()}
+            self._mtime = mtime
+            logger.info(f"Loaded {len(self._entries)} suppressed chats from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load suppression list {self.path}: {e}")
+
+    def refresh(self):
+        """Pick up changes written by another worker process"""
+        if self.path and self._file_mtime() != self._mtime:
+            with self._lock:
+                self.load()
+
+    @contextmanager
+    def _update(self):
+        """Hold the thread and file locks with the latest file loaded, for one change"""
+        with self._lock:
+            if not self.path:
+                yield
+                return
+            with open(f"{self.path}.lock", 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                # Always re-read: two writes within one mtime tick would look unchanged
+                self.load()
+                yield
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({str(chat_id): entry for chat_id, entry in self._entries.items()}, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self._mtime = self._file_mtime()
+        except OSError as e:
+            logger.error(f"Could not persist suppression list {self.path}: {e}")
+
+    def __contains__(self, chat_id) -> bool:
+        return chat_key(chat_id) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def suppress(self, chat_id, reason: str, description: str = "") -> bool:
+        """Add a chat; returns False if it was already suppressed"""
+        chat_id = chat_key(chat_id)
+        with self._update():
+            if chat_id in self._entries:
+                return False
+            self._entries[chat_id] = {
+                'reason': reason,
+                'description': description,
+                'since': time.time()
+            }
+            self._save()
+        logger.warning(f"Chat {chat_id} suppressed: {reason}")
+        return True
+
+    def restore(self, chat_id) -> bool:
+        """Remove a chat; returns False if it was not suppressed"""
+        with self._update():
+            if self._entries.pop(chat_key(chat_id), None) is None:
+                return False
+            self._save()
+        logger.info(f"Chat {chat_id} restored")
+        return True
+
+    def entries(self) -> Dict[int, Dict]:
+        with self._lock:
+            return dict(self._entries)
+
+    def record(self, result) -> bool:
+        """Suppress the chat behind a DeliveryResult if it failed permanently"""
+        api_result = result.api_result
+        if result.outcome != OUTCOME_DEAD_CHAT or api_result is None:
+            return False
+        return self.suppress(result.chat_id, api_result.dead_reason, api_result.description)
+
+    def filter(self, chat_ids: Iterable) -> List:
+        """Routing step: keep only chats that are still deliverable"""
+        self.refresh()
+        entries = self._entries
+        return [chat_id for chat_id in chat_ids if chat_id not in entries]
+
+
+# Process-wide list shared by every sender
+suppressed_chats = SuppressionList(Config.SUPPRESSION_FILE)
@@ -0,0 +1,156 @@
+import logging
+import threading
+from datetime import timedelta
+from typing import TYPE_CHECKING, Dict, Optional
+from config import Config
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# Outcome classes used by the delivery layer
+OUTCOME_OK = "ok"
+OUTCOME_RETRY_AFTER = "retry_after"
+OUTCOME_TRANSIENT = "transient"
+OUTCOME_FAILED = "failed"
+OUTCOME_DEAD_CHAT = "dead_chat"
+
+# Permanent failures: the chat will never accept messages again
+DEAD_CHAT_REASONS = (
+    (403, "bot was blocked by the user", "bot_blocked"),
+    (403, "user is deactivated", "user_deactivated"),
+    (403, "bot was kicked", "bot_kicked"),
+    (403, "bot is not a member", "bot_kicked"),
+    (400, "chat not found", "chat_not_found"),
+    (400, "user not found", "chat_not_found"),
+)
+
+
+class ApiResult:
+    """Result of a single Bot API call, classified for the retry engine"""
+
+    def __init__(self, ok: bool, status_code: int = 200, description: str = "",
+                 result: Optional[Dict] = None, retry_after: Optional[float] = None,
+                 outcome: Optional[str] = None):
+        self.ok = ok
+        self.status_code = status_code
+        self.description = description or ""
+        self.result = result
+        self.retry_after = retry_after
+        self.outcome = outcome or classify_status(ok, status_code)
+        self.dead_reason = None
+        if self.outcome == OUTCOME_FAILED:
+            self.dead_reason = classify_dead_chat(status_code, self.description)
+            if self.dead_reason:
+                self.outcome = OUTCOME_DEAD_CHAT
+
+    def __repr__(self):
+        return f"ApiResult(ok={self.ok}, status={self.status_code}, outcome={self.outcome}, description={self.description!r})"
+
+    @classmethod
+    def from_response(cls, response) -> "ApiResult":
+        """Build a result from a `requests` response to a Bot API method"""
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+
+        parameters = payload.get('parameters') or {}
+        return cls(
+            ok=bool(payload.get('ok')) and response.status_code == 200,
+            status_code=payload.get('error_code', response.status_code),
+            description=payload.get('description', '' if response.status_code == 200 else response.text),
+            result=payload.get('result'),
+            retry_after=parameters.get('retry_after')
+        )
+
+    @classmethod
+    def from_exception(cls, exc: Exception) -> "ApiResult":
+        """Map a python-telegram-bot or transport exception onto a result"""
+        import requests
+        from telegram import error as tg_error
+
+        if isinstance(exc, tg_error.RetryAfter):
+            retry_after = exc.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            return cls(False, 429, str(exc), retry_after=float(retry_after))
+        if isinstance(exc, tg_error.Forbidden):
+            return cls(False, 403, str(exc))
+        if isinstance(exc, tg_error.BadRequest):
+            return cls(False, 400, str(exc))
+        if isinstance(exc, tg_error.InvalidToken):
+            return cls(False, 401, str(exc))
+        if isinstance(exc, (tg_error.NetworkError, requests.RequestException)):
+            return cls(False, 0, str(exc), outcome=OUTCOME_TRANSIENT)
+        return cls(False, 0, str(exc), outcome=OUTCOME_FAILED)
+
+
+def classify_status(ok: bool, status_code: int) -> str:
+    """
+    Classify a Bot API status code
+
+    429 carries a retry_after that must be honored globally, 5xx and transport
+    errors (status 0) are worth retrying, every other 4xx is final.
+    """
+    if ok:
+        return OUTCOME_OK
+    if status_code == 429:
+        return OUTCOME_RETRY_AFTER
+    if status_code == 0 or status_code >= 500:
+        return OUTCOME_TRANSIENT
+    return OUTCOME_FAILED
+
+
+def classify_dead_chat(status_code: int, description: str) -> Optional[str]:
+    """Return why a chat is permanently undeliverable, or None"""
+    description = description.lower()
+    for code, fragment, reason in DEAD_CHAT_REASONS:
+        if status_code == code and fragment in description:
+            return reason
+    return None
+
+
+class TelegramAPI:
+    """
+    Minimal synchronous Bot API client sharing one HTTP connection pool
+
+    `requests` and the pool are set up on the first call, which keeps it out
+    of server start-up.
+    """
+
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None,
+                 session: Optional["requests.Session"] = None, timeout: float = 10):
+        self.token = token or Config.BOT_TOKEN
+        self.base_url = (base_url or Config.TELEGRAM_API_BASE_URL).rstrip('/')
+        self._session = session
+        self._session_lock = threading.Lock()
+        self.timeout = timeout
+
+    @property
+    def session(self) -> "requests.Session":
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    self._session = requests.Session()
+        return self._session
+
+    @property
+    def method_url(self) -> str:
+        return f"{self.base_url}/bot{self.token}"
+
+    def call(self, method: str, files: Optional[Dict] = None, **params) -> ApiResult:
+        """Call a Bot API method and classify the response, never raises; `files` are uploaded as multipart"""
+        import requests
+        try:
+            response = self.session.post(f"{self.method_url}/{method}", data=params, files=files,
+                                         timeout=self.timeout)
+            return ApiResult.from_response(response)
+        except requests.RequestException as e:
+            logger.warning(f"Bot API {method} transport error: {e}")
+            return ApiResult(False, 0, str(e), outcome=OUTCOME_TRANSIENT)
+
+    def send_message(self, chat_id, text: str, parse_mode: str = 'HTML', **params) -> ApiResult:
+        return self.call('sendMessage', chat_id=chat_id, text=text, parse_mode=parse_mode, **params)
@@ -1,8 +1,14 @@
 import asyncio
 import logging
+import time
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
-from config import Config
+from config import Config, config_store
+from load_shedding import SignalMaxAge
+from metrics import LatencyHistogram
+from retry_engine import RetryEngine
+from suppression import suppressed_chats
+from admin_commands import suppressed_command, restore_command
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -12,13 +18,23 @@ logger = logging.getLogger(__name__)
 
 class TelegramBot:
     def __init__(self):
-        self.application = Application.builder().token(Config.BOT_TOKEN).build()
+        self.application = (
+            Application.builder()
+            .token(Config.BOT_TOKEN)
+            .base_url(f"{Config.TELEGRAM_API_BASE_URL.rstrip('/')}/bot")
+            .build()
+        )
+        self.retry_engine = RetryEngine.from_config()
+        self.max_age = SignalMaxAge()
+        self.signal_ages = LatencyHistogram()
         self.setup_handlers()
     
     def setup_handlers(self):
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
         self.application.add_handler(CommandHandler("status", self.status_command))
+        self.application.add_handler(CommandHandler("suppressed", suppressed_command))
+        self.application.add_handler(CommandHandler("restore", restore_command))
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(
@@ -40,29 +56,41 @@ class TelegramBot:
     
     async def status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.effective_chat.id
-        is_authorized = chat_id in Config.ALLOWED_CHAT_IDS if Config.ALLOWED_CHAT_IDS else True
+        filters = config_store.current()
+        is_authorized = filters.is_authorized(chat_id)
         
         status_text = f"""
 📊 Bot Status:
 Chat ID: {chat_id}
 Authorized: {'✅' if is_authorized else '❌'}
-Allowed Tokens: {len(Config.ALLOWED_TOKENS)} configured
-Allowed Strategies: {len(Config.ALLOWED_STRATEGIES)} configured
+Allowed Tokens: {len(filters.token_set)} configured
+Allowed Strategies: {len(filters.strategy_set)} configured
         """
         await update.message.reply_text(status_text)
     
     async def send_signal(self, signal_data: dict):
         """Send trading signal to all authorized chats"""
-        for chat_id in Config.ALLOWED_CHAT_IDS:
-            try:
-                await self.application.bot.send_message(
+        text = self.format_signal_message(signal_data)
+        born = signal_data.get('epoch')
+        for chat_id in suppressed_chats.filter(config_store.current().chat_ids):
+            if self.max_age.expired(born, signal_data.get('strategy'), signal_data.get('action')):
+                logger.warning(f"Signal {signal_data.get('token')} {signal_data.get('action')} expired, "
+                               f"not sending it to the remaining chats")
+                return
+            result = await self.retry_engine.run_async(
+                chat_id,
+                lambda chat_id=chat_id: self.application.bot.send_message(
                     chat_id=chat_id,
-                    text=self.format_signal_message(signal_data),
+                    text=text,
                     parse_mode='HTML'
                 )
+            )
+            if result.ok:
                 logger.info(f"Signal sent to chat {chat_id}")
-            except Exception as e:
-                logger.error(f"Failed to send signal to chat {chat_id}: {e}")
+                if born is not None:
+                    self.signal_ages.observe(max(time.time() - born, 0.0))
+            elif not suppressed_chats.record(result):
+                logger.error(f"Failed to send signal to chat {chat_id}: {result.outcome}")
     
     def format_signal_message(self, signal: dict) -> str:
         """Format trading signal for Telegram message"""
@@ -96,6 +124,12 @@ Allowed Strategies: {len(Config.ALLOWED_STRATEGIES)} configured
         logger.info("Starting bot with polling...")
         await self.application.run_polling()
     
+    async def start_webhook(self, bridge):
+        """Start the bot fed by updates that `bridge` receives over HTTP"""
+        from telegram_webhook import serve_webhook_updates
+        logger.info("Starting bot in webhook mode...")
+        await serve_webhook_updates(self.application, bridge)
+    
     def get_application(self):
         """Get the application instance for webhook setup"""
         return self.application
\ No newline at end of file
@@ -0,0 +1,102 @@
+import asyncio
+import hmac
+import logging
+from typing import Optional
+from flask import Flask, request, jsonify
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class TelegramUpdateBridge:
+    """
+    Hands updates received by our Flask server to a running Application
+
+    Flask handles requests on its own threads while the Application lives
+    on an asyncio loop, so updates are queued onto that loop thread-safely
+    and the HTTP request returns without waiting for the handlers.
+    """
+
+    def __init__(self, secret_token: Optional[str] = None):
+        self.secret_token = secret_token if secret_token is not None else Config.TELEGRAM_WEBHOOK_SECRET
+        self.application = None
+        self.loop = None
+
+    def bind(self, application, loop: asyncio.AbstractEventLoop):
+        self.application = application
+        self.loop = loop
+
+    @property
+    def ready(self) -> bool:
+        return self.application is not None and self.loop is not None and self.application.running
+
+    def verify(self, received_secret: Optional[str]) -> bool:
+        """Constant-time check of Telegram's secret token header; without a configured secret nothing passes"""
+        if not self.secret_token:
+            return False
+        return hmac.compare_digest((received_secret or "").encode(), self.secret_token.encode())
+
+    def feed(self, payload: dict):
+        """Queue one update for the Application's dispatcher"""
+        from telegram import Update
+        update = Update.de_json(payload, self.application.bot)
+        asyncio.run_coroutine_threadsafe(self.application.update_queue.put(update), self.loop)
+
+
+def register_update_route(app: Flask, bridge: TelegramUpdateBridge, path: Optional[str] = None):
+    """Serve Telegram updates on `path` of an existing Flask app"""
+    path = path or Config.TELEGRAM_WEBHOOK_PATH
+
+    def telegram_update():
+        """Receive updates pushed by Telegram"""
+        if not bridge.verify(request.headers.get(SECRET_HEADER)):
+            logger.warning("Telegram update with invalid secret token")
+            return jsonify({"error": "Invalid secret token"}), 403
+        if not bridge.ready:
+            # Telegram redelivers on non-2xx, so nothing is lost during startup
+            return jsonify({"error": "Bot not ready"}), 503
+
+        payload = request.get_json(silent=True)
+        if not payload:
+            return jsonify({"error": "Invalid update"}), 400
+
+        bridge.feed(payload)
+        return "", 200
+
+    app.add_url_rule(path, 'telegram_update', telegram_update, methods=['POST'])
+
+
+async def serve_webhook_updates(application, bridge: TelegramUpdateBridge,
+                                url: Optional[str] = None, allowed_updates=None):
+    """
+    Run `application` fed by webhook instead of `run_polling`
+
+    Registers the webhook with Telegram, then processes whatever the bridge
+    queues until the task is cancelled. Refuses to start without a secret
+    token, since anyone could otherwise post forged updates.
+    """
+    from telegram import Update
+
+    url = url or Config.TELEGRAM_WEBHOOK_URL
+    if not url:
+        raise ValueError("TELEGRAM_WEBHOOK_URL must be set for webhook mode")
+    if not bridge.secret_token:
+        raise ValueError("TELEGRAM_WEBHOOK_SECRET must be set for webhook mode")
+    if allowed_updates is None:
+        allowed_updates = Update.ALL_TYPES
+
+    async with application:
+        await application.bot.set_webhook(
+            url=url,
+            secret_token=bridge.secret_token,
+            allowed_updates=allowed_updates
+        )
+        await application.start()
+        bridge.bind(application, asyncio.get_running_loop())
+        logger.info(f"Receiving Telegram updates via webhook at {url}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await application.stop()
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+from config import Config, FilterConfig, config_store
+from delivery import DeliveryEngine
+from delivery_scheduler import DeliveryScheduler
+from load_shedding import ShedPolicy
+from retry_engine import RetryEngine
+from telegram_api import TelegramAPI
+from token_pool import TokenPool, bot_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+
+def hash_secret(secret) -> str:
+    return hashlib.sha256(str(secret or "").encode()).hexdigest()
+
+
+class Tenant:
+    """
+    One trading group: its webhook secret, filters, chats and delivery lane
+
+    A tenant with its own `rate` (and optionally its own bot token) gets a
+    separate DeliveryEngine, so its rate budget and breakers don't touch
+    other tenants, and a separate DeliveryScheduler, so its backlog never
+    delays anyone else's signals. Its budget is carved out of its bot's:
+    every message also takes a token from `bot_engine`'s bucket, and a
+    retry_after pause (bot-wide at Telegram) stops every tenant of that bot.
+    Without `filters` the tenant follows the hot-reloadable global config.
+    """
+
+    def __init__(self, name: str, secret_hash: Optional[str], filters: Optional[FilterConfig] = None,
+                 rate: Optional[float] = None, bot_token: Optional[str] = None,
+                 engine: Optional[DeliveryEngine] = None, scheduler: Optional[DeliveryScheduler] = None,
+                 bot_engine: Optional[RetryEngine] = None):
+        self.name = name
+        self.secret_hash = secret_hash
+        self._filters = filters
+        self.rate = rate
+        self.bot_token = bot_token
+        self.bot_engine = bot_engine
+        self._engine = engine
+        self._scheduler = scheduler
+        self._lock = threading.Lock()
+
+    @property
+    def filters(self) -> FilterConfig:
+        return self._filters if self._filters is not None else config_store.current()
+
+    @property
+    def engine(self) -> DeliveryEngine:
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    shared = {}
+                    if self.bot_engine is not None:
+                        shared = dict(bot_bucket=self.bot_engine.rate_limiter.global_bucket,
+                                      gate=self.bot_engine.gate)
+                    retry_engine = RetryEngine.from_config(bucket_prefix=f"tenant:{self.name}:",
+                                                           global_rate=self.rate, **shared)
+                    self._engine = DeliveryEngine(TelegramAPI(token=self.bot_token), retry_engine)
+        return self._engine
+
+    @property
+    def scheduler(self) -> DeliveryScheduler:
+        if self._scheduler is None:
+            engine = self.engine
+            with self._lock:
+                if self._scheduler is None:
+                    self._scheduler = DeliveryScheduler(engine, shedder=ShedPolicy(initial_rate=self.rate))
+        return self._scheduler
+
+    def stats(self) -> Dict:
+        return {
+            "filters": self.filters.summary(),
+            "rate": self.rate or Config.TELEGRAM_GLOBAL_RATE,
+            "own_bot": bool(self.bot_token),
+            "delivery": self._scheduler.stats() if self._scheduler else None
+        }
+
+
+class TenantRegistry:
+    """
+    Webhook secret -> tenant, one SHA-256 and one dict lookup per request
+
+    The default tenant stands for the single-group setup (WEBHOOK_SECRET
+    and the global filters). If WEBHOOK_SECRET is not set and it is the
+    only tenant, it is open: any secret lands there, as before. Once other
+    tenants are configured an unknown secret is always rejected.
+    """
+
+    def __init__(self, tenants: Iterable[Tenant] = (), default: Optional[Tenant] = None,
+                 bot_engines: Optional[Dict[str, RetryEngine]] = None):
+        self.default = default
+        self._by_hash: Dict[str, Tenant] = {}
+        self._by_name: Dict[str, Tenant] = {}
+        self._bot_engines: Dict[str, RetryEngine] = dict(bot_engines or {})
+        for tenant in ([default] if default else []) + list(tenants):
+            self.add(tenant)
+
+    def bot_engine(self, token: Optional[str]) -> RetryEngine:
+        """The retry engine whose bucket and gate every tenant sending from `token` shares"""
+        token = token or Config.BOT_TOKEN
+        engine = self._bot_engines.get(token)
+        if engine is None:
+            engine = self._bot_engines[token] = RetryEngine.from_config(bucket_prefix=f"bot{bot_id(token or '')}:")
+        return engine
+
+    def add(self, tenant: Tenant):
+        if tenant.name in self._by_name:
+            raise ValueError(f"Duplicate tenant {tenant.name!r}")
+        if tenant.secret_hash is not None:
+            owner = self._by_hash.get(tenant.secret_hash)
+            if owner is not None:
+                raise ValueError(f"Tenant {tenant.name!r} reuses the secret of {owner.name!r}")
+            self._by_hash[tenant.secret_hash] = tenant
+        if tenant._engine is None and tenant.bot_engine is None:
+            tenant.bot_engine = self.bot_engine(tenant.bot_token)
+        self._by_name[tenant.name] = tenant
+
+    def resolve(self, secret) -> Optional[Tenant]:
+        tenant = self._by_hash.get(hash_secret(secret))
+        if tenant is None and self.default is not None and self.default.secret_hash is None and len(self) == 1:
+            return self.default
+        return tenant
+
+    def get(self, name: str) -> Optional[Tenant]:
+        return self._by_name.get(name)
+
+    def __iter__(self):
+        return iter(self._by_name.values())
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def stats(self) -> Dict:
+        return {tenant.name: tenant.stats() for tenant in self}
+
+
+def load_tenants(path: str) -> List[Tenant]:
+    """
+    Tenants from a JSON file:
+
+        {"tenants": [{"name": "alpha", "secret_sha256": "...", "chat_ids": [-100123],
+                      "allowed_tokens": ["BTCUSDT"], "allowed_strategies": [], "rate": 10,
+                      "bot_token": "optional"}]}
+
+    `secret` (plain) is accepted too and hashed on load.
+    """
+    with open(path) as f:
+        raw = json.load(f)
+    tenants = []
+    for entry in raw.get("tenants", []):
+        name = entry["name"]
+        secret_hash = entry.get("secret_sha256") or (hash_secret(entry["secret"]) if entry.get("secret") else None)
+        if not secret_hash:
+            raise ValueError(f"Tenant {name!r} has no secret")
+        filters = FilterConfig(allowed_tokens=entry.get("allowed_tokens", ()),
+                               allowed_strategies=entry.get("allowed_strategies", ()),
+                               allowed_chat_ids=[int(chat_id) for chat_id in entry.get("chat_ids", ())])
+        rate = entry.get("rate")
+        tenants.append(Tenant(name, secret_hash.lower(), filters, float(rate) if rate else None,
+                              entry.get("bot_token")))
+    return tenants
+
+
+def build_registry(engine: Optional[DeliveryEngine] = None, scheduler: Optional[DeliveryScheduler] = None,
+                   path: Optional[str] = None) -> TenantRegistry:
+    """Default tenant on the given engine/scheduler plus the tenants in TENANTS_FILE"""
+    secret = Config.WEBHOOK_SECRET
+    secret_hash = hash_secret(secret) if secret and secret != "default_secret" else None
+    default = Tenant(DEFAULT_TENANT, secret_hash, engine=engine, scheduler=scheduler)
+    path = path if path is not None else Config.TENANTS_FILE
+    tenants = load_tenants(path) if path else []
+    if tenants:
+        logger.info(f"Loaded {len(tenants)} tenant(s) from {path}: {', '.join(t.name for t in tenants)}")
+        if secret_hash is None:
+            logger.warning("WEBHOOK_SECRET is not set: the default tenant accepts no webhooks while tenants exist")
+    # Tenants on BOT_TOKEN share the default engine's budget and retry_after gate
+    bot_engines = {}
+    if isinstance(engine, TokenPool):
+        bot_engines[Config.BOT_TOKEN] = engine.engines[engine.primary].retry_engine
+    elif engine is not None:
+        bot_engines[Config.BOT_TOKEN] = engine.retry_engine
+    return TenantRegistry(tenants, default, bot_engines)
@@ -0,0 +1,95 @@
+import pytest
+from channel_broadcast import MODE_CHANNEL, MODE_NOTIFY, ChannelBroadcaster, ChannelRoute, format_notice, \
+    parse_channel_routes, post_link
+from delivery import DeliveryEngine
+from delivery_scheduler import CLASS_SIGNAL, DeliveryScheduler
+from rate_limiter import TokenBucket
+from retry_engine import RetryEngine, RetryPolicy
+from suppression import SuppressionList
+from telegram_api import ApiResult
+from test_delivery_scheduler import drain
+
+
+@pytest.fixture
+def engine(api, tmp_path):
+    return DeliveryEngine(api, RetryEngine(policy=RetryPolicy(max_attempts=1), sleep=lambda s: None),
+                          SuppressionList(str(tmp_path / "suppressed.json")))
+
+
+@pytest.fixture
+def broadcaster(engine):
+    return ChannelBroadcaster(parse_channel_routes("EMA Cross + RSI=@signals:notify,*=-1001234567890"), engine)
+
+
+def submit_signal(broadcaster, scheduler, strategy, subscribers):
+    route = broadcaster.route(strategy)
+    post = broadcaster.poster(route, lambda link: format_notice("BTCUSDT", "BUY", "65000", strategy, link),
+                              subscribers, lambda chat_ids, notice: scheduler.submit(chat_ids, notice, CLASS_SIGNAL))
+    return scheduler.submit([route.target], "full signal", CLASS_SIGNAL, send=post)
+
+
+class TestRoutes:
+
+    def test_parse(self):
+        routes = parse_channel_routes("EMA Cross + RSI=@signals:notify, MACD=-100555,*=@all:bogus,junk")
+
+        assert routes["EMA CROSS + RSI"].target == "@signals" and routes["EMA CROSS + RSI"].mode == MODE_NOTIFY
+        assert routes["MACD"].target == -100555 and routes["MACD"].mode == MODE_CHANNEL
+        assert routes["*"].mode == MODE_CHANNEL
+
+    def test_route_per_strategy_with_fallback(self, broadcaster):
+        assert broadcaster.route("ema cross + rsi").target == "@signals"
+        assert broadcaster.route("MACD Strategy").target == -1001234567890
+        assert ChannelBroadcaster({}, broadcaster.engine).route("MACD Strategy") is None
+
+    def test_links(self):
+        assert post_link("@signals", 7) == "https://t.me/signals/7"
+        assert post_link(-1001234567890, 7) == "https://t.me/c/1234567890/7"
+        assert post_link(-4567, 7) is None
+        assert post_link("@signals", None) is None
+
+
+class TestChannelBroadcaster:
+
+    def test_channel_mode_costs_one_call(self, api, engine, broadcaster):
+        scheduler = DeliveryScheduler(engine, senders=0)
+        submit_signal(broadcaster, scheduler, "MACD Strategy", range(1, 101))
+        drain(scheduler)
+
+        assert api.calls == [('sendMessage', -1001234567890, "full signal")]
+        assert broadcaster.stats()["posted"] == 1
+
+    def test_notify_mode_links_the_post(self, api, engine, broadcaster):
+        scheduler = DeliveryScheduler(engine, senders=0)
+        submit_signal(broadcaster, scheduler, "EMA Cross + RSI", [1, 2])
+        drain(scheduler)
+
+        assert api.calls[0] == ('sendMessage', "@signals", "full signal")
+        notices = [text for _, chat_id, text in api.calls[1:]]
+        assert len(notices) == 2
+        assert all('href="https://t.me/signals/101"' in text and "BUY BTCUSDT" in text for text in notices)
+        assert broadcaster.stats()["notices"] == 2
+
+    def test_failed_post_sends_the_signal_directly(self, engine):
+        submitted = []
+        broadcaster = ChannelBroadcaster({"*": ChannelRoute("@signals", MODE_NOTIFY)}, engine)
+        engine.api.send_message = lambda chat_id, text, **params: ApiResult(False, 500, "Internal Server Error")
+        post = broadcaster.poster(broadcaster.route("EMA"), lambda link: "notice", [1, 2],
+                                  lambda chat_ids, text: submitted.append((chat_ids, text)))
+
+        assert not post("@signals", "full signal").ok
+        # No notice linking to a post that does not exist, the full signal instead
+        assert submitted == [([1, 2], "full signal")]
+        assert broadcaster.stats()["failed"] == 1 and broadcaster.stats()["fallbacks"] == 2
+
+    def test_suppressed_channel_falls_back_to_direct(self, engine, broadcaster):
+        engine.suppression.suppress(-1001234567890, "kicked")
+        assert broadcaster.route("MACD Strategy") is None
+
+    def test_posts_spend_the_bots_budget(self, api):
+        bot_bucket = TokenBucket(rate=30, capacity=30)
+        broadcaster = ChannelBroadcaster({}, bot_bucket=bot_bucket)
+        broadcaster.engine.api = api
+
+        assert broadcaster.post("@signals", "full signal").ok
+        assert bot_bucket.available == pytest.approx(29, abs=0.1)
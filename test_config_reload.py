@@ -0,0 +1,102 @@
+import threading
+import pytest
+from flask import Flask
+from admin_commands import register_reload_route
+from config import Config, ConfigStore, FilterConfig
+
+
+@pytest.fixture
+def env_file(tmp_path):
+    path = tmp_path / ".env"
+    path.write_text("ALLOWED_TOKENS=BTCUSD, ethusd\nALLOWED_CHAT_IDS=1,2,2\n")
+    return path
+
+
+@pytest.fixture(autouse=True)
+def restore_config():
+    saved = {k: getattr(Config, k) for k in ("ALLOWED_TOKENS", "ALLOWED_STRATEGIES", "ALLOWED_CHAT_IDS",
+                                             "ADMIN_CHAT_IDS", "ADMIN_TOKEN")}
+    yield
+    for key, value in saved.items():
+        setattr(Config, key, value)
+
+
+class TestFilterConfig:
+
+    def test_compiled_lookups(self):
+        filters = FilterConfig(allowed_tokens=["BTCUSD", " ethusd ", ""], allowed_chat_ids=[5, 5, 6])
+        assert filters.allows_token("btcusd") and filters.allows_token("ETHUSD")
+        assert not filters.allows_token("ADAUSD")
+        assert filters.allows_strategy("anything")
+        assert filters.chat_ids == (5, 6)
+        assert filters.is_authorized(5) and not filters.is_authorized(7)
+
+
+class TestConfigStore:
+
+    def test_reload_reads_file_and_swaps(self, env_file):
+        store = ConfigStore(FilterConfig(), path=str(env_file))
+        old = store.current()
+
+        new = store.reload()
+        assert store.current() is new
+        assert new.version == old.version + 1
+        assert new.token_set == {"BTCUSD", "ETHUSD"}
+        assert new.chat_ids == (1, 2)
+        assert old.token_set == frozenset()  # readers holding the old snapshot are unaffected
+        assert Config.ALLOWED_CHAT_IDS == [1, 2]
+
+    def test_environment_wins_over_the_file_like_at_start(self, env_file, monkeypatch):
+        monkeypatch.setenv("ALLOWED_TOKENS", "SOLUSD")
+        store = ConfigStore(FilterConfig(), path=str(env_file))
+
+        new = store.reload()
+        assert new.token_set == {"SOLUSD"}
+        assert new.chat_ids == (1, 2)
+
+    def test_overrides_win_and_bad_values_keep_old_config(self, env_file):
+        store = ConfigStore(FilterConfig(), path=str(env_file))
+        assert store.reload({"ALLOWED_CHAT_IDS": "9", "BOT_TOKEN": "ignored"}).chat_ids == (9,)
+
+        current = store.current()
+        with pytest.raises(ValueError):
+            store.reload({"ALLOWED_CHAT_IDS": "not-a-number"})
+        assert store.current() is current
+
+    def test_readers_never_see_a_mix(self):
+        store = ConfigStore(FilterConfig(allowed_tokens=["A"], allowed_chat_ids=[1]))
+        mixed = []
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                snapshot = store.current()
+                if (snapshot.token_set == {"A"}) != (snapshot.chat_ids == (1,)):
+                    mixed.append(snapshot.version)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for i in range(200):
+            store.reload({"ALLOWED_TOKENS": "A" if i % 2 else "B", "ALLOWED_CHAT_IDS": "1" if i % 2 else "2"})
+        stop.set()
+        reader.join()
+        assert mixed == []
+
+
+class TestReloadRoute:
+
+    def test_requires_admin_token(self):
+        Config.ADMIN_TOKEN = "s3cret"
+        store = ConfigStore(FilterConfig())
+        app = Flask(__name__)
+        register_reload_route(app, store)
+        client = app.test_client()
+
+        assert client.post('/admin/reload', json={"ALLOWED_TOKENS": "BTCUSD"}).status_code == 401
+        assert store.current().version == 0
+
+        response = client.post('/admin/reload', json={"ALLOWED_TOKENS": "BTCUSD"},
+                               headers={'X-Admin-Token': 's3cret'})
+        assert response.status_code == 200
+        assert response.get_json()["config"]["allowed_tokens"] == 1
+        assert store.current().token_set == {"BTCUSD"}
@@ -0,0 +1,116 @@
+import threading
+import pytest
+from delivery_scheduler import CLASS_PRICE, CLASS_SIGNAL, DeliveryScheduler
+from metrics import LatencyHistogram
+from retry_engine import DeliveryResult
+from telegram_api import OUTCOME_OK
+
+
+class RecordingEngine:
+    """Stands in for DeliveryEngine, remembers what was sent in which order"""
+
+    def __init__(self, fail_chats=()):
+        self.sent = []
+        self.fail_chats = set(fail_chats)
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id, text, parse_mode='HTML'):
+        with self.lock:
+            self.sent.append((chat_id, text))
+        return DeliveryResult(chat_id, "transient" if chat_id in self.fail_chats else OUTCOME_OK, 1)
+
+
+@pytest.fixture
+def scheduler(clock):
+    # No sender threads: tests drive next_job/deliver themselves
+    return DeliveryScheduler(RecordingEngine(), weights={CLASS_SIGNAL: 0.75, CLASS_PRICE: 0.25}, senders=0,
+                             clock=clock)
+
+
+def drain(scheduler, count=None):
+    order = []
+    while count is None or len(order) < count:
+        job = scheduler.next_job(timeout=0)
+        if job is None:
+            break
+        scheduler.deliver(job)
+        order.append((job.message_class, job.chat_id))
+    return order
+
+
+class TestDeliveryScheduler:
+
+    def test_signal_jumps_a_price_backlog(self, scheduler):
+        scheduler.submit(range(100), "price", CLASS_PRICE)
+        drain(scheduler, 3)
+        scheduler.submit([7, 8], "BUY", CLASS_SIGNAL)
+
+        assert drain(scheduler, 2) == [(CLASS_SIGNAL, 7), (CLASS_SIGNAL, 8)]
+        assert scheduler.queued(CLASS_PRICE) == 97
+
+    def test_backlogged_price_keeps_its_share(self, scheduler):
+        scheduler.submit(range(1000), "price", CLASS_PRICE)
+        scheduler.submit(range(1000), "signal", CLASS_SIGNAL)
+
+        first = drain(scheduler, 400)
+        prices = sum(1 for message_class, _ in first if message_class == CLASS_PRICE)
+        assert 95 <= prices <= 105
+        # FIFO within a class
+        assert [chat for message_class, chat in first if message_class == CLASS_PRICE] == list(range(prices))
+
+    def test_idle_class_does_not_bank_credit(self, scheduler):
+        scheduler.submit(range(300), "signal", CLASS_SIGNAL)
+        drain(scheduler, 300)
+        scheduler.submit(range(40), "price", CLASS_PRICE)
+        scheduler.submit(range(40), "signal", CLASS_SIGNAL)
+
+        first = drain(scheduler, 20)
+        assert sum(1 for message_class, _ in first if message_class == CLASS_PRICE) <= 6
+
+    def test_queue_delay_and_counts_per_class(self, scheduler, clock):
+        scheduler.engine.fail_chats = {2}
+        scheduler.submit([1, 2], "price", CLASS_PRICE)
+        clock.now += 0.5
+        scheduler.submit([3], "BUY", CLASS_SIGNAL)
+        clock.now += 0.25
+        drain(scheduler)
+
+        stats = scheduler.stats()
+        assert stats[CLASS_SIGNAL]["sent"] == 1
+        assert stats[CLASS_PRICE]["sent"] == 1 and stats[CLASS_PRICE]["failed"] == 1
+        assert stats[CLASS_SIGNAL]["queue_delay"]["max_ms"] == 250.0
+        assert stats[CLASS_PRICE]["queue_delay"]["max_ms"] == 750.0
+
+    def test_unknown_class_is_rejected(self, scheduler):
+        with pytest.raises(ValueError):
+            scheduler.submit([1], "text", "gossip")
+
+    def test_sender_threads_deliver_everything(self):
+        engine = RecordingEngine()
+        scheduler = DeliveryScheduler(engine, weights={CLASS_SIGNAL: 0.9, CLASS_PRICE: 0.1}, senders=3)
+        scheduler.submit(range(200), "price", CLASS_PRICE)
+        scheduler.submit(range(50), "BUY", CLASS_SIGNAL)
+
+        assert scheduler.wait_idle(timeout=5)
+        scheduler.close()
+        assert len(engine.sent) == 250
+        assert scheduler.queued() == 0
+
+
+class TestLatencyHistogram:
+
+    def test_percentiles_within_a_bucket(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.observe(ms / 1000)
+
+        assert histogram.count == 100
+        assert 0.050 <= histogram.percentile(50) <= 0.050 * 1.2
+        assert 0.099 <= histogram.percentile(99) <= 0.100
+        assert histogram.summary()["max_ms"] == 100.0
+
+    def test_empty_and_overflow(self):
+        histogram = LatencyHistogram(largest=1.0)
+        assert histogram.summary()["p99_ms"] == 0.0
+        histogram.observe(5.0)
+        assert histogram.percentile(100) == 5.0
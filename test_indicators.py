@@ -0,0 +1,191 @@
+import math
+import random
+import pytest
+from indicators import (Bar, EMA, MACD, RSI, SMA, IndicatorEngine, MaCrossStrategy, RollingExtreme, format_price)
+from signal_processor import SignalProcessor
+
+
+# Naive full-series versions of the Pine built-ins (None = na)
+
+def naive_sma(xs, n):
+    out = []
+    for i in range(len(xs)):
+        window = [x for x in xs[max(0, i - n + 1):i + 1] if x is not None]
+        out.append(sum(window) / n if i >= n - 1 and len(window) == n else None)
+    return out
+
+
+def naive_ema(xs, n, alpha=None):
+    alpha = alpha if alpha is not None else 2 / (n + 1)
+    defined = [x for x in xs if x is not None]
+    out, value, seen = [], None, 0
+    for x in xs:
+        if x is not None:
+            seen += 1
+            if value is None:
+                value = sum(defined[:n]) / n if seen == n else None
+            else:
+                value = alpha * x + (1 - alpha) * value
+        out.append(value)
+    return out
+
+
+def naive_rsi(xs, n):
+    ups = [None] + [max(b - a, 0) for a, b in zip(xs, xs[1:])]
+    downs = [None] + [max(a - b, 0) for a, b in zip(xs, xs[1:])]
+    out = []
+    for up, down in zip(naive_ema(ups, n, 1 / n), naive_ema(downs, n, 1 / n)):
+        if up is None or down is None:
+            out.append(None)
+        else:
+            out.append(100 if down == 0 else 0 if up == 0 else 100 - 100 / (1 + up / down))
+    return out
+
+
+def naive_extreme(xs, n, fn):
+    return [fn(xs[i - n + 1:i + 1]) if i >= n - 1 else None for i in range(len(xs))]
+
+
+def crossover(a, b, i):
+    return i > 0 and None not in (a[i], b[i], a[i - 1], b[i - 1]) and a[i] > b[i] and a[i - 1] <= b[i - 1]
+
+
+def crossunder(a, b, i):
+    return i > 0 and None not in (a[i], b[i], a[i - 1], b[i - 1]) and a[i] < b[i] and a[i - 1] >= b[i - 1]
+
+
+def lt(a, b):
+    return a is not None and b is not None and a < b
+
+
+def gt(a, b):
+    return a is not None and b is not None and a > b
+
+
+def naive_signals(bars):
+    """Every (bar index, strategy, action) the Pine scripts would alert on"""
+    close = [b.close for b in bars]
+    high = [b.high for b in bars]
+    low = [b.low for b in bars]
+    fast, slow, rsi = naive_ema(close, 9), naive_ema(close, 21), naive_rsi(close, 14)
+    macd = [f - s if f is not None and s is not None else None
+            for f, s in zip(naive_ema(close, 12), naive_ema(close, 26))]
+    macd_signal = naive_ema(macd, 9)
+    resistance = naive_extreme(high, 20, max)
+    support = naive_extreme(low, 20, min)
+    fast_ma, slow_ma = naive_sma(close, 9), naive_sma(close, 21)
+    buy_level, sell_level = [30] * len(bars), [70] * len(bars)
+
+    out = []
+    for i in range(len(bars)):
+        rules = [
+            ("EMA Cross + RSI", crossover(fast, slow, i) and lt(rsi[i], 70),
+             crossunder(fast, slow, i) and gt(rsi[i], 30)),
+            ("EMA Cross", crossover(fast, slow, i), crossunder(fast, slow, i)),
+            ("RSI Levels", crossover(rsi, buy_level, i), crossunder(rsi, sell_level, i)),
+            ("MACD", crossover(macd, macd_signal, i) and macd[i] < 0,
+             crossunder(macd, macd_signal, i) and macd[i] > 0),
+            ("Support/Resistance",
+             i > 0 and gt(close[i], resistance[i - 1]) and close[i - 1] <= resistance[i - 1],
+             i > 0 and lt(close[i], support[i - 1]) and close[i - 1] >= support[i - 1]),
+            ("Custom Strategy", crossover(fast_ma, slow_ma, i) and lt(rsi[i], 70),
+             crossunder(fast_ma, slow_ma, i) and gt(rsi[i], 30)),
+        ]
+        for name, buy, sell in rules:
+            if buy:
+                out.append((i, name, "BUY"))
+            elif sell:
+                out.append((i, name, "SELL"))
+    return out
+
+
+def random_bars(count, seed):
+    rng = random.Random(seed)
+    bars, price = [], 100.0
+    for i in range(count):
+        open_ = price
+        price = max(1.0, price * (1 + rng.gauss(0, 0.01)))
+        high = max(open_, price) * (1 + abs(rng.gauss(0, 0.003)))
+        low = min(open_, price) * (1 - abs(rng.gauss(0, 0.003)))
+        bars.append(Bar(1700000000 + 60 * i, open_, high, low, price))
+    return bars
+
+
+def close_enough(a, b):
+    return (a is None and b is None) or (a is not None and b is not None and math.isclose(a, b, abs_tol=1e-9))
+
+
+@pytest.fixture
+def bars():
+    return random_bars(600, seed=7)
+
+
+class TestIndicators:
+
+    def test_moving_averages_match_reference(self, bars):
+        close = [b.close for b in bars]
+        sma, ema, rsi = SMA(21), EMA(21), RSI(14)
+        streamed = [(sma.update(x), ema.update(x), rsi.update(x)) for x in close]
+
+        for (s, e, r), ns, ne, nr in zip(streamed, naive_sma(close, 21), naive_ema(close, 21), naive_rsi(close, 14)):
+            assert close_enough(s, ns)
+            assert close_enough(e, ne)
+            assert close_enough(r, nr)
+
+    def test_warm_up_is_na(self):
+        ema, rsi, macd = EMA(3), RSI(3), MACD(2, 3, 2)
+        assert [ema.update(x) for x in (1, 2, 3)] == [None, None, 2.0]
+        assert [rsi.update(x) for x in (1, 2, 3)] == [None, None, None]
+        assert rsi.update(4) == 100.0
+        assert macd.update(1.0) == (None, None)
+        assert macd.update(2.0)[0] is None
+        assert macd.update(3.0)[1] is None
+        assert macd.update(4.0)[1] is not None
+
+    def test_rolling_extremes_match_reference(self, bars):
+        highs = [b.high for b in bars]
+        highest, lowest = RollingExtreme(20, highest=True), RollingExtreme(20, highest=False)
+
+        assert [highest.update(x) for x in highs] == naive_extreme(highs, 20, max)
+        assert [lowest.update(x) for x in highs] == naive_extreme(highs, 20, min)
+
+
+class TestIndicatorEngine:
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_signals_match_pine_reference(self, seed):
+        bars = random_bars(800, seed)
+        engine = IndicatorEngine()
+        streamed = [(i, s['strategy'], s['action']) for i, bar in enumerate(bars)
+                    for s in engine.update("BINANCE:BTCUSDT", bar)]
+
+        expected = naive_signals(bars)
+        assert streamed == expected
+        assert {name for _, name, _ in expected} == {"EMA Cross + RSI", "EMA Cross", "RSI Levels", "MACD",
+                                                     "Support/Resistance", "Custom Strategy"}
+
+    def test_signals_are_parse_signal_output(self, bars):
+        engine = IndicatorEngine(exchange="BINANCE", timeframe="15")
+        processor = SignalProcessor(telegram_bot=object())
+        signals = [s for bar in bars for s in engine.update("BTCUSDT", bar)]
+
+        assert signals
+        for signal in signals:
+            assert processor.parse_signal(signal) == {**signal, 'epoch': int(signal['timestamp']) / 1000}
+        cross = next(s for s in signals if s['strategy'] == "EMA Cross")
+        assert cross['message'] == f"{cross['action'].capitalize()} signal triggered on 15 timeframe"
+        assert cross['token'] == "BTCUSDT"
+
+    def test_symbols_are_independent(self, bars):
+        engine = IndicatorEngine(strategies=[lambda: MaCrossStrategy("Fast", fast=2, slow=3, use_rsi_filter=False)])
+        together = [s['action'] for bar in bars for s in engine.update("AAA", bar) + engine.update("BBB", bar)]
+        single = IndicatorEngine(engine.factories)
+        alone = [s['action'] for bar in bars for s in single.update("AAA", bar)]
+
+        assert together == [a for a in alone for _ in range(2)]
+        assert engine.symbols() == ["AAA", "BBB"]
+
+    def test_price_formatting_follows_pine(self):
+        assert format_price(45000.0, 2) == "45000"
+        assert format_price(0.123456, 2) == "0.12"
+        assert format_price(3000.5) == "3000.5"
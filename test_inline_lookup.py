@@ -0,0 +1,112 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from config import ConfigStore, FilterConfig
+from inline_lookup import KIND_STRATEGY, KIND_SYMBOL, InlineLookup, PrefixIndex
+from signal_history import SignalHistory
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def lookup():
+    lookup = InlineLookup(max_results=10, clock=lambda: NOW)
+    lookup.observe("BINANCE:ETHUSDT", "BUY", "EMA Cross + RSI", "3500", ts=NOW - 120)
+    lookup.observe("ETHBTC", "SELL", "MACD Strategy", "0.05", ts=NOW - 60)
+    lookup.observe("ETHUSDT", "PRICE_UPDATE", "Price Feed", "3510", ts=NOW - 5)
+    lookup.observe("BTCUSDT", "PRICE_UPDATE", "Price Feed", "65000", ts=NOW - 5)
+    return lookup
+
+
+class TestPrefixIndex:
+
+    def test_prefix_and_word_matches(self):
+        index = PrefixIndex()
+        for symbol in ("ETHUSDT", "ETH", "ETCUSDT", "BTCUSDT"):
+            index.add(symbol, KIND_SYMBOL)
+        index.add("EMA Cross + RSI", KIND_STRATEGY)
+
+        assert index.search("eth", 10) == [(KIND_SYMBOL, "ETH"), (KIND_SYMBOL, "ETHUSDT")]
+        assert index.search("rsi", 10) == [(KIND_STRATEGY, "EMA Cross + RSI")]
+        assert index.search("E", 2) == [(KIND_STRATEGY, "EMA Cross + RSI"), (KIND_SYMBOL, "ETCUSDT")]
+        assert index.search("XRP", 10) == []
+
+    def test_thousands_of_symbols(self):
+        index = PrefixIndex()
+        for i in range(20000):
+            index.add(f"SYM{i:05d}USDT", KIND_SYMBOL)
+
+        started = time.perf_counter()
+        for _ in range(100):
+            found = index.search("SYM123", 20)
+        assert (time.perf_counter() - started) / 100 < 0.005
+        assert len(found) == 20 and found[0] == (KIND_SYMBOL, "SYM12300USDT")
+
+
+class TestInlineLookup:
+
+    def test_symbol_result_has_latest_signal_and_price(self, lookup):
+        results = lookup.answer("ethu")
+
+        assert [result["id"] for result in results] == ["symbol:ETHUSDT"]
+        assert results[0]["title"] == "📊 ETHUSDT $3510"
+        assert "BUY" in results[0]["description"] and "EMA Cross + RSI" in results[0]["description"]
+        assert "Price: $3510 (5s ago)" in results[0]["text"]
+
+    def test_strategies_are_found_by_any_word(self, lookup):
+        ids = [result["id"] for result in lookup.answer("macd")]
+        assert ids == ["strategy:MACD Strategy"]
+        assert "BUY ETHUSDT" in lookup.answer("cross")[0]["text"]
+        # Price feeds are not strategies
+        assert lookup.answer("price") == []
+
+    def test_empty_query_lists_recent_symbols(self, lookup):
+        assert [result["id"] for result in lookup.answer("")] == ["symbol:ETHBTC", "symbol:ETHUSDT"]
+
+    def test_answers_are_cached_until_something_changes(self, lookup):
+        first = lookup.answer("ETH")
+        assert lookup.answer("eth ") is first
+
+        lookup.observe("ETHUSDT", "SELL", "EMA Cross + RSI", "3400")
+        second = lookup.answer("ETH")
+        assert second is not first
+        assert "SELL" in [result for result in second if result["id"] == "symbol:ETHUSDT"][0]["description"]
+
+    def test_seeded_from_history(self):
+        history = SignalHistory(clock=lambda: NOW)
+        history.record("SOLUSDT", "BUY", "Support/Resistance", "150", ts=NOW - 30)
+        history.record("SOLUSDT", "PRICE_UPDATE", "", "155", ts=NOW - 10)
+        lookup = InlineLookup(clock=lambda: NOW)
+        lookup.load(history)
+
+        result = lookup.answer("sol")[0]
+        assert result["title"] == "📊 SOLUSDT $155.0"
+        assert "Support/Resistance" in result["description"]
+        assert lookup.answer("support")[0]["id"] == "strategy:Support/Resistance"
+
+
+class FakeInlineQuery:
+    def __init__(self, user_id, query):
+        self.from_user = SimpleNamespace(id=user_id)
+        self.query = query
+        self.answers = []
+
+    async def answer(self, results, **kwargs):
+        self.answers.append((results, kwargs))
+
+
+class TestInlineQueryHandler:
+
+    def test_only_allowed_users_get_answers(self, lookup, monkeypatch):
+        import combined_bot
+        monkeypatch.setattr(combined_bot, "inline_lookup", lookup)
+        monkeypatch.setattr(combined_bot, "config_store", ConfigStore(FilterConfig(allowed_chat_ids=[5])))
+
+        allowed, stranger = FakeInlineQuery(5, "eth"), FakeInlineQuery(7, "eth")
+        for query in (allowed, stranger):
+            asyncio.run(combined_bot.inline_query(SimpleNamespace(inline_query=query), None))
+
+        (results, kwargs), = allowed.answers
+        assert [result.id for result in results] == ["symbol:ETHBTC", "symbol:ETHUSDT"] and kwargs["is_personal"]
+        assert stranger.answers == [([], {"cache_time": kwargs["cache_time"], "is_personal": True})]
@@ -0,0 +1,88 @@
+import pytest
+from delivery import DeliveryEngine
+from delivery_scheduler import CLASS_PRICE, DeliveryScheduler
+from live_ticker import LiveTicker, render_ticker
+from retry_engine import RetryEngine, RetryPolicy
+from suppression import SuppressionList
+from telegram_api import ApiResult
+
+
+@pytest.fixture
+def make_ticker(api, tmp_path):
+    engine = DeliveryEngine(api, RetryEngine(policy=RetryPolicy(max_attempts=1), sleep=lambda s: None),
+                            SuppressionList(str(tmp_path / "suppressed.json")))
+
+    def factory():
+        return LiveTicker(engine, str(tmp_path / "tickers.json"))
+    return factory
+
+
+class TestLiveTicker:
+
+    def test_first_update_sends_and_pins(self, api, make_ticker):
+        ticker = make_ticker()
+        ticker.publish([1], "BTCUSDT", "65000")
+
+        assert ticker.sync(1, "BTCUSDT").ok
+        assert api.methods() == ['sendMessage', 'pinChatMessage']
+        assert ticker.stats()["tickers"] == 1
+
+    def test_only_changed_text_is_edited(self, api, make_ticker):
+        ticker = make_ticker()
+        ticker.publish([1], "BTCUSDT", "65000")
+        ticker.sync(1, "BTCUSDT")
+        assert ticker.sync(1, "BTCUSDT").attempts == 0
+
+        ticker.publish([1], "BTCUSDT", "65100")
+        ticker.sync(1, "BTCUSDT")
+        assert api.methods() == ['sendMessage', 'pinChatMessage', 'editMessageText']
+        assert api.calls[-1][2] == render_ticker("BTCUSDT", "65100", 65000.0)
+        assert ticker.stats()["unchanged"] == 1
+
+    def test_not_modified_counts_as_applied(self, api, make_ticker):
+        ticker = make_ticker()
+        ticker.publish([1], "ETHUSDT", "3000")
+        ticker.sync(1, "ETHUSDT")
+        api.edit_response = ApiResult(False, 400, "Bad Request: message is not modified")
+
+        ticker.publish([1], "ETHUSDT", "3001")
+        assert ticker.sync(1, "ETHUSDT").ok
+        assert ticker.sync(1, "ETHUSDT").attempts == 0
+
+    def test_deleted_ticker_is_sent_again(self, api, make_ticker):
+        ticker = make_ticker()
+        ticker.publish([1], "BTCUSDT", "65000")
+        ticker.sync(1, "BTCUSDT")
+        api.edit_response = ApiResult(False, 400, "Bad Request: message to edit not found")
+
+        ticker.publish([1], "BTCUSDT", "64000")
+        assert ticker.sync(1, "BTCUSDT").ok
+        assert api.methods()[2:] == ['editMessageText', 'sendMessage', 'pinChatMessage']
+
+    def test_queued_updates_coalesce(self, api, make_ticker):
+        ticker = make_ticker()
+        scheduler = DeliveryScheduler(weights={CLASS_PRICE: 1.0}, senders=0)
+        for price in ("100", "101", "102"):
+            ticker.publish([1, 2], "SOLUSDT", price)
+            scheduler.submit([1, 2], "", CLASS_PRICE, send=ticker.syncer("SOLUSDT"))
+
+        while scheduler.queued():
+            scheduler.deliver(scheduler.next_job(timeout=0))
+
+        sends = [call for call in api.calls if call[0] == 'sendMessage']
+        assert len(sends) == 2
+        assert all("$102.00" in call[2] for call in sends)
+        assert ticker.stats()["unchanged"] == 4
+
+    def test_message_ids_survive_restart(self, api, make_ticker):
+        ticker = make_ticker()
+        ticker.publish([1], "BTCUSDT", "65000")
+        ticker.sync(1, "BTCUSDT")
+
+        restarted = make_ticker()
+        restarted.publish([1], "BTCUSDT", "65500")
+        restarted.sync(1, "BTCUSDT")
+        assert api.methods()[-1] == 'editMessageText'
+
+        restarted.forget_chat(1)
+        assert make_ticker().stats()["tickers"] == 0
@@ -0,0 +1,128 @@
+import pytest
+from delivery_scheduler import CLASS_PRICE, CLASS_SIGNAL, DeliveryScheduler
+from load_shedding import LEVEL_NORMAL, LEVEL_PRICE, LEVEL_SIGNAL, SHED_EXPIRED, SHED_STALE, SHED_SUPERSEDED, \
+    ShedPolicy, SignalMaxAge, parse_budgets, parse_max_ages
+from test_delivery_scheduler import RecordingEngine, drain
+
+NOW = 1_700_000_000.0
+
+
+class SlowEngine(RecordingEngine):
+    """Every send takes 0.1s on the fake clock, so the measured rate stays 10 msg/s"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def send_message(self, chat_id, text, parse_mode='HTML'):
+        self.clock.now += 0.1
+        return super().send_message(chat_id, text, parse_mode)
+
+
+@pytest.fixture
+def make_scheduler(clock):
+    def factory(price_after=5):
+        # 10 msg/s: 50 queued jobs are 5s of backlog
+        policy = ShedPolicy(price_after=price_after, signal_after=30, freshness={"EMA Cross + RSI": 60},
+                            default_freshness=300, initial_rate=10, wall_clock=lambda: NOW)
+        scheduler = DeliveryScheduler(SlowEngine(clock), weights={CLASS_SIGNAL: 0.9, CLASS_PRICE: 0.1},
+                                      senders=0, clock=clock, shedder=policy)
+        return scheduler, policy
+    return factory
+
+
+class TestShedPolicy:
+
+    def test_levels_follow_the_backlog_in_seconds(self, make_scheduler):
+        _, policy = make_scheduler()
+        assert policy.update(40) == LEVEL_NORMAL
+        assert policy.update(100) == LEVEL_PRICE
+        assert policy.update(400) == LEVEL_SIGNAL
+
+        # Sends got slow (rate limiter waits): the same queue is a longer backlog
+        policy.update(0)
+        for _ in range(100):
+            policy.record_send(1.0)
+        assert policy.rate == pytest.approx(1.0, rel=0.2)
+        assert policy.update(40) == LEVEL_SIGNAL
+
+    def test_budgets_per_strategy(self):
+        assert parse_budgets("EMA Cross + RSI=120, Support/Resistance=600,junk") == {
+            "EMA CROSS + RSI": 120.0, "SUPPORT/RESISTANCE": 600.0}
+
+
+class TestSignalMaxAge:
+
+    def test_most_specific_limit_wins(self):
+        max_age = SignalMaxAge(parse_max_ages("EMA Cross + RSI:BUY=60,EMA Cross + RSI=300,*:SELL=120,"
+                                              "Support/Resistance=600"), default=900)
+
+        assert max_age.lookup("EMA Cross + RSI", "buy") == 60
+        assert max_age.lookup("EMA Cross + RSI", "SELL") == 300
+        assert max_age.lookup("MACD Strategy", "SELL") == 120
+        assert max_age.lookup("Support/Resistance", "SELL") == 600
+        assert max_age.lookup("MACD Strategy", "BUY") == 900
+
+    def test_expired(self):
+        max_age = SignalMaxAge({("*", "BUY"): 600}, default=0)
+
+        assert max_age.expired(NOW - 601, "EMA", "BUY", now=NOW)
+        assert not max_age.expired(NOW - 599, "EMA", "BUY", now=NOW)
+        assert not max_age.expired(NOW - 10_000, "EMA", "SELL", now=NOW)
+        assert not max_age.expired(None, "EMA", "BUY", now=NOW)
+
+
+class TestShedding:
+
+    def test_nothing_is_shed_without_a_backlog(self, make_scheduler):
+        scheduler, _ = make_scheduler()
+        for price in range(3):
+            scheduler.submit([1], f"BTC {price}", CLASS_PRICE, key="BTCUSDT")
+
+        assert len(drain(scheduler)) == 3
+        assert scheduler.engine.sent[-1] == (1, "BTC 2")
+
+    def test_superseded_price_updates_are_dropped(self, make_scheduler):
+        scheduler, policy = make_scheduler(price_after=0)
+        for price in range(10):
+            scheduler.submit(range(10), f"BTC {price}", CLASS_PRICE, key="BTCUSDT")
+        scheduler.submit(range(10), "ETH", CLASS_PRICE, key="ETHUSDT")
+
+        drain(scheduler)
+        sent = scheduler.engine.sent
+        assert sorted(chat for chat, text in sent if text.startswith("BTC")) == list(range(10))
+        assert all(text in ("BTC 9", "ETH") for _, text in sent)
+        assert scheduler.stats()[CLASS_PRICE]["shed"] == 90
+        assert policy.counts[SHED_SUPERSEDED] == 90
+        assert scheduler.wait_idle(timeout=0)
+
+    def test_stale_signals_shed_only_in_overload(self, make_scheduler):
+        scheduler, policy = make_scheduler()
+        scheduler.submit(range(200), "old EMA", CLASS_SIGNAL, born=NOW - 120, strategy="EMA Cross + RSI")
+        scheduler.submit(range(200), "old SR", CLASS_SIGNAL, born=NOW - 120, strategy="Support/Resistance")
+        drain(scheduler)
+
+        texts = [text for _, text in scheduler.engine.sent]
+        assert texts.count("old SR") == 200
+        # Shed while the backlog was over 30s, sent once it fell under
+        assert 0 < texts.count("old EMA") < 200
+        assert policy.counts[SHED_STALE] == 200 - texts.count("old EMA")
+        assert policy.trace[-1]["reason"] == SHED_STALE
+        assert policy.trace[-1]["age_s"] == 120
+
+    def test_expired_signals_are_dropped_without_a_backlog(self, make_scheduler):
+        scheduler, policy = make_scheduler()
+        scheduler.wall_clock = lambda: NOW
+        scheduler.submit([1, 2], "replayed BUY", CLASS_SIGNAL, born=NOW - 600, strategy="EMA", max_age=300)
+        scheduler.submit([1, 2], "fresh BUY", CLASS_SIGNAL, born=NOW - 5, strategy="EMA", max_age=300)
+        scheduler.submit([1], "no timestamp", CLASS_SIGNAL, max_age=300)
+        drain(scheduler)
+
+        assert [text for _, text in scheduler.engine.sent] == ["fresh BUY", "fresh BUY", "no timestamp"]
+        stats = scheduler.stats()[CLASS_SIGNAL]
+        assert stats["expired"] == 2
+        assert policy.counts[SHED_EXPIRED] == 2
+        # Ingress to delivery on the fake clock, and the age of the signal when it went out
+        assert stats["delivery_latency"]["count"] == 3
+        assert stats["signal_age"]["count"] == 2
+        assert 4000 <= stats["signal_age"]["p50_ms"] <= 6000
@@ -0,0 +1,62 @@
+import asyncio
+import time
+import pytest
+from loop_monitor import LoopMonitor
+
+
+def blocking_handler():
+    time.sleep(0.3)
+
+
+async def watch(monitor, body):
+    monitor.start()
+    await asyncio.sleep(0.05)
+    try:
+        await body()
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+
+@pytest.fixture
+def monitor():
+    return LoopMonitor(interval=0.01, threshold=0.1)
+
+
+class TestLoopMonitor:
+
+    def test_blocking_call_is_a_stall_with_its_stack(self, monitor):
+        async def body():
+            blocking_handler()
+
+        asyncio.run(watch(monitor, body))
+
+        stats = monitor.stats()
+        assert stats["stalls"] == 1
+        assert stats["lag"]["max_ms"] >= 250
+        assert any("blocking_handler" in line for line in stats["last_stall"]["stack"])
+
+    def test_awaiting_is_not_a_stall(self, monitor):
+        async def body():
+            await asyncio.sleep(0.3)
+
+        asyncio.run(watch(monitor, body))
+
+        assert monitor.stats()["stalls"] == 0
+        assert monitor.lag.count > 5
+
+    def test_price_lookup_does_not_block_the_loop(self, monitor, monkeypatch):
+        import combined_bot
+        from price_table import RateTable
+
+        def slow_fetch(base):
+            time.sleep(0.3)
+            return {"BTC": 1 / 65000.0}
+
+        monkeypatch.setattr(combined_bot, "price_table", RateTable("USD", ttl=30, fetch=slow_fetch))
+
+        async def body():
+            assert await combined_bot.get_prices(["BTC"]) == {"BTC": pytest.approx(65000.0)}
+
+        asyncio.run(watch(monitor, body))
+        assert monitor.stats()["stalls"] == 0
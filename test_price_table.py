@@ -0,0 +1,87 @@
+import threading
+import time
+import pytest
+from price_table import RateTable, format_price_table, parse_symbols
+
+# Units per 1 USD, like Coinbase's exchange-rates?currency=USD
+RATES = {"BTC": 1 / 65000, "ETH": 1 / 3500, "SOL": 1 / 150, "EUR": 0.92}
+
+
+@pytest.fixture
+def fetches():
+    return []
+
+
+@pytest.fixture
+def table(clock, fetches):
+    def fetch(base):
+        fetches.append(base)
+        return dict(RATES)
+    return RateTable("usd", ttl=30, fetch=fetch, clock=clock)
+
+
+class TestRateTable:
+
+    def test_one_fetch_serves_every_symbol_until_the_ttl(self, table, clock, fetches):
+        prices = table.prices(["BTC", "eth", "BINANCE:SOLUSDT", "DOGE"])
+
+        assert prices == {"BTC": pytest.approx(65000), "ETH": pytest.approx(3500), "SOL": pytest.approx(150),
+                          "DOGE": None}
+        for _ in range(100):
+            table.price("BTCUSD")
+        assert fetches == ["USD"]
+
+        clock.now += 31
+        table.price("BTC")
+        assert len(fetches) == 2
+
+    def test_concurrent_lookups_share_one_refresh(self, clock):
+        fetches = []
+
+        def slow_fetch(base):
+            fetches.append(base)
+            time.sleep(0.1)
+            return dict(RATES)
+
+        table = RateTable("USD", ttl=30, fetch=slow_fetch, clock=clock)
+        threads = [threading.Thread(target=table.price, args=("ETH",)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(fetches) == 1
+
+    def test_failed_refresh_keeps_the_old_table(self, table, clock):
+        assert table.price("BTC") == pytest.approx(65000)
+
+        def broken(base):
+            raise ConnectionError("upstream down")
+
+        table.fetch = broken
+        clock.now += 60
+        assert table.price("BTC") == pytest.approx(65000)
+        assert table.stats()["errors"] == 1
+
+        # The failure is not retried on every lookup, only after a short back-off
+        for _ in range(50):
+            table.price("BTC")
+        assert table.stats()["fetches"] == 2
+        clock.now += 5
+        table.price("BTC")
+        assert table.stats()["fetches"] == 3
+
+
+class TestFormatting:
+
+    def test_parse_symbols(self):
+        assert parse_symbols(["btc", "eth,sol", "BTC"]) == ["BTC", "ETH", "SOL"]
+        assert parse_symbols([], ["BTC", "ETH"]) == ["BTC", "ETH"]
+
+    def test_change_since_last_check_per_symbol(self):
+        text = format_price_table({"BTC": 66000.0, "ETH": 3500.0, "PEPE": 0.0000123, "XYZ": None},
+                                  {"BTC": 65000.0, "ETH": 3500.0})
+
+        assert "**BTC**: $66,000.00  📈 +1,000.00 (+1.54%)" in text
+        assert "**ETH**: $3,500.00  ➡️ +0.00 (+0.00%)" in text
+        assert "**PEPE**: $0.000012" in text and "**XYZ**: unknown symbol" in text
@@ -0,0 +1,47 @@
+import pytest
+from delivery import RecipientIndex
+
+
+@pytest.fixture
+def index():
+    return RecipientIndex()
+
+
+class TestRecipientIndex:
+
+    def test_everyone_is_opted_in_by_default(self, index):
+        chats = frozenset({1, 2, 3})
+        assert index.resolve(chats, "signal") == chats
+        assert index.resolve(chats, "price") == chats
+        assert index.wants(99, "price")
+
+    def test_toggles_move_one_chat(self, index):
+        chats = frozenset({1, 2, 3})
+        index.update(2, {"notifications_enabled": True, "price_alerts_enabled": False,
+                         "signal_alerts_enabled": True})
+        index.update(3, {"notifications_enabled": False, "price_alerts_enabled": True,
+                         "signal_alerts_enabled": True})
+
+        assert index.resolve(chats, "price") == {1}
+        assert index.resolve(chats, "signal") == {1, 2}
+        assert not index.wants(3, "signal")
+
+        index.update(3, {"notifications_enabled": True})
+        assert index.resolve(chats, "signal") == chats
+        assert index.muted_count("price") == 1
+
+    def test_resolution_is_cached_until_a_toggle(self, index):
+        chats = frozenset(range(1000))
+        first = index.resolve(chats, "signal")
+        assert index.resolve(chats, "signal") is first
+
+        index.update(5, {"signal_alerts_enabled": False})
+        assert 5 not in index.resolve(chats, "signal")
+        assert len(index.resolve(chats, "signal")) == 999
+
+    def test_load_and_forget(self, index):
+        index.load([(1, {"price_alerts_enabled": False}), (2, {"notifications_enabled": False})])
+        assert index.resolve(frozenset({1, 2, 3}), "price") == {3}
+
+        index.forget(2)
+        assert index.resolve(frozenset({1, 2, 3}), "price") == {2, 3}
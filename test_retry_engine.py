@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from rate_limiter import RateLimiter, TokenBucket
+from retry_engine import (
+    CircuitBreaker, CircuitBreakerRegistry, RetryAfterGate, RetryEngine, RetryPolicy,
+    OUTCOME_CIRCUIT_OPEN
+)
+from telegram_api import ApiResult, OUTCOME_OK, OUTCOME_FAILED, OUTCOME_TRANSIENT
+
+
+@pytest.fixture
+def engine(clock):
+    return RetryEngine(
+        policy=RetryPolicy(max_attempts=4, base_delay=0.5, max_delay=4),
+        gate=RetryAfterGate(clock=clock),
+        breakers=CircuitBreakerRegistry(failure_threshold=2, reset_timeout=60, clock=clock),
+        rate_limiter=RateLimiter(global_rate=1000, chat_rate=1000, clock=clock),
+        sleep=clock.sleep
+    )
+
+
+def scripted(*results):
+    """Attempt function returning the given results in order"""
+    calls = list(results)
+    def attempt():
+        return calls.pop(0)
+    attempt.remaining = calls
+    return attempt
+
+
+class TestTokenBucket:
+
+    def test_reserve_returns_wait_when_empty(self, clock):
+        bucket = TokenBucket(rate=2, capacity=1, clock=clock)
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == pytest.approx(0.5)
+        clock.now += 1
+        assert bucket.try_acquire() is True
+
+
+class TestRetryEngine:
+
+    def test_success_first_attempt(self, engine):
+        result = engine.run(1, scripted(ApiResult(True)))
+        assert result.ok
+        assert result.attempts == 1
+
+    def test_transient_errors_are_retried_with_backoff(self, engine, clock):
+        start = clock.now
+        result = engine.run(1, scripted(ApiResult(False, 502), ApiResult(False, 0), ApiResult(True)))
+        assert result.ok
+        assert result.attempts == 3
+        assert clock.now - start <= 0.5 + 1.0
+
+    def test_permanent_error_is_not_retried(self, engine):
+        result = engine.run(1, scripted(ApiResult(False, 400, "Bad Request: message is too long")))
+        assert result.outcome == OUTCOME_FAILED
+        assert result.attempts == 1
+
+    def test_retry_after_pauses_every_chat(self, engine, clock):
+        start = clock.now
+        result = engine.run(1, scripted(ApiResult(False, 429, retry_after=7), ApiResult(True)))
+        assert result.ok
+        assert clock.now - start == pytest.approx(7)
+
+        # The pause is global: another chat waits out the remainder too
+        engine.gate.pause(3)
+        start = clock.now
+        engine.run(2, scripted(ApiResult(True)))
+        assert clock.now - start == pytest.approx(3)
+
+    def test_retry_after_does_not_trip_breaker(self, engine):
+        engine.run(1, scripted(*[ApiResult(False, 429, retry_after=1)] * 4))
+        assert engine.breakers.get(1).failures == 0
+
+    def test_breaker_opens_and_skips_rate_budget(self, engine, clock):
+        engine.run(1, scripted(ApiResult(False, 403)))
+        engine.run(1, scripted(ApiResult(False, 403)))
+        assert engine.breakers.get(1).state == CircuitBreaker.OPEN
+
+        attempt = scripted(ApiResult(True))
+        result = engine.run(1, attempt)
+        assert result.outcome == OUTCOME_CIRCUIT_OPEN
+        assert len(attempt.remaining) == 1
+
+        # Healthy chats keep flowing
+        assert engine.run(2, scripted(ApiResult(True))).ok
+
+    def test_breaker_half_open_trial_closes_on_success(self, engine, clock):
+        for _ in range(2):
+            engine.run(1, scripted(ApiResult(False, 403)))
+        clock.now += 61
+        assert engine.breakers.get(1).state == CircuitBreaker.HALF_OPEN
+        assert engine.run(1, scripted(ApiResult(True))).ok
+        assert engine.breakers.get(1).state == CircuitBreaker.CLOSED
+
+    def test_run_async_classifies_exceptions(self, engine):
+        from telegram.error import RetryAfter, TimedOut
+
+        calls = []
+        async def attempt():
+            calls.append(1)
+            if len(calls) == 1:
+                raise TimedOut()
+            return {"message_id": 1}
+
+        engine.policy.base_delay = 0
+        result = asyncio.run(engine.run_async(1, attempt))
+        assert result.ok
+        assert result.attempts == 2
+
+        assert ApiResult.from_exception(RetryAfter(5)).retry_after == 5
+        assert ApiResult.from_exception(TimedOut()).outcome == OUTCOME_TRANSIENT
+        assert ApiResult(True).outcome == OUTCOME_OK
@@ -0,0 +1,64 @@
+import time
+from benchmarks.mock_bot_api import MockBotAPI
+from sharded_delivery import ShardedDelivery, partition, shard_for
+from suppression import SuppressionList
+
+
+class TestPartition:
+
+    def test_shard_is_stable_and_in_range(self):
+        assert shard_for(123456789, 4) == shard_for(123456789, 4)
+        assert {shard_for(chat_id, 4) for chat_id in range(1000)} == {0, 1, 2, 3}
+
+    def test_partition_covers_every_chat_once(self):
+        chat_ids = list(range(100))
+        parts = partition(chat_ids, 3)
+        assert sorted(c for part in parts for c in part) == chat_ids
+        for shard, part in enumerate(parts):
+            assert all(shard_for(c, 3) == shard for c in part)
+            assert part == sorted(part)
+
+
+class TestShardedDelivery:
+
+    def test_broadcast_gathers_results_and_reports_dead_chats(self, tmp_path):
+        suppression = SuppressionList(str(tmp_path / "suppressed.json"))
+        with MockBotAPI(fail_chats={7: (403, "Forbidden: bot was blocked by the user")}) as mock:
+            with ShardedDelivery(shards=2, threads_per_shard=2, global_rate=1000, chat_rate=1000,
+                                 base_url=mock.url, suppression=suppression) as delivery:
+                report = delivery.broadcast(range(1, 21), "hello")
+
+            assert report.sent == 19
+            assert report.failed == 1
+            assert {r.shard for r in report.results} == {0, 1}
+            assert mock.counts['sendMessage'] == 20
+        assert 7 in suppression
+
+    def test_dead_shard_fails_fast_and_is_respawned(self):
+        with MockBotAPI() as mock:
+            with ShardedDelivery(shards=2, threads_per_shard=2, global_rate=1000, chat_rate=1000,
+                                 base_url=mock.url) as delivery:
+                delivery._processes[0].kill()
+                delivery._processes[0].join(timeout=5)
+
+                started = time.monotonic()
+                report = delivery.broadcast(range(1, 21), "hello", timeout=30)
+                assert time.monotonic() - started < 10
+                assert report.missing == [0] and not report.complete
+                assert report.sent == len(partition(range(1, 21), 2)[1])
+
+                assert delivery.broadcast(range(1, 21), "again").sent == 20
+
+    def test_timed_out_broadcast_is_partial_and_late_results_are_dropped(self, tmp_path):
+        suppression = SuppressionList(str(tmp_path / "suppressed.json"))
+        with MockBotAPI(latency=0.1, fail_chats={7: (403, "Forbidden: bot was blocked by the user")}) as mock:
+            with ShardedDelivery(shards=2, threads_per_shard=1, global_rate=1000, chat_rate=1000,
+                                 base_url=mock.url, suppression=suppression) as delivery:
+                report = delivery.broadcast(range(1, 21), "hello", timeout=0.3)
+                assert report.missing == [0, 1] and report.sent == 0
+
+                # The shards finish the abandoned broadcast first; its results must not leak into this one
+                again = delivery.broadcast([1, 2], "again", timeout=30)
+                assert again.complete and again.sent == 2
+                assert delivery._abandoned == {} and delivery._pending == {}
+        assert 7 in suppression
@@ -0,0 +1,73 @@
+import multiprocessing
+import pytest
+from shared_state import Deduplicator, SharedStateStore, SharedTokenBucket, StateCounters
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "state.sqlite3")
+
+
+def _claim(path, key, results):
+    results.put(SharedStateStore(path).first_seen(key, ttl=60))
+
+
+class TestSharedStateStore:
+
+    def test_dedupe_is_shared_between_stores(self, state_path):
+        worker_a = SharedStateStore(state_path)
+        worker_b = SharedStateStore(state_path)
+
+        assert worker_a.first_seen("body-1", ttl=60) is True
+        assert worker_b.first_seen("body-1", ttl=60) is False
+        assert worker_b.first_seen("body-2", ttl=60) is True
+
+    def test_expired_keys_are_seen_again(self, state_path):
+        store = SharedStateStore(state_path)
+        assert store.first_seen("body", ttl=-1) is True
+        assert store.first_seen("body", ttl=60) is True
+        assert store.first_seen("body", ttl=60) is False
+
+    def test_dedupe_across_processes(self, state_path):
+        SharedStateStore(state_path)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_claim, args=(state_path, "same-body", results)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=30)
+
+        claims = [results.get(timeout=5) for _ in workers]
+        assert claims.count(True) == 1
+
+    def test_shared_bucket_budget_is_global(self, state_path):
+        bucket_a = SharedTokenBucket(SharedStateStore(state_path), "global", rate=0.001, capacity=3)
+        bucket_b = SharedTokenBucket(SharedStateStore(state_path), "global", rate=0.001, capacity=3)
+
+        assert bucket_a.try_acquire()
+        assert bucket_b.try_acquire()
+        assert bucket_a.try_acquire()
+        assert not bucket_b.try_acquire()
+        assert bucket_b.reserve() > 0
+
+    def test_prefs_and_counters(self, state_path):
+        store = SharedStateStore(state_path)
+        store.put_prefs(7, {"notifications_enabled": False})
+        assert SharedStateStore(state_path).get_prefs(7) == {"notifications_enabled": False}
+        assert store.all_prefs() == [(7, {"notifications_enabled": False})]
+        store.delete_prefs(7)
+        assert store.get_prefs(7) is None
+
+        counters = StateCounters(store)
+        counters.incr("messages_sent", 3)
+        counters.incr("messages_sent")
+        assert StateCounters(SharedStateStore(state_path)).snapshot() == {"messages_sent": 4}
+
+
+class TestLocalDeduplicator:
+
+    def test_local_fallback(self):
+        deduplicator = Deduplicator(ttl=60)
+        assert deduplicator.first_seen(b'{"action": "BUY"}')
+        assert not deduplicator.first_seen(b'{"action": "BUY"}')
+        assert deduplicator.first_seen(b'{"action": "SELL"}')
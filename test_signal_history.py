@@ -0,0 +1,143 @@
+import os
+import random
+import subprocess
+import sys
+import pytest
+from flask import Flask
+from config import Config
+from signal_history import SegmentFollower, SignalHistory, format_history, register_history_route
+
+
+@pytest.fixture
+def history():
+    history = SignalHistory(per_symbol=4)
+    for i, (symbol, action, strategy) in enumerate([
+        ("BTCUSD", "BUY", "EMA_Cross"),
+        ("ETHUSD", "SELL", "RSI"),
+        ("BINANCE:BTCUSD", "SELL", "RSI"),
+        ("BTCUSD", "LONG", "EMA_Cross"),
+        ("ETHUSD", "BUY", "EMA_Cross"),
+    ]):
+        history.record(symbol, action, strategy, price=str(100 + i), ts=1000.0 + i)
+    return history
+
+
+class TestSignalHistory:
+
+    def test_query_filters_newest_first(self, history):
+        btc = history.query(symbol="BTCUSD")
+        assert [e["action"] for e in btc] == ["LONG", "SELL", "BUY"]
+        assert btc[0]["price"] == 103.0
+
+        assert [e["symbol"] for e in history.query(strategy="RSI")] == ["BTCUSD", "ETHUSD"]
+        assert [e["time"] for e in history.query(action="buy")] == [1004.0, 1000.0]
+        assert history.query(strategy="unknown") == []
+        assert history.latest(symbol="ETHUSD")["action"] == "BUY"
+
+    def test_time_range(self, history):
+        assert [e["time"] for e in history.query(since=1001, until=1003)] == [1003.0, 1002.0, 1001.0]
+        assert [e["time"] for e in history.query(since=1003, limit=1)] == [1004.0]
+
+    def test_strategy_matches_any_case(self, history):
+        assert [e["time"] for e in history.query(strategy="ema_cross", symbol="btcusd")] == [1003.0, 1000.0]
+
+    def test_indexes_agree_with_a_full_scan(self):
+        rng = random.Random(7)
+        history = SignalHistory(per_symbol=20)
+        for i in range(3000):
+            # Some timestamps arrive late, and rings keep overwriting their oldest entries
+            history.record(rng.choice(["BTC", "ETH", "SOL", "XRP"]), rng.choice(["BUY", "SELL", "LONG"]),
+                           rng.choice(["EMA", "RSI", "MACD", ""]), price=i, ts=i - rng.choice([0, 0, 0, 5]))
+        # Per-symbol queries walk the rings themselves
+        everything = sorted((e for symbol in history.symbols() for e in history.query(symbol=symbol, limit=100)),
+                            key=lambda e: (e["time"], e["seq"]), reverse=True)
+        assert len(everything) == 80 and history.query(limit=10_000) == everything
+
+        for filters in ({"strategy": "rsi"}, {"action": "SELL", "since": 2950}, {"symbol": "ETH", "strategy": "MACD"},
+                        {"strategy": "EMA", "action": "long", "until": 2990}):
+            expected = [e for e in everything
+                        if e["symbol"] == filters.get("symbol", e["symbol"])
+                        and e["strategy"].upper() == filters.get("strategy", e["strategy"]).upper()
+                        and e["action"] == filters.get("action", e["action"]).upper()
+                        and filters.get("since", 0) <= e["time"] <= filters.get("until", 1e9)]
+            assert history.query(limit=10_000, **filters) == expected
+        # References to overwritten entries are compacted away
+        assert len(history._all) <= 2 * 80 + 64
+
+    def test_ring_keeps_newest_per_symbol(self):
+        history = SignalHistory(per_symbol=3)
+        for i in range(10):
+            history.record("BTCUSD", "BUY", price=i, ts=float(i))
+        assert [e["price"] for e in history.query(symbol="BTCUSD")] == [9.0, 8.0, 7.0]
+        assert [e["time"] for e in history.query(symbol="BTCUSD", since=8)] == [9.0, 8.0]
+        assert history.stats()["signals"] == 3
+
+    def test_spill_segments_survive_restart(self, tmp_path):
+        history = SignalHistory(per_symbol=10, directory=str(tmp_path), segment_bytes=200, max_segments=2)
+        for i in range(20):
+            history.record("BTCUSD", "BUY", "EMA", price=i, ts=float(i))
+        history.close()
+        assert len(list(tmp_path.glob("signals-*.ndjson"))) <= 2
+
+        restored = SignalHistory(per_symbol=10, directory=str(tmp_path))
+        assert restored.latest(symbol="BTCUSD")["price"] == 19.0
+        restored.close()
+
+    def test_workers_only_prune_their_own_segments(self, tmp_path):
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        live_pid = os.getppid()
+        for ms, pid in ((1, live_pid), (2, live_pid), (3, live_pid), (4, exited.pid), (5, exited.pid)):
+            (tmp_path / f"signals-{ms:015d}-{pid}.ndjson").write_text(
+                f'{{"symbol":"ETHUSD","action":"BUY","strategy":"","price":{ms},"time":{ms}}}\n')
+
+        history = SignalHistory(per_symbol=10, directory=str(tmp_path), segment_bytes=1, max_segments=1)
+        assert [e["price"] for e in history.query(symbol="ETHUSD")] == [5.0, 4.0, 3.0, 2.0, 1.0]
+        for i in range(3):
+            history.record("BTCUSD", "BUY", "EMA", price=i, ts=10.0 + i)
+        history.close()
+
+        names = sorted(path.name for path in tmp_path.glob("signals-*.ndjson"))
+        # The other live worker keeps all its segments, the exited one keeps its newest
+        assert [name for name in names if name.endswith(f"-{live_pid}.ndjson")] == \
+            [f"signals-{ms:015d}-{live_pid}.ndjson" for ms in (1, 2, 3)]
+        assert f"signals-{5:015d}-{exited.pid}.ndjson" in names and len(names) == 5
+
+    def test_follower_reads_only_new_complete_lines(self, tmp_path):
+        writer = SignalHistory(per_symbol=10, directory=str(tmp_path))
+        follower = SegmentFollower(str(tmp_path))
+        writer.record("BTCUSD", "BUY", "EMA", price=1, ts=1.0)
+        assert [e["price"] for e in follower.poll()] == [1.0]
+
+        writer.record("BTCUSD", "SELL", "EMA", price=2, ts=2.0)
+        segment, = tmp_path.glob("signals-*.ndjson")
+        with open(segment, "a") as f:
+            f.write('{"symbol":"BTCUSD","act')  # another write still in progress
+        assert [e["action"] for e in follower.poll()] == ["SELL"]
+        assert follower.poll() == []
+        writer.close()
+
+    def test_format_escapes_markdown(self, history):
+        assert "EMA\\_Cross" in format_history(history.query(limit=1))
+
+
+class TestHistoryRoute:
+
+    def test_history_endpoint(self, history, monkeypatch):
+        app = Flask(__name__)
+        register_history_route(app, history)
+        client = app.test_client()
+        assert client.get('/history?symbol=BTCUSD').status_code == 401
+
+        monkeypatch.setattr(Config, "ADMIN_TOKEN", "s3cret")
+        assert client.get('/history?symbol=BTCUSD').status_code == 401
+        response = client.get('/history?symbol=BTCUSD&limit=2', headers={'X-Admin-Token': 's3cret'})
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["count"] == 2
+        assert body["signals"][0] == {"symbol": "BTCUSD", "action": "LONG", "strategy": "EMA_Cross",
+                                      "price": 103.0, "time": 1003.0}
+
+        response = client.get('/history?limit=-5', headers={'X-Admin-Token': 's3cret'})
+        assert response.get_json()["count"] == 1
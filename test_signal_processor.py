@@ -1,7 +1,8 @@
 import pytest
 import json
 from unittest.mock import AsyncMock, patch
-from signal_processor import SignalProcessor
+from config import ConfigStore, FilterConfig
+from signal_processor import SignalProcessor, parse_timestamp
 
 @pytest.fixture
 def signal_processor():
@@ -31,6 +32,7 @@ class TestSignalProcessor:
         assert result['token'] == 'BTCUSD'
         assert result['strategy'] == 'EMA_Cross'
         assert result['price'] == '45000'
+        assert result['epoch'] == 1735732800.0
     
     def test_parse_signal_with_exchange_prefix(self, signal_processor):
         """Test parsing signal with exchange prefix in token"""
@@ -57,11 +59,9 @@ class TestSignalProcessor:
         
         assert result is None
     
-    @patch('signal_processor.Config')
-    def test_should_process_signal_allowed_tokens(self, mock_config, signal_processor):
+    @patch('signal_processor.config_store', ConfigStore(FilterConfig(allowed_tokens=['BTCUSD', 'ETHUSD'])))
+    def test_should_process_signal_allowed_tokens(self, signal_processor):
         """Test token filtering"""
-        mock_config.ALLOWED_TOKENS = ['BTCUSD', 'ETHUSD']
-        mock_config.ALLOWED_STRATEGIES = []
         
         signal = {'action': 'BUY', 'token': 'BTCUSD', 'strategy': 'EMA'}
         assert signal_processor.should_process_signal(signal) == True
@@ -69,11 +69,9 @@ class TestSignalProcessor:
         signal = {'action': 'BUY', 'token': 'ADAUSD', 'strategy': 'EMA'}
         assert signal_processor.should_process_signal(signal) == False
     
-    @patch('signal_processor.Config')
-    def test_should_process_signal_allowed_strategies(self, mock_config, signal_processor):
+    @patch('signal_processor.config_store', ConfigStore(FilterConfig(allowed_strategies=['EMA_Cross', 'RSI_Divergence'])))
+    def test_should_process_signal_allowed_strategies(self, signal_processor):
         """Test strategy filtering"""
-        mock_config.ALLOWED_TOKENS = []
-        mock_config.ALLOWED_STRATEGIES = ['EMA_Cross', 'RSI_Divergence']
         
         signal = {'action': 'BUY', 'token': 'BTCUSD', 'strategy': 'EMA_Cross'}
         assert signal_processor.should_process_signal(signal) == True
@@ -88,6 +86,20 @@ class TestSignalProcessor:
         
         signal = {'action': 'BUY', 'token': 'BTCUSD', 'strategy': 'EMA'}
         assert signal_processor.should_process_signal(signal) == True
+    
+    @pytest.mark.parametrize("value,expected", [
+        ("1735732800000", 1735732800.0),
+        (1735732800000, 1735732800.0),
+        ("1735732800", 1735732800.0),
+        ("2025-01-01T12:00:00Z", 1735732800.0),
+        ("2025-01-01T13:00:00+01:00", 1735732800.0),
+        ("yesterday", None),
+        (None, None),
+        ("nan", None),
+    ])
+    def test_parse_timestamp(self, value, expected):
+        """Test payload timestamps in the formats the Pine scripts send"""
+        assert parse_timestamp(value) == expected
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,156 @@
+import struct
+import threading
+import zlib
+import pytest
+from delivery import DeliveryEngine
+from delivery_scheduler import CLASS_SIGNAL, DeliveryScheduler
+from retry_engine import RetryEngine, RetryPolicy
+from signal_history import SignalHistory
+from sparkline import Sparkline, SparklineCache, SparklineCharts, bar_closes, parse_timeframe, render_sparkline
+from suppression import SuppressionList
+from telegram_api import ApiResult
+from token_pool import ChatReach, TokenPool
+
+NOW = 1_700_000_000.0
+
+
+class PhotoAPI:
+    """Answers sendPhoto like Telegram: an upload gets a new file_id, a file_id is echoed back"""
+
+    def __init__(self, token="123:abc"):
+        self.token = token
+        self.uploads = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def send_message(self, chat_id, text, parse_mode='HTML', **params):
+        self.calls.append(('sendMessage', chat_id, None))
+        return ApiResult(True, result={'message_id': 1})
+
+    def call(self, method, files=None, **params):
+        with self._lock:
+            if files:
+                self.uploads += 1
+                file_id = f"{self.token}-file-{self.uploads}"
+            else:
+                file_id = params['photo']
+            self.calls.append((method, params['chat_id'], 'upload' if files else file_id))
+        return ApiResult(True, result={'message_id': 1, 'photo': [{'file_id': file_id + '-small'},
+                                                                  {'file_id': file_id}]})
+
+
+def read_png(data):
+    """(width, height, rows of palette indexes) of an 8-bit palette PNG"""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    pos, chunks = 8, {}
+    while pos < len(data):
+        length, = struct.unpack(">I", data[pos:pos + 4])
+        kind, body = data[pos + 4:pos + 8], data[pos + 8:pos + 8 + length]
+        crc, = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+        assert zlib.crc32(kind + body) & 0xffffffff == crc
+        chunks[kind] = chunks.get(kind, b"") + body
+        pos += 12 + length
+    width, height, depth, color_type = struct.unpack(">IIBB", chunks[b"IHDR"][:10])
+    assert (depth, color_type) == (8, 3)
+    raw = zlib.decompress(chunks[b"IDAT"])
+    rows = [raw[y * (width + 1) + 1:(y + 1) * (width + 1)] for y in range(height)]
+    return width, height, rows
+
+
+@pytest.fixture
+def history():
+    history = SignalHistory(clock=lambda: NOW)
+    for minute in range(60):
+        history.record("BTCUSDT", "PRICE_UPDATE", price=60000 + minute * 10, ts=NOW - 3600 + minute * 60)
+    return history
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return DeliveryEngine(PhotoAPI(), RetryEngine(policy=RetryPolicy(max_attempts=1), sleep=lambda s: None),
+                          SuppressionList(str(tmp_path / "suppressed.json")))
+
+
+class TestRendering:
+
+    def test_png_is_valid_and_draws_the_line(self):
+        width, height, rows = read_png(render_sparkline([1, 3, 2, 5], width=80, height=20))
+
+        assert (width, height, len(rows)) == (80, 20, 20)
+        assert all(len(row) == 80 for row in rows)
+        # Rising series: the line ends near the top right, the area fills below it
+        assert 2 in rows[3][-6:] or 2 in rows[4][-6:]
+        assert rows[-1][40] == 1
+
+    def test_flat_series_and_too_short(self):
+        assert read_png(render_sparkline([5, 5, 5]))[1] == 60
+        with pytest.raises(ValueError):
+            render_sparkline([5])
+
+    def test_bar_closes(self):
+        points = [(NOW - 250, 1.0), (NOW - 230, 2.0), (NOW - 50, 4.0)]
+        # 100s bars: the last close in each bar, gaps repeat the previous close
+        assert bar_closes(points, 100, 4, NOW) == [2.0, 2.0, 4.0, 4.0]
+        assert parse_timeframe("15m") == 900 and parse_timeframe("1h") == 3600 and parse_timeframe("5") == 300
+
+
+class TestSparklineCache:
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = SparklineCache(max_bytes=1500)
+        for name in "abc":
+            cache.put(Sparkline((name,), b"x" * 300))
+        cache.get(("a",))
+        cache.put(Sparkline(("d",), b"x" * 300))
+
+        assert cache.get(("b",)) is None
+        assert cache.get(("a",)) is not None
+        assert cache.bytes <= 1500
+
+
+class TestSparklineCharts:
+
+    def test_one_chart_per_symbol_and_bar(self, history, engine):
+        clock = [NOW]
+        charts = SparklineCharts(history, engine, timeframe="5m", bars=12, clock=lambda: clock[0])
+
+        first = charts.chart("BINANCE:btcusdt")
+        assert charts.chart("BTCUSDT") is first
+        clock[0] += 300
+        assert charts.chart("BTCUSDT") is not first
+        assert charts.chart("ETHUSDT") is None
+        assert charts.stats()["renders"] == 2 and charts.stats()["hits"] == 1
+
+    def test_one_upload_serves_every_recipient(self, history, engine):
+        charts = SparklineCharts(history, engine, timeframe="5m", bars=12, clock=lambda: NOW)
+        scheduler = DeliveryScheduler(engine, senders=4)
+        scheduler.submit(range(1, 41), "🟢 BUY BTCUSDT", CLASS_SIGNAL, send=charts.sender(charts.chart("BTCUSDT")))
+        assert scheduler.wait_idle(timeout=5)
+        scheduler.close()
+
+        assert engine.api.uploads == 1
+        assert len(engine.api.calls) == 40
+        assert {file_id for _, _, file_id in engine.api.calls[1:]} == {"123:abc-file-1"}
+        assert charts.stats()["reused"] == 39
+
+    def test_file_ids_are_per_bot(self, history, tmp_path):
+        suppression = SuppressionList(str(tmp_path / "suppressed.json"))
+        pool = TokenPool(["111:aaa", "222:bbb"], suppression=suppression, reach=ChatReach(),
+                         engine_factory=lambda token, bot_suppression: DeliveryEngine(
+                             PhotoAPI(token), RetryEngine(policy=RetryPolicy(max_attempts=1), sleep=lambda s: None),
+                             bot_suppression))
+        for chat_id in range(1, 21):
+            pool.record_reach(chat_id, "222")
+        charts = SparklineCharts(history, pool, timeframe="5m", bars=12, clock=lambda: NOW)
+        chart = charts.chart("BTCUSDT")
+        for chat_id in range(1, 21):
+            assert charts.send(chat_id, chart, "BUY").ok
+
+        assert [engine.api.uploads for engine in pool.engines.values()] == [1, 1]
+        assert len(chart.file_ids) == 2
+
+    def test_long_signals_fall_back_to_text(self, history, engine):
+        charts = SparklineCharts(history, engine, timeframe="5m", bars=12, clock=lambda: NOW)
+        charts.send(1, charts.chart("BTCUSDT"), "x" * 2000)
+
+        assert engine.api.calls == [('sendMessage', 1, None)]
@@ -0,0 +1,78 @@
+import json
+import random
+import pytest
+from strategy_analytics import StrategyAnalytics, load_segments, recompute
+
+
+def signal(action, price, strategy="EMA", symbol="BTCUSD"):
+    return {"strategy": strategy, "symbol": symbol, "action": action, "price": price}
+
+
+@pytest.fixture
+def analytics():
+    return StrategyAnalytics()
+
+
+class TestStrategyAnalytics:
+
+    def test_pairs_long_and_short_trades(self, analytics):
+        assert analytics.observe(signal("BUY", "100")) is None
+        assert analytics.observe(signal("BUY", "105")) is None  # no pyramiding
+        assert analytics.observe(signal("SELL", "110")) == pytest.approx(0.10)
+        assert analytics.observe(signal("SHORT", "110")) is None
+        assert analytics.observe(signal("LONG", "121")) == pytest.approx(-0.10)  # reversal closes the short
+
+        stats = analytics.stats("EMA")
+        assert stats["trades"] == 2
+        assert stats["wins"] == 1
+        assert stats["win_rate"] == 0.5
+        assert stats["avg_return"] == pytest.approx(0.0)
+        assert stats["max_drawdown"] == pytest.approx(0.10)
+        assert stats["open_positions"] == 1
+
+    def test_symbols_are_paired_separately_and_bad_prices_skipped(self, analytics):
+        analytics.observe(signal("BUY", "100", symbol="BTCUSD"))
+        analytics.observe(signal("BUY", "10", symbol="ETHUSD"))
+        analytics.observe(signal("SELL", "N/A", symbol="BTCUSD"))
+        analytics.observe(signal("SELL", "12", symbol="ETHUSD"))
+
+        stats = analytics.stats("EMA")
+        assert stats["trades"] == 1
+        assert stats["total_return"] == pytest.approx(0.2)
+        assert stats["open_positions"] == 1
+
+
+class TestRecompute:
+
+    def test_vectorized_matches_incremental(self, analytics):
+        rng = random.Random(7)
+        columns = ([], [], [], [])
+        for _ in range(3000):
+            row = (rng.choice(["EMA", "RSI", "MACD"]), rng.choice(["BTCUSD", "ETHUSD", "SOLUSD"]),
+                   rng.choice(["BUY", "SELL", "LONG", "SHORT", "PRICE_UPDATE"]),
+                   rng.choice([rng.uniform(10, 100), rng.uniform(10, 100), float("nan")]))
+            analytics.observe(signal(row[2], row[3], strategy=row[0], symbol=row[1]))
+            for column, value in zip(columns, row):
+                column.append(value)
+
+        incremental = analytics.report()
+        vectorized = recompute(*columns)
+        assert sorted(vectorized) == sorted(incremental)
+        for name, stats in incremental.items():
+            assert vectorized[name] == pytest.approx(stats)
+
+    def test_empty_history(self):
+        assert recompute([], [], [], []) == {}
+
+    def test_worker_segments_are_merged_in_time_order(self, tmp_path):
+        # Two workers wrote at the same time; the second one's segment name sorts first
+        worker_a = [{"time": 1.0, "strategy": "EMA", "symbol": "BTC", "action": "BUY", "price": 100.0},
+                    {"time": 3.0, "strategy": "EMA", "symbol": "BTC", "action": "SELL", "price": 90.0}]
+        worker_b = [{"time": 2.0, "strategy": "EMA", "symbol": "BTC", "action": "SELL", "price": 120.0}]
+        for name, entries in (("signals-000000000001000-20.ndjson", worker_a),
+                              ("signals-000000000000999-10.ndjson", worker_b)):
+            (tmp_path / name).write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+
+        columns = load_segments(str(tmp_path))
+        assert columns[2] == ["BUY", "SELL", "SELL"]
+        assert recompute(*columns)["EMA"]["total_return"] == pytest.approx(0.20)
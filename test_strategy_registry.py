@@ -0,0 +1,56 @@
+import pytest
+from strategy_registry import StrategyRegistry, STATUS_ACTIVE, STATUS_PAUSED
+
+
+@pytest.fixture
+def registry(clock):
+    return StrategyRegistry(silence_seconds=60, clock=clock)
+
+
+class TestStrategyRegistry:
+
+    def test_observe_tracks_last_signal_and_counts(self, registry):
+        registry.observe({"strategy": "EMA Cross", "symbol": "BINANCE:ETHUSD", "action": "buy", "price": "3000"})
+        record = registry.observe({"strategy": "EMA Cross", "symbol": "ETHUSD", "action": "SELL", "price": "3100",
+                                   "timeframe": "15m"})
+
+        assert record.symbol == "ETHUSD"
+        assert record.last_signal == "SELL"
+        assert record.last_price == "3100"
+        assert record.timeframe == "15m"
+        assert record.signal_count == 2
+        assert dict(record.action_counts) == {"BUY": 1, "SELL": 1}
+        assert registry.summary() == {"strategies": 1, "active": 1, "paused": 0, "signals": 2}
+
+    def test_silent_strategies_are_paused_and_resume(self, registry, clock):
+        registry.observe({"strategy": "A", "action": "BUY"})
+        clock.now += 30
+        registry.observe({"strategy": "B", "action": "BUY"})
+        clock.now += 40
+
+        assert registry.summary()["paused"] == 1
+        assert registry.get("A").status == STATUS_PAUSED
+        assert registry.get("B").status == STATUS_ACTIVE
+
+        registry.observe({"strategy": "A", "action": "SELL"})
+        assert registry.get("A").status == STATUS_ACTIVE
+        assert registry.summary()["active"] == 2
+
+    def test_replayed_signals_keep_their_time(self, registry, clock):
+        registry.observe({"strategy": "Old", "action": "BUY"}, ts=clock.now - 300)
+        registry.observe({"strategy": "New", "action": "BUY"}, ts=clock.now - 10)
+
+        assert registry.get("Old").status == STATUS_PAUSED
+        assert registry.get("New").last_seen == clock.now - 10
+        assert registry.summary()["active"] == 1
+
+    def test_render_is_cached_until_a_change(self, registry, clock):
+        registry.observe({"strategy": "EMA_Cross", "symbol": "BTCUSD", "action": "BUY"})
+        first = registry.render()
+        assert "EMA\\_Cross" in first
+        assert registry.render() is first
+
+        clock.now += 120  # auto-pause changes the view
+        paused = registry.render()
+        assert paused is not first
+        assert "⏸️ **Paused:** 1" in paused
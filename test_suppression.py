@@ -0,0 +1,80 @@
+import pytest
+from delivery import DeliveryEngine, OUTCOME_SUPPRESSED
+from retry_engine import RetryEngine, RetryPolicy
+from suppression import SuppressionList
+from telegram_api import ApiResult, OUTCOME_DEAD_CHAT, OUTCOME_FAILED
+
+
+@pytest.fixture
+def suppression(tmp_path):
+    return SuppressionList(str(tmp_path / "suppressed.json"))
+
+
+@pytest.fixture
+def make_engine(suppression, make_api):
+    def factory(responses):
+        api = make_api(responses=responses)
+        engine = DeliveryEngine(api, RetryEngine(policy=RetryPolicy(max_attempts=1), sleep=lambda s: None), suppression)
+        return engine, api
+    return factory
+
+
+class TestDeadChatClassification:
+
+    @pytest.mark.parametrize("status,description,reason", [
+        (403, "Forbidden: bot was blocked by the user", "bot_blocked"),
+        (403, "Forbidden: user is deactivated", "user_deactivated"),
+        (400, "Bad Request: chat not found", "chat_not_found"),
+    ])
+    def test_permanent_failures(self, status, description, reason):
+        result = ApiResult(False, status, description)
+        assert result.outcome == OUTCOME_DEAD_CHAT
+        assert result.dead_reason == reason
+
+    def test_other_bad_requests_are_not_dead(self):
+        result = ApiResult(False, 400, "Bad Request: can't parse entities")
+        assert result.outcome == OUTCOME_FAILED
+        assert result.dead_reason is None
+
+
+class TestSuppressionList:
+
+    def test_persisted_across_instances(self, suppression):
+        assert suppression.suppress(42, "bot_blocked")
+        assert not suppression.suppress(42, "bot_blocked")
+
+        reloaded = SuppressionList(suppression.path)
+        assert 42 in reloaded
+        assert reloaded.entries()[42]['reason'] == "bot_blocked"
+
+        assert reloaded.restore(42)
+        assert 42 not in SuppressionList(suppression.path)
+
+    def test_workers_do_not_drop_each_others_changes(self, suppression):
+        other_worker = SuppressionList(suppression.path)
+        assert suppression.suppress(1, "bot_blocked")
+        assert other_worker.suppress(2, "chat_not_found")
+        assert suppression.restore(2)
+
+        assert sorted(SuppressionList(suppression.path).entries()) == [1]
+
+    def test_filter_keeps_order(self, suppression):
+        suppression.suppress(2, "chat_not_found")
+        assert suppression.filter([1, 2, 3]) == [1, 3]
+
+
+class TestDeliveryEngineSuppression:
+
+    def test_dead_chat_is_suppressed_and_skipped(self, make_engine, suppression):
+        engine, api = make_engine({2: ApiResult(False, 403, "Forbidden: bot was blocked by the user")})
+        dead = []
+        engine.on_dead_chat(lambda chat_id, reason: dead.append((chat_id, reason)))
+
+        engine.broadcast([1, 2, 3], "signal")
+        assert dead == [(2, "bot_blocked")]
+        assert 2 in suppression
+
+        api.sent.clear()
+        engine.broadcast([1, 2, 3], "signal")
+        assert api.sent == [1, 3]
+        assert engine.send_message(2, "signal").outcome == OUTCOME_SUPPRESSED
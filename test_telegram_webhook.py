@@ -0,0 +1,62 @@
+import pytest
+from flask import Flask
+from telegram_webhook import TelegramUpdateBridge, register_update_route, SECRET_HEADER
+
+
+class RecordingBridge(TelegramUpdateBridge):
+    """Bridge that records updates instead of queueing them on an Application"""
+
+    def __init__(self, secret_token, ready=True):
+        super().__init__(secret_token)
+        self._ready = ready
+        self.fed = []
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def feed(self, payload):
+        self.fed.append(payload)
+
+
+@pytest.fixture
+def make_client():
+    def factory(bridge):
+        app = Flask(__name__)
+        register_update_route(app, bridge, "/telegram")
+        return app.test_client()
+    return factory
+
+
+class TestTelegramUpdateRoute:
+
+    def test_rejects_wrong_secret(self, make_client):
+        bridge = RecordingBridge("s3cret")
+        client = make_client(bridge)
+
+        response = client.post("/telegram", json={"update_id": 1}, headers={SECRET_HEADER: "nope"})
+        assert response.status_code == 403
+        response = client.post("/telegram", json={"update_id": 1})
+        assert response.status_code == 403
+        assert bridge.fed == []
+
+    def test_rejects_everything_without_a_secret(self, make_client):
+        bridge = RecordingBridge("")
+        client = make_client(bridge)
+
+        assert client.post("/telegram", json={"update_id": 1}).status_code == 403
+        assert client.post("/telegram", json={"update_id": 1}, headers={SECRET_HEADER: ""}).status_code == 403
+        assert bridge.fed == []
+
+    def test_feeds_verified_update(self, make_client):
+        bridge = RecordingBridge("s3cret")
+        client = make_client(bridge)
+
+        response = client.post("/telegram", json={"update_id": 7}, headers={SECRET_HEADER: "s3cret"})
+        assert response.status_code == 200
+        assert bridge.fed == [{"update_id": 7}]
+
+    def test_not_ready_asks_telegram_to_redeliver(self, make_client):
+        client = make_client(RecordingBridge("s3cret", ready=False))
+        response = client.post("/telegram", json={"update_id": 1}, headers={SECRET_HEADER: "s3cret"})
+        assert response.status_code == 503
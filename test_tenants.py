@@ -0,0 +1,87 @@
+import json
+import pytest
+from config import Config, FilterConfig
+from rate_limiter import RateLimiter
+from retry_engine import RetryEngine
+from tenants import DEFAULT_TENANT, Tenant, TenantRegistry, hash_secret, load_tenants
+
+
+@pytest.fixture
+def tenants_file(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"tenants": [
+        {"name": "alpha", "secret": "alpha-secret", "chat_ids": [1, 2], "allowed_tokens": ["BTCUSDT"], "rate": 10},
+        {"name": "beta", "secret_sha256": hash_secret("beta-secret"), "chat_ids": ["-1003"],
+         "allowed_strategies": ["MACD Strategy"]}
+    ]}))
+    return str(path)
+
+
+@pytest.fixture
+def registry(tenants_file):
+    return TenantRegistry(load_tenants(tenants_file), Tenant(DEFAULT_TENANT, hash_secret("main-secret")))
+
+
+class TestTenantRegistry:
+
+    def test_secret_resolves_to_its_tenant(self, registry):
+        assert registry.resolve("alpha-secret").name == "alpha"
+        assert registry.resolve("beta-secret").name == "beta"
+        assert registry.resolve("main-secret") is registry.default
+        assert registry.resolve("wrong") is None
+        assert registry.resolve(None) is None
+
+    def test_open_default_only_without_other_tenants(self, tenants_file):
+        single = TenantRegistry((), Tenant(DEFAULT_TENANT, None))
+        assert single.resolve("anything") is single.default
+
+        registry = TenantRegistry(load_tenants(tenants_file), Tenant(DEFAULT_TENANT, None))
+        assert registry.resolve("anything") is None
+        assert registry.resolve(None) is None
+        assert registry.resolve("alpha-secret").name == "alpha"
+
+    def test_filters_are_compiled_per_tenant(self, registry):
+        alpha = registry.get("alpha").filters
+        beta = registry.get("beta").filters
+
+        assert alpha.chat_id_set == {1, 2} and beta.chat_id_set == {-1003}
+        assert alpha.allows_token("btcusdt") and not alpha.allows_token("ETHUSDT")
+        assert beta.allows_token("ETHUSDT") and not beta.allows_strategy("EMA Cross")
+
+    def test_tenants_have_separate_budgets_and_queues(self, registry):
+        alpha, beta = registry.get("alpha"), registry.get("beta")
+
+        assert alpha.engine is not beta.engine
+        assert alpha.engine.retry_engine.rate_limiter is not beta.engine.retry_engine.rate_limiter
+        assert alpha.engine.retry_engine.rate_limiter.global_bucket.rate == 10
+        assert alpha.scheduler is not beta.scheduler
+        # Dead chats are dead for everyone
+        assert alpha.engine.suppression is beta.engine.suppression
+
+    def test_tenants_on_one_bot_share_its_budget_and_gate(self, tenants_file):
+        bot_engine = RetryEngine(rate_limiter=RateLimiter(global_rate=30), sleep=lambda s: None)
+        registry = TenantRegistry(load_tenants(tenants_file), Tenant(DEFAULT_TENANT, hash_secret("main-secret")),
+                                  bot_engines={Config.BOT_TOKEN: bot_engine})
+        alpha, beta = registry.get("alpha").engine.retry_engine, registry.get("beta").engine.retry_engine
+
+        assert alpha.gate is beta.gate is bot_engine.gate
+        assert alpha.rate_limiter.bot_bucket is beta.rate_limiter.bot_bucket is bot_engine.rate_limiter.global_bucket
+        # Each tenant message spends from its own bucket and from the bot's
+        for chat_id in range(20):
+            alpha.rate_limiter.reserve(chat_id)
+            beta.rate_limiter.reserve(chat_id)
+        assert bot_engine.rate_limiter.global_bucket.available < -5
+        assert beta.rate_limiter.reserve(99) > 0
+
+    def test_secrets_and_names_are_unique(self):
+        registry = TenantRegistry([Tenant("a", hash_secret("s"), FilterConfig())])
+        with pytest.raises(ValueError):
+            registry.add(Tenant("b", hash_secret("s"), FilterConfig()))
+        with pytest.raises(ValueError):
+            registry.add(Tenant("a", hash_secret("t"), FilterConfig()))
+
+    def test_tenant_without_secret_is_rejected(self, tmp_path):
+        path = tmp_path / "tenants.json"
+        path.write_text(json.dumps({"tenants": [{"name": "open", "chat_ids": [1]}]}))
+        with pytest.raises(ValueError):
+            load_tenants(str(path))
@@ -0,0 +1,136 @@
+from collections import Counter
+import pytest
+from delivery import DeliveryEngine
+from retry_engine import RetryEngine, RetryPolicy
+from suppression import SuppressionList
+from token_pool import ChatReach, HashRing, TokenPool, bot_id
+
+TOKENS = ["111:aaa", "222:bbb", "333:ccc"]
+
+
+@pytest.fixture
+def suppression(tmp_path):
+    return SuppressionList(str(tmp_path / "suppressed.json"))
+
+
+@pytest.fixture
+def make_pool(suppression, make_api):
+    def factory(tokens=TOKENS, fail_chats=None, reach_all=True):
+        apis = {}
+
+        def engine_factory(token, bot_suppression):
+            apis[bot_id(token)] = make_api(token, fail_chats=(fail_chats or {}).get(bot_id(token), ()))
+            retry_engine = RetryEngine(policy=RetryPolicy(max_attempts=1), sleep=lambda s: None)
+            return DeliveryEngine(apis[bot_id(token)], retry_engine, bot_suppression)
+
+        pool = TokenPool(tokens, suppression=suppression, engine_factory=engine_factory, reach=ChatReach())
+        if reach_all:
+            for chat_id in range(300):
+                for bot in pool.engines:
+                    pool.record_reach(chat_id, bot)
+        return pool, apis
+    return factory
+
+
+class TestHashRing:
+
+    def test_keys_spread_evenly(self):
+        ring = HashRing(["111", "222", "333"])
+        counts = Counter(ring.node_for(chat_id) for chat_id in range(30000))
+        assert all(8000 < count < 12000 for count in counts.values())
+
+    def test_new_node_only_takes_keys(self):
+        before = HashRing(["111", "222", "333"])
+        after = HashRing(["111", "222", "333", "444"])
+        moved = [chat_id for chat_id in range(20000) if before.node_for(chat_id) != after.node_for(chat_id)]
+
+        assert all(after.node_for(chat_id) == "444" for chat_id in moved)
+        assert 3000 < len(moved) < 7000
+
+
+class TestTokenPool:
+
+    def test_each_chat_sticks_to_one_token(self, make_pool):
+        pool, apis = make_pool()
+        for _ in range(3):
+            for chat_id in range(100):
+                assert pool.send_message(chat_id, "hi").ok
+
+        for bot, api in apis.items():
+            assert api.sent
+            assert all(pool.bot_for(chat_id) == bot for chat_id in api.sent)
+        assert sum(stats["sent"] for stats in pool.stats().values()) == 300
+
+    def test_broadcast_keeps_order_per_token(self, make_pool):
+        pool, apis = make_pool()
+        results = pool.broadcast(range(300), "signal")
+
+        assert sorted(result.chat_id for result in results) == list(range(300))
+        for api in apis.values():
+            assert api.sent == sorted(api.sent)
+
+    def test_chats_only_go_to_bots_that_have_seen_them(self, make_pool):
+        pool, apis = make_pool(reach_all=False)
+        for chat_id in range(10):
+            pool.record_reach(chat_id, "222")
+        pool.broadcast(range(20), "signal")
+
+        assert pool.primary == "111"
+        assert apis["222"].sent and set(apis["222"].sent) <= set(range(10))
+        assert apis["333"].sent == []
+        assert sorted(apis["111"].sent + apis["222"].sent) == list(range(20))
+
+    def test_dead_chats_on_the_primary_are_shared(self, make_pool, suppression):
+        pool, apis = make_pool(fail_chats={bot: {7} for bot in ("111", "222", "333")}, reach_all=False)
+        dead = []
+        pool.on_dead_chat(lambda chat_id, reason: dead.append((chat_id, reason)))
+
+        pool.broadcast([6, 7, 8], "signal")
+        assert dead == [(7, "bot_blocked")]
+        assert 7 in suppression
+        assert pool.deliverable([6, 7, 8]) == [6, 8]
+
+    def test_chat_lost_by_an_extra_bot_moves_to_the_primary(self, make_pool, suppression):
+        pool, apis = make_pool(reach_all=False)
+        dead = []
+        pool.on_dead_chat(lambda chat_id, reason: dead.append((chat_id, reason)))
+        chats = list(range(100))
+        for chat_id in chats:
+            pool.record_reach(chat_id, "222")
+        on_extra = [chat_id for chat_id in chats if pool.bot_for(chat_id) == "222"]
+        lost = on_extra[::2]
+        apis["222"].fail_chats = set(lost)
+
+        results = pool.broadcast(chats, "signal")
+        assert all(result.ok for result in results)
+        assert dead == [] and len(suppression) == 0
+        assert pool.rerouted == len(lost)
+        assert [chat_id for chat_id in chats if pool.bot_for(chat_id) == "222"] == on_extra[1::2]
+
+        # Starting the bot again makes the chat reachable through it
+        pool.record_reach(lost[0], "222")
+        apis["222"].fail_chats = set()
+        assert pool.send_message(lost[0], "hi").ok and apis["222"].sent[-1] == lost[0]
+
+    def test_reach_is_read_from_the_extra_bots_updates(self, make_pool):
+        pool, apis = make_pool(reach_all=False)
+        apis["222"].updates = [
+            {"update_id": 1, "message": {"chat": {"id": 42}, "text": "/start"}},
+            {"update_id": 2, "my_chat_member": {"chat": {"id": -100}, "new_chat_member": {"status": "member"}}},
+            {"update_id": 3, "my_chat_member": {"chat": {"id": 43}, "new_chat_member": {"status": "kicked"}}},
+        ]
+        pool.record_reach(43, "222")
+        pool.poll_updates()
+
+        assert pool.reach.bots(42) == {"222"} and pool.reach.bots(-100) == {"222"}
+        assert pool.reach.bots(43) == set()
+        assert pool._offsets["222"] == 4
+
+    def test_reach_is_persisted(self, tmp_path):
+        path = str(tmp_path / "reach.json")
+        ChatReach(path).add(42, "222")
+        assert ChatReach(path).bots("42") == {"222"}
+
+    def test_tokens_are_required(self, make_pool):
+        with pytest.raises(ValueError):
+            TokenPool([], engine_factory=lambda token, suppression: None)
@@ -0,0 +1,101 @@
+import csv
+import math
+import random
+import pytest
+from indicators import Bar, IndicatorEngine, MaCrossStrategy
+from signal_processor import SignalProcessor
+from watchlist_scanner import WatchlistScanner, iter_columns, load_bar_matrix
+
+
+def random_closes(symbols, bars, seed, gap_rate=0.0):
+    """closes[symbol][bar], None where the symbol has no bar"""
+    rng = random.Random(seed)
+    closes = []
+    for _ in range(symbols):
+        price, row = 100.0, []
+        for _ in range(bars):
+            price = max(1.0, price * (1 + rng.gauss(0, 0.01)))
+            row.append(None if rng.random() < gap_rate else price)
+        closes.append(row)
+    return closes
+
+
+def per_symbol_signals(symbols, closes, times, **params):
+    """Reference: one indicators.MaCrossStrategy per symbol, bar by bar"""
+    engine = IndicatorEngine(strategies=[lambda: MaCrossStrategy(**params)])
+    out = []
+    for column, ts in enumerate(times):
+        for symbol, row in zip(symbols, closes):
+            if row[column] is not None:
+                close = row[column]
+                out.extend(engine.update(symbol, Bar(ts, close, close, close, close)))
+    return out
+
+
+def scanner_signals(scanner, closes, times):
+    out = []
+    for column, ts in enumerate(times):
+        column_closes = [math.nan if row[column] is None else row[column] for row in closes]
+        out.extend(scanner.scan(column_closes, ts))
+    return out
+
+
+def key(signal):
+    return signal['timestamp'], signal['token'], signal['action'], signal['price']
+
+
+class TestWatchlistScanner:
+
+    @pytest.mark.parametrize("gap_rate", [0.0, 0.2])
+    def test_matches_per_symbol_strategy(self, gap_rate):
+        symbols = [f"SYM{i}" for i in range(40)]
+        closes = random_closes(len(symbols), 300, seed=11, gap_rate=gap_rate)
+        times = [1700000000 + 60 * i for i in range(300)]
+
+        expected = per_symbol_signals(symbols, closes, times)
+        scanned = scanner_signals(WatchlistScanner(symbols), closes, times)
+
+        assert len(expected) > 50
+        assert sorted(map(key, scanned)) == sorted(map(key, expected))
+
+    def test_without_rsi_filter_and_custom_lengths(self):
+        symbols = ["AAA", "BBB", "CCC"]
+        closes = random_closes(len(symbols), 200, seed=5)
+        times = list(range(200))
+        params = dict(name="Quick", fast=3, slow=8, use_rsi_filter=False)
+
+        expected = per_symbol_signals(symbols, closes, times, **params)
+        scanned = scanner_signals(WatchlistScanner(symbols, **params), closes, times)
+
+        assert sorted(map(key, scanned)) == sorted(map(key, expected))
+        assert {s['strategy'] for s in scanned} == {"Quick"}
+
+    def test_signals_are_parse_signal_output(self):
+        scanner = WatchlistScanner(["BINANCE:BTCUSDT", "ETHUSDT"], exchange="BINANCE")
+        closes = random_closes(2, 200, seed=3)
+        signals = scanner_signals(scanner, closes, [1_700_000_000 + 60 * i for i in range(200)])
+        processor = SignalProcessor(telegram_bot=object())
+
+        assert signals
+        for signal in signals:
+            assert processor.parse_signal(signal) == {**signal, 'epoch': int(signal['timestamp']) / 1000}
+        assert {s['token'] for s in signals} <= {"BTCUSDT", "ETHUSDT"}
+
+    def test_bar_matrix_from_csv_directory(self, tmp_path):
+        for symbol, rows in {"AAA": [(60, 1.0), (120, 2.0)], "BBB": [(120, 5.0), (180, 6.0)]}.items():
+            with open(tmp_path / f"{symbol}.csv", "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["time", "open", "high", "low", "close"])
+                for ts, close in rows:
+                    writer.writerow([ts, close, close, close, close])
+
+        symbols, times, closes = load_bar_matrix(str(tmp_path))
+        assert symbols == ["AAA", "BBB"]
+        assert list(times) == [60, 120, 180]
+        assert closes[0, 0] == 1.0 and math.isnan(closes[0, 2])
+        assert math.isnan(closes[1, 0]) and closes[1, 2] == 6.0
+
+        scanner = WatchlistScanner(symbols, fast=1, slow=2, use_rsi_filter=False)
+        collected = []
+        assert scanner.run(iter_columns(times, closes), sink=collected.append) == len(collected)
+        assert list(scanner.count) == [2, 2]
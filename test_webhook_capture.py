@@ -0,0 +1,80 @@
+import gzip
+import os
+import pytest
+from config import FilterConfig
+from signal_processor import SignalProcessor
+from webhook_capture import WebhookCapture, read_captures, read_segment, redact_secret, segment_paths
+
+
+@pytest.fixture
+def capture(tmp_path, clock):
+    capture = WebhookCapture(str(tmp_path), segment_bytes=1024, buffer_bytes=256, flush_seconds=60, clock=clock)
+    yield capture
+    capture.close()
+
+
+class TestWebhookCapture:
+
+    def test_bodies_roundtrip_in_arrival_order(self, capture, clock, tmp_path):
+        for i in range(5):
+            clock.now += 1
+            capture.append(f'{{"ticker":"BTCUSDT","action":"BUY","price":{i}}}'.encode())
+        capture.append(b"plain text alert \xff", ts=2000.0)
+        capture.close()
+
+        captured = list(read_captures(str(tmp_path)))
+        assert [ts for ts, _ in captured] == [1001.0, 1002.0, 1003.0, 1004.0, 1005.0, 2000.0]
+        assert captured[0][1] == b'{"ticker":"BTCUSDT","action":"BUY","price":0}'
+        assert captured[-1][1] == "plain text alert �".encode()
+
+    def test_segments_roll_and_merge(self, capture, clock, tmp_path):
+        for i in range(200):
+            clock.now += 0.001
+            capture.append(b'{"ticker":"ETHUSDT","action":"SELL","price":3000.5}')
+        capture.close()
+
+        assert len(segment_paths(str(tmp_path))) > 1
+        timestamps = [ts for ts, _ in read_captures(str(tmp_path))]
+        assert len(timestamps) == 200
+        assert timestamps == sorted(timestamps)
+
+    def test_unflushed_segment_is_readable_up_to_last_flush(self, capture, tmp_path):
+        for i in range(10):
+            capture.append(b'{"action":"BUY"}', ts=float(i))
+        capture.flush()
+        capture.append(b'{"action":"SELL"}', ts=99.0)
+
+        # Segment still open (no gzip trailer), the buffered body is not on disk yet
+        path = segment_paths(str(tmp_path))[0]
+        assert [ts for ts, _ in read_segment(path)] == [float(i) for i in range(10)]
+
+    def test_secret_is_never_written(self, capture, tmp_path):
+        capture.append(b'{"secret": "hunter\\"2", "ticker":"BTCUSDT"}')
+        capture.close()
+
+        (_, body), = read_captures(str(tmp_path))
+        assert body == b'{"secret": "<redacted>", "ticker":"BTCUSDT"}'
+        assert redact_secret(b"plain alert") == b"plain alert"
+
+    def test_torn_segment_is_tolerated(self, tmp_path):
+        path = os.path.join(str(tmp_path), "webhooks-000000000001000-1.ndjson.gz")
+        with gzip.open(path, "wb") as f:
+            f.write(b'{"ts":1.0,"body":"{}"}\n{"ts":2.0,"body":"{}"}\n')
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data[:-6])
+
+        assert [ts for ts, _ in read_segment(path)] == [1.0, 2.0]
+
+
+class TestFilterDecisions:
+
+    def test_same_signal_judged_under_two_configs(self):
+        processor = SignalProcessor(telegram_bot=object())
+        current = FilterConfig(allowed_strategies=["EMA Cross"])
+        candidate = FilterConfig(allowed_strategies=["EMA Cross", "RSI"])
+        signal = processor.parse_signal({"ticker": "BTCUSDT", "action": "BUY", "strategy": "RSI"})
+
+        assert not processor.should_process_signal(signal, current)
+        assert processor.should_process_signal(signal, candidate)
@@ -0,0 +1,307 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from config import Config
+from delivery import OUTCOME_SUPPRESSED, DeliveryEngine
+from retry_engine import DeliveryResult, RetryEngine
+from suppression import SuppressionList, chat_key, suppressed_chats
+from telegram_api import OUTCOME_DEAD_CHAT, TelegramAPI
+
+logger = logging.getLogger(__name__)
+
+
+def bot_id(token: str) -> str:
+    """Numeric bot id from a token; stays the same when the token's secret is revoked"""
+    return token.split(':', 1)[0]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """
+    Consistent hash ring with `replicas` virtual points per node
+
+    A key belongs to the first point at or after its hash. Adding a node
+    only takes over roughly 1/N of the keys; every other key keeps its node.
+    """
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 100):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        if not points:
+            raise ValueError("A hash ring needs at least one node")
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key, among: Optional[Set[str]] = None) -> str:
+        """Node owning `key`; with `among`, the first of those nodes clockwise from the key"""
+        index = bisect(self._hashes, _hash(str(key)))
+        for offset in range(len(self._nodes)):
+            node = self._nodes[(index + offset) % len(self._nodes)]
+            if among is None or node in among:
+                return node
+        raise KeyError(f"None of {sorted(among)} is on the ring")
+
+
+class ChatReach:
+    """
+    Persisted map of chat -> bots that have seen it
+
+    A bot can only message a chat that started it (or added it to a
+    group), so a chat may only be routed to the bots recorded here.
+    Written back to a JSON file atomically like the suppression list.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._bots: Dict[object, Set[str]] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            mtime = self._file_mtime()
+            with open(self.path) as f:
+                raw = json.load(f)
+            self._bots = {chat_key(chat_id): set(bots) for chat_id, bots in raw.items()}
+            self._mtime = mtime
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load bot reach map {self.path}: {e}")
+
+    def refresh(self):
+        """Pick up chats recorded by the process that polls the extra bots"""
+        if self.path and self._file_mtime() != self._mtime:
+            with self._lock:
+                self.load()
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({str(chat_id): sorted(bots) for chat_id, bots in self._bots.items()}, f)
+            os.replace(tmp_path, self.path)
+            self._mtime = self._file_mtime()
+        except OSError as e:
+            logger.error(f"Could not persist bot reach map {self.path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._bots)
+
+    def bots(self, chat_id) -> Set[str]:
+        return self._bots.get(chat_key(chat_id), set())
+
+    def add(self, chat_id, bot: str) -> bool:
+        chat_id = chat_key(chat_id)
+        with self._lock:
+            if bot in self._bots.get(chat_id, ()):
+                return False
+            self._bots.setdefault(chat_id, set()).add(bot)
+            self._save()
+        return True
+
+    def discard(self, chat_id, bot: str) -> bool:
+        chat_id = chat_key(chat_id)
+        with self._lock:
+            bots = self._bots.get(chat_id)
+            if not bots or bot not in bots:
+                return False
+            bots.discard(bot)
+            if not bots:
+                del self._bots[chat_id]
+            self._save()
+        return True
+
+
+class TokenPool:
+    """
+    Delivery spread over several bot tokens
+
+    Each token gets its own DeliveryEngine: its own HTTP connection pool,
+    rate budget, retry_after gate and breakers. The primary token (BOT_TOKEN,
+    the bot users talk to) can reach every chat; the others only chats that
+    have seen them (`record_reach`, fed by `poll_updates`). A chat is pinned
+    to one of its bots by a consistent hash of its id, so its messages keep
+    their order and come from the same bot.
+
+    Only the primary bot's dead chats go on the shared suppression list.
+    An extra bot that lost a chat ("chat not found", blocked, kicked) just
+    stops being one of its bots, and the message goes out through the
+    primary. Offers the DeliveryEngine methods the scheduler and live ticker use.
+    """
+
+    def __init__(self, tokens: Optional[Iterable[str]] = None, base_url: Optional[str] = None,
+                 suppression: Optional[SuppressionList] = None,
+                 engine_factory: Optional[Callable[[str, SuppressionList], DeliveryEngine]] = None,
+                 reach: Optional[ChatReach] = None, primary: Optional[str] = None):
+        tokens = list(dict.fromkeys(tokens if tokens is not None else Config.BOT_TOKENS))
+        if not tokens:
+            raise ValueError("No bot tokens configured")
+        self.suppression = suppression if suppression is not None else suppressed_chats
+        self.reach = reach if reach is not None else ChatReach(Config.BOT_REACH_FILE)
+        bots = [bot_id(token) for token in tokens]
+        self.primary = primary or (bot_id(Config.BOT_TOKEN) if Config.BOT_TOKEN and bot_id(Config.BOT_TOKEN) in bots
+                                   else bots[0])
+        factory = engine_factory or (lambda token, suppression: self._make_engine(token, base_url, suppression,
+                                                                                  len(tokens) > 1))
+        self.engines: Dict[str, DeliveryEngine] = {}
+        for token in tokens:
+            bot = bot_id(token)
+            # Extra bots keep their own in-memory list: a chat they lost is lost for them only
+            self.engines[bot] = factory(token, self.suppression if bot == self.primary else SuppressionList(None))
+            if bot != self.primary:
+                self.engines[bot].on_dead_chat(lambda chat_id, reason, bot=bot: self._lost_reach(bot, chat_id, reason))
+        self.ring = HashRing(self.engines)
+        self.sent = Counter()
+        self.rerouted = 0
+        self._offsets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        logger.info(f"Delivering through {len(self.engines)} bot token(s), primary bot {self.primary}")
+
+    def _make_engine(self, token: str, base_url: Optional[str], suppression: SuppressionList,
+                     prefixed: bool) -> DeliveryEngine:
+        retry_engine = RetryEngine.from_config(bucket_prefix=f"bot{bot_id(token)}:" if prefixed else "")
+        return DeliveryEngine(TelegramAPI(token=token, base_url=base_url), retry_engine, suppression)
+
+    def __len__(self):
+        return len(self.engines)
+
+    def record_reach(self, chat_id, bot: str):
+        """`bot` has seen the chat (a /start, a message, being added to the group)"""
+        if bot == self.primary or bot not in self.engines:
+            return
+        self.engines[bot].suppression.restore(chat_id)
+        if self.reach.add(chat_id, bot):
+            logger.info(f"Chat {chat_id} can be reached by bot {bot}")
+
+    def _lost_reach(self, bot: str, chat_id, reason: str):
+        if self.reach.discard(chat_id, bot):
+            logger.warning(f"Bot {bot} lost chat {chat_id} ({reason}); the primary bot takes it over")
+
+    def bot_for(self, chat_id) -> str:
+        return self.ring.node_for(chat_id, self.reach.bots(chat_id) | {self.primary})
+
+    def engine_for(self, chat_id) -> DeliveryEngine:
+        return self.engines[self.bot_for(chat_id)]
+
+    def on_dead_chat(self, listener: Callable):
+        self.engines[self.primary].on_dead_chat(listener)
+
+    def deliverable(self, chat_ids: Iterable) -> List:
+        self.reach.refresh()
+        return self.suppression.filter(chat_ids)
+
+    def _deliver(self, chat_id, send: Callable[[DeliveryEngine], DeliveryResult]) -> DeliveryResult:
+        bot = self.bot_for(chat_id)
+        result = send(self.engines[bot])
+        if bot != self.primary and result.outcome in (OUTCOME_DEAD_CHAT, OUTCOME_SUPPRESSED):
+            with self._lock:
+                self.rerouted += 1
+            bot = self.primary
+            result = send(self.engines[bot])
+        if result.ok:
+            with self._lock:
+                self.sent[bot] += 1
+        return result
+
+    def send_message(self, chat_id, text: str, parse_mode: str = 'HTML', **params) -> DeliveryResult:
+        return self._deliver(chat_id, lambda engine: engine.send_message(chat_id, text, parse_mode=parse_mode,
+                                                                         **params))
+
+    def call(self, chat_id, method: str, **params) -> DeliveryResult:
+        return self._deliver(chat_id, lambda engine: engine.call(chat_id, method, **params))
+
+    def partition(self, chat_ids: Iterable) -> Dict[str, List]:
+        """Recipients per bot, keeping their relative order"""
+        parts: Dict[str, List] = {bot: [] for bot in self.engines}
+        for chat_id in chat_ids:
+            parts[self.bot_for(chat_id)].append(chat_id)
+        return parts
+
+    def broadcast(self, chat_ids: Iterable, text: str, parse_mode: str = 'HTML') -> List[DeliveryResult]:
+        """Send to every deliverable chat, all tokens in parallel, each chat in order on its token"""
+        parts = [part for part in self.partition(self.deliverable(chat_ids)).values() if part]
+        if not parts:
+            return []
+
+        def send_part(part):
+            return [self.send_message(chat_id, text, parse_mode=parse_mode) for chat_id in part]
+
+        with ThreadPoolExecutor(max_workers=len(parts)) as executor:
+            return [result for results in executor.map(send_part, parts) for result in results]
+
+    def poll_updates(self):
+        """
+        Record the chats each extra bot has seen from its pending updates
+
+        Extra bots run no handlers, so their updates are only read for the
+        chats in them. Only one process may poll a bot (getUpdates conflicts).
+        """
+        for bot, engine in self.engines.items():
+            if bot == self.primary:
+                continue
+            result = engine.api.call('getUpdates', offset=self._offsets.get(bot, 0), timeout=0)
+            if not result.ok:
+                logger.warning(f"getUpdates for bot {bot} failed: {result.status_code} {result.description}")
+                continue
+            for update in result.result or []:
+                self._offsets[bot] = update['update_id'] + 1
+                member = update.get('my_chat_member')
+                if member:
+                    if member.get('new_chat_member', {}).get('status') in ("left", "kicked"):
+                        self._lost_reach(bot, member['chat']['id'], member['new_chat_member']['status'])
+                    else:
+                        self.record_reach(member['chat']['id'], bot)
+                    continue
+                message = (update.get('message') or update.get('edited_message') or update.get('channel_post')
+                           or (update.get('callback_query') or {}).get('message'))
+                if message and 'chat' in message:
+                    self.record_reach(message['chat']['id'], bot)
+
+    def start_polling(self, interval: Optional[float] = None) -> Optional[threading.Thread]:
+        """Poll the extra bots' updates every `interval` seconds on a daemon thread"""
+        interval = interval if interval is not None else Config.BOT_REACH_POLL_SECONDS
+        if len(self.engines) < 2 or interval <= 0:
+            return None
+
+        def loop():
+            while True:
+                try:
+                    self.poll_updates()
+                except Exception as e:
+                    logger.error(f"Polling extra bot updates failed: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, name="bot-reach-poller", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict:
+        """Per bot id: messages sent, whether it is the primary, open circuits and any flood-control pause"""
+        return {
+            bot: {
+                "sent": self.sent[bot],
+                "primary": bot == self.primary,
+                "open_circuits": len(engine.retry_engine.breakers.open_chats()),
+                "retry_after_remaining": round(engine.retry_engine.gate.remaining(), 1)
+            }
+            for bot, engine in self.engines.items()
+        }
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+watchlist_strategy.pine over a whole watchlist at once
+
+The scanner keeps every indicator as a NumPy vector with one row per
+symbol, so each bar close is a handful of array operations no matter how
+many symbols are watched, instead of one TradingView alert per symbol. A
+symbol without a bar at some close (NaN) just keeps its state, like a
+chart that did not print that bar.
+
+Bars come from a directory of per-symbol CSVs (TradingView chart exports,
+`<SYMBOL>.csv`); signals are the same dicts indicators.MaCrossStrategy
+emits, and `--deliver` sends them through SignalProcessor:
+
+    python watchlist_scanner.py --bars-dir bars/ --exchange BINANCE --deliver
+"""
+import argparse
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from indicators import format_price, read_bars
+
+logger = logging.getLogger(__name__)
+
+
+class WatchlistScanner:
+    """
+    Fast/slow SMA cross with the optional RSI filter, vectorized over symbols
+
+    `window` holds the last `slow` closes of every symbol (symbols x bars);
+    SMAs are running sums that subtract the close leaving the window, and
+    RSI is Wilder's smoothing seeded with the mean of the first `rsi_length`
+    changes, both exactly as ta.sma / ta.rsi.
+    """
+
+    def __init__(self, symbols: Sequence[str], name: str = "Custom Strategy", fast: int = 9, slow: int = 21,
+                 use_rsi_filter: bool = True, rsi_length: int = 14, oversold: float = 30, overbought: float = 70,
+                 exchange: str = ""):
+        self.symbols = [s.split(':')[-1] for s in symbols]
+        self.name = name
+        self.fast, self.slow = fast, slow
+        self.use_rsi_filter = use_rsi_filter
+        self.rsi_length = rsi_length
+        self.oversold, self.overbought = oversold, overbought
+        self.exchange = exchange
+
+        n = len(self.symbols)
+        self.width = max(fast, slow)
+        self.window = np.zeros((n, self.width))
+        self.count = np.zeros(n, dtype=np.int64)
+        self.fast_sum = np.zeros(n)
+        self.slow_sum = np.zeros(n)
+        self.prev_fast = np.full(n, np.nan)
+        self.prev_slow = np.full(n, np.nan)
+        self.prev_close = np.full(n, np.nan)
+        self.up = np.zeros(n)    # seed sum, then the RMA once seeded
+        self.down = np.zeros(n)
+        self.rsi = np.full(n, np.nan)
+        self._rows = np.arange(n)
+
+    def scan(self, closes, ts: float) -> List[Dict]:
+        """One bar close for every symbol (NaN = no bar); returns the signals it triggered"""
+        closes = np.asarray(closes, dtype=np.float64)
+        has = ~np.isnan(closes)
+        rows, x = self._rows[has], closes[has]
+        count = self.count[rows]
+
+        # SMAs: add the new close, drop the one `fast`/`slow` bars back once the window is full
+        leaving_fast = np.where(count >= self.fast, self.window[rows, (count - self.fast) % self.width], 0.0)
+        leaving_slow = np.where(count >= self.slow, self.window[rows, (count - self.slow) % self.width], 0.0)
+        self.window[rows, count % self.width] = x
+        fast_sum = self.fast_sum[rows] + x - leaving_fast
+        slow_sum = self.slow_sum[rows] + x - leaving_slow
+        count = count + 1
+        fast_ma = np.where(count >= self.fast, fast_sum / self.fast, np.nan)
+        slow_ma = np.where(count >= self.slow, slow_sum / self.slow, np.nan)
+
+        rsi = self._update_rsi(rows, x, count - 1)
+
+        # NaN compares false, so warm-up never crosses (Pine's na)
+        prev_fast, prev_slow = self.prev_fast[rows], self.prev_slow[rows]
+        buy = (fast_ma > slow_ma) & (prev_fast <= prev_slow)
+        sell = (fast_ma < slow_ma) & (prev_fast >= prev_slow)
+        if self.use_rsi_filter:
+            buy &= rsi < self.overbought
+            sell &= rsi > self.oversold
+
+        self.count[rows] = count
+        self.fast_sum[rows] = fast_sum
+        self.slow_sum[rows] = slow_sum
+        self.prev_fast[rows] = fast_ma
+        self.prev_slow[rows] = slow_ma
+        self.prev_close[rows] = x
+
+        signals = []
+        for index in np.flatnonzero(buy | sell):
+            action = "BUY" if buy[index] else "SELL"
+            signals.append(self._signal(self.symbols[rows[index]], action, float(x[index]), ts))
+        return signals
+
+    def _update_rsi(self, rows, x, changes):
+        """`changes` = closes seen before this one, i.e. the number of the price change this bar adds"""
+        n = self.rsi_length
+        delta = x - self.prev_close[rows]
+        gain = np.where(changes > 0, np.maximum(delta, 0.0), 0.0)
+        loss = np.where(changes > 0, np.maximum(-delta, 0.0), 0.0)
+        up, down = self.up[rows], self.down[rows]
+
+        seeding = changes <= n
+        up = np.where(seeding, up + gain, up + (gain - up) / n)
+        down = np.where(seeding, down + loss, down + (loss - down) / n)
+        seeded = changes == n
+        up = np.where(seeded, up / n, up)
+        down = np.where(seeded, down / n, down)
+        self.up[rows], self.down[rows] = up, down
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(down == 0, 100.0, np.where(up == 0, 0.0, 100.0 - 100.0 / (1.0 + up / down)))
+        rsi = np.where(changes >= n, rsi, np.nan)
+        self.rsi[rows] = rsi
+        return rsi
+
+    def _signal(self, symbol: str, action: str, close: float, ts: float) -> Dict:
+        direction = "above" if action == "BUY" else "below"
+        return {
+            'action': action,
+            'token': symbol,
+            'strategy': self.name,
+            'price': format_price(close),
+            'exchange': self.exchange or None,
+            'message': f"Fast MA({self.fast}) crossed {direction} Slow MA({self.slow})",
+            'timestamp': str(int(ts * 1000))
+        }
+
+    def run(self, bars: Iterable[Tuple[float, np.ndarray]], sink: Optional[Callable[[Dict], None]] = None) -> int:
+        """Scan every (time, closes) column in order, handing signals to `sink`; returns how many fired"""
+        fired = 0
+        for ts, closes in bars:
+            for signal in self.scan(closes, ts):
+                fired += 1
+                if sink:
+                    sink(signal)
+        return fired
+
+
+def load_bar_matrix(directory: str, symbols: Optional[Sequence[str]] = None) -> Tuple[List[str], np.ndarray,
+                                                                                         np.ndarray]:
+    """
+    Closes of every `<SYMBOL>.csv` in `directory` as a (symbols x bars)
+    matrix on the union of their bar times, NaN where a symbol has no bar
+    """
+    if symbols is None:
+        symbols = sorted(name[:-4] for name in os.listdir(directory) if name.endswith(".csv"))
+    series = {symbol: read_bars(os.path.join(directory, f"{symbol}.csv")) for symbol in symbols}
+    times = np.unique(np.array([bar.time for bars in series.values() for bar in bars], dtype=np.float64))
+    closes = np.full((len(symbols), len(times)), np.nan)
+    for row, symbol in enumerate(symbols):
+        bars = series[symbol]
+        if bars:
+            columns = np.searchsorted(times, [bar.time for bar in bars])
+            closes[row, columns] = [bar.close for bar in bars]
+    return list(symbols), times, closes
+
+
+def iter_columns(times: np.ndarray, closes: np.ndarray) -> Iterator[Tuple[float, np.ndarray]]:
+    for column, ts in enumerate(times):
+        yield float(ts), closes[:, column]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars-dir', required=True, help="directory of <SYMBOL>.csv chart exports")
+    parser.add_argument('--exchange', default="")
+    parser.add_argument('--name', default="Custom Strategy", help="strategy name in the signals")
+    parser.add_argument('--deliver', action='store_true', help="send signals through SignalProcessor")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    symbols, times, closes = load_bar_matrix(args.bars_dir)
+    scanner = WatchlistScanner(symbols, name=args.name, exchange=args.exchange)
+    signals = []
+    scanner.run(iter_columns(times, closes), sink=signals.append)
+    logger.info(f"{len(symbols)} symbols x {len(times)} bars -> {len(signals)} signals")
+
+    if not args.deliver:
+        for signal in signals:
+            print(f"{signal['timestamp']} {signal['token']:<12} {signal['action']:<4} {signal['price']}")
+        return
+
+    from signal_processor import SignalProcessor
+
+    async def deliver():
+        processor = SignalProcessor()
+        sent = 0
+        for signal in signals:
+            sent += await processor.process_signal(signal)
+        logger.info(f"Delivered {sent} of {len(signals)} signals")
+
+    asyncio.run(deliver())
+
+
+if __name__ == '__main__':
+    main()
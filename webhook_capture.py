@@ -0,0 +1,147 @@
+import atexit
+import gzip
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "webhooks-"
+SEGMENT_SUFFIX = ".ndjson.gz"
+
+# "secret": "..." anywhere in a body, JSON or not; replay never checks secrets
+SECRET_FIELD = re.compile(rb'("secret"\s*:\s*)"(?:[^"\\]|\\.)*"')
+
+
+class WebhookCapture:
+    """
+    Appends raw webhook bodies to rotating gzip NDJSON segments
+
+    Each line is {"ts": arrival epoch seconds, "body": raw body text}. Lines
+    are buffered in memory and written when `buffer_bytes` accumulate or at
+    most every `flush_seconds`; each write ends with a gzip sync flush, so a
+    crash loses only the unwritten buffer. Segment names carry the pid, so
+    several gunicorn workers can capture into the same directory. The
+    webhook `secret` is masked before anything is buffered.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, buffer_bytes: int = 256 * 1024,
+                 flush_seconds: float = 1.0, clock=time.time):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.buffer_bytes = buffer_bytes
+        self.flush_seconds = flush_seconds
+        self.clock = clock
+        self.captured = 0
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._segment = None
+        self._segment_written = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name="webhook-capture")
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def append(self, body: bytes, ts: Optional[float] = None):
+        line = json.dumps({
+            "ts": self.clock() if ts is None else ts,
+            "body": redact_secret(body).decode("utf-8", errors="replace")
+        }, separators=(',', ':')).encode("utf-8") + b"\n"
+        with self._lock:
+            self._buffer.append(line)
+            self._buffered += len(line)
+            self.captured += 1
+            if self._buffered >= self.buffer_bytes:
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        self._buffer, self._buffered = [], 0
+        try:
+            if self._segment is None or self._segment_written >= self.segment_bytes:
+                self._roll()
+            self._segment.write(data)
+            self._segment.flush()
+            self._segment_written += len(data)
+        except OSError as e:
+            dropped = data.count(b"\n")
+            logger.error(f"Webhook capture write failed, dropped {dropped} bodies: {e}")
+
+    def _roll(self):
+        if self._segment is not None:
+            self._segment.close()
+        name = f"{SEGMENT_PREFIX}{int(self.clock() * 1000):015d}-{os.getpid()}{SEGMENT_SUFFIX}"
+        self._segment = gzip.open(os.path.join(self.directory, name), "ab", compresslevel=6)
+        self._segment_written = 0
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._write()
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+
+def redact_secret(body: bytes) -> bytes:
+    """`body` with the value of its "secret" field masked, the rest byte for byte"""
+    return SECRET_FIELD.sub(rb'\1"<redacted>"', body) if b'"secret"' in body else body
+
+
+def segment_paths(directory: str) -> List[str]:
+    names = sorted(n for n in os.listdir(directory) if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+
+def read_segment(path: str) -> Iterator[Tuple[float, bytes]]:
+    """(arrival ts, raw body) from one segment, tolerating a torn tail"""
+    try:
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                yield entry["ts"], entry["body"].encode("utf-8")
+    except (EOFError, gzip.BadGzipFile) as e:
+        # Segment of a process that is still running or died before close
+        logger.debug(f"Stopped reading {path} early: {e}")
+
+
+def read_captures(directory: str) -> Iterator[Tuple[float, bytes]]:
+    """Every captured webhook in the directory, merged in arrival order"""
+    return heapq.merge(*(read_segment(path) for path in segment_paths(directory)), key=lambda item: item[0])
+
+
+def get_webhook_capture() -> Optional[WebhookCapture]:
+    """Capture for this process when WEBHOOK_CAPTURE_DIR is set, else None"""
+    global _capture
+    if Config.WEBHOOK_CAPTURE_DIR and _capture is None:
+        with _capture_lock:
+            if _capture is None:
+                _capture = WebhookCapture(Config.WEBHOOK_CAPTURE_DIR,
+                                          segment_bytes=int(Config.WEBHOOK_CAPTURE_SEGMENT_MB * 1024 * 1024))
+                logger.info(f"Capturing webhooks to {Config.WEBHOOK_CAPTURE_DIR}")
+    return _capture
+
+
+_capture: Optional[WebhookCapture] = None
+_capture_lock = threading.Lock()
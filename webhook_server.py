@@ -1,19 +1,27 @@
 from flask import Flask, request, jsonify
 import json
 import logging
+import os
 from datetime import datetime
-from config import Config
+from config import Config, config_store
+from admin_commands import register_reload_route
+from webhook_capture import get_webhook_capture
 from signal_processor import SignalProcessor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+register_reload_route(app)
 signal_processor = SignalProcessor()
 
 @app.route('/webhook', methods=['POST'])
 async def webhook():
     """Receive TradingView webhook alerts"""
+    capture = get_webhook_capture()
+    if capture:
+        capture.append(request.get_data())
+    
     try:
         # Verify content type
         if not request.is_json:
@@ -48,8 +56,7 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "allowed_tokens": len(Config.ALLOWED_TOKENS),
-        "allowed_strategies": len(Config.ALLOWED_STRATEGIES)
+        "config": config_store.current().summary()
     })
 
 @app.route('/', methods=['GET'])
@@ -63,4 +70,4 @@ def root():
     })
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5000)), debug=False)
\ No newline at end of file
@@ -1,41 +1,103 @@
 #!/usr/bin/env python3
-import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, jsonify
 from datetime import datetime
 import json
-import requests
-from config import Config
+from config import Config, config_store, install_reload_signal_handler
+from admin_commands import register_reload_route
+from webhook_capture import get_webhook_capture
+from delivery import DeliveryEngine
+from shared_state import Deduplicator, StateCounters, get_shared_state
+from signal_history import register_history_route, signal_history
+from strategy_analytics import strategy_analytics
+from strategy_registry import strategy_registry
+from sharded_delivery import ShardedDelivery
+from load_shedding import SignalMaxAge
+from metrics import LatencyHistogram
+from signal_processor import parse_timestamp
+from tenants import build_registry
+from channel_broadcast import ChannelBroadcaster, format_notice
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+register_reload_route(app)
+register_history_route(app)
 
-# Store for bot token to send messages
-BOT_TOKEN = Config.BOT_TOKEN
-TELEGRAM_API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
+# Shared delivery layer (HTTP pool, rate budget, retries, per-chat breakers)
+delivery_engine = DeliveryEngine()
 
-def send_telegram_message(chat_id, message):
+# Cross-worker state when SHARED_STATE_PATH is set (gunicorn), process-local otherwise
+shared_state = get_shared_state()
+deduplicator = Deduplicator(Config.DEDUPE_TTL_SECONDS, shared_state)
+counters = StateCounters(shared_state)
+
+# Large audiences: recipients are hash-partitioned over DELIVERY_SHARDS processes
+sharded_delivery = ShardedDelivery(suppression=delivery_engine.suppression) if Config.DELIVERY_SHARDS > 1 else None
+
+# Webhook secret -> tenant (TENANTS_FILE); the default tenant is WEBHOOK_SECRET with the global filters
+tenant_registry = build_registry(delivery_engine)
+
+# BROADCAST_CHANNELS: strategies whose signals are posted once to a channel (own rate budget within the bot's).
+# Posts wait for that budget on one background thread, in order, never on the request.
+channel_broadcaster = ChannelBroadcaster(
+    bot_bucket=tenant_registry.bot_engine(Config.BOT_TOKEN).rate_limiter.global_bucket)
+channel_posts = ThreadPoolExecutor(max_workers=1, thread_name_prefix="channel-post")
+
+def send_telegram_message(chat_id, message, engine=None):
     """Send message to Telegram chat"""
     try:
-        url = f"{TELEGRAM_API_URL}/sendMessage"
-        data = {
-            'chat_id': chat_id,
-            'text': message,
-            'parse_mode': 'HTML'
-        }
-        response = requests.post(url, data=data)
-        if response.status_code == 200:
-            logger.info(f"Message sent successfully to chat {chat_id}")
-            return True
-        else:
-            logger.error(f"Failed to send message: {response.text}")
-            return False
+        return (engine or delivery_engine).send_message(chat_id, message).ok
     except Exception as e:
         logger.error(f"Error sending Telegram message: {e}")
         return False
 
+# SIGNAL_MAX_AGE limits; ingress-to-delivery time and the signal's age when Telegram took it
+signal_max_age = SignalMaxAge()
+delivery_latency = LatencyHistogram()
+signal_ages = LatencyHistogram()
+
+def broadcast_message(chat_ids, message, signal=None, engine=None):
+    """
+    Send one message to many chats, returns how many were delivered
+    
+    `signal` is (received_at, epoch, strategy, action); a signal that passes
+    its max age during the broadcast is not sent to the remaining chats.
+    `engine` is a tenant's own delivery engine (default: the shared one).
+    """
+    received_at, born, strategy, action = signal or (time.monotonic(), None, "", "")
+    if sharded_delivery and engine in (None, delivery_engine):
+        if signal_max_age.expired(born, strategy, action):
+            counters.incr("signals_expired")
+            return 0
+        return sharded_delivery.broadcast(chat_ids, message).sent
+    sent = 0
+    for index, chat_id in enumerate(chat_ids):
+        if signal_max_age.expired(born, strategy, action):
+            logger.warning(f"{strategy} {action} signal expired, {len(chat_ids) - index} chats skipped")
+            counters.incr("signals_expired")
+            break
+        if send_telegram_message(chat_id, message, engine):
+            sent += 1
+            delivery_latency.observe(time.monotonic() - received_at)
+            if born is not None:
+                signal_ages.observe(max(time.time() - born, 0.0))
+    return sent
+
+def wants_message(chat_id, message_type):
+    """Honor preferences set through the bot menu (shared store only)"""
+    prefs = shared_state.get_prefs(chat_id) if shared_state else None
+    if not prefs:
+        return True
+    if not prefs.get('notifications_enabled', True):
+        return False
+    if message_type == "price":
+        return prefs.get('price_alerts_enabled', True)
+    return prefs.get('signal_alerts_enabled', True)
+
 def format_trading_signal(data):
     """Format TradingView signal into readable message"""
     
@@ -83,6 +145,11 @@ def format_trading_signal(data):
 @app.route('/webhook', methods=['POST'])
 def webhook():
     """Receive TradingView webhook alerts"""
+    received_at = time.monotonic()
+    capture = get_webhook_capture()
+    if capture:
+        capture.append(request.get_data())
+    
     try:
         # Check content type
         if not request.is_json:
@@ -91,23 +158,66 @@ def webhook():
         
         data = request.get_json()
         logger.info(f"Received webhook: {json.dumps(data, indent=2)}")
+        counters.incr("webhooks_received")
+        
+        # The secret picks the tenant: its filters, chats and rate budget
+        tenant = tenant_registry.resolve(data.get('secret'))
+        if tenant is None:
+            logger.warning("Webhook with an unknown secret rejected")
+            return jsonify({"error": "Invalid secret"}), 401
         
-        # Verify webhook secret if configured
-        if Config.WEBHOOK_SECRET and Config.WEBHOOK_SECRET != "default_secret":
-            received_secret = data.get('secret')
-            if received_secret != Config.WEBHOOK_SECRET:
-                logger.warning(f"Invalid webhook secret received: {received_secret}")
-                return jsonify({"error": "Invalid secret"}), 401
+        # TradingView retries on timeouts; the retry may land on another worker
+        if not deduplicator.first_seen(request.get_data()):
+            logger.info("Duplicate webhook ignored")
+            counters.incr("webhooks_duplicate")
+            return jsonify({"status": "duplicate", "message": "Signal already processed"}), 200
         
         # Format the signal message
         formatted_message = format_trading_signal(data)
+        action = data.get('action', '').upper()
+        message_type = "price" if action in ['PRICE_UPDATE', 'PRICE_MOVEMENT'] else "signal"
+        
+        # Send to the tenant's chats (one config snapshot for the whole signal)
+        filters = tenant.filters
+        symbol = data.get('symbol', data.get('ticker', '')).split(':')[-1]
+        strategy = data.get('strategy', data.get('indicator', ''))
+        if not filters.allows_token(symbol) or not filters.allows_strategy(strategy):
+            return jsonify({"status": "filtered", "message": f"{symbol} not enabled for {tenant.name}"}), 200
         
-        # Send to all allowed chat IDs
-        if Config.ALLOWED_CHAT_IDS:
-            sent_count = 0
-            for chat_id in Config.ALLOWED_CHAT_IDS:
-                if send_telegram_message(chat_id, formatted_message):
-                    sent_count += 1
+        signal_history.record(symbol, action, strategy, data.get('price', data.get('close')))
+        strategy_registry.observe({**data, 'symbol': symbol, 'strategy': strategy})
+        strategy_analytics.observe({**data, 'symbol': symbol, 'strategy': strategy})
+        route = channel_broadcaster.route(strategy) if tenant is tenant_registry.default else None
+        if message_type == "signal" and route:
+            # One post to the channel instead of one message per subscriber; if it fails they get the signal
+            recipients = [chat_id for chat_id in delivery_engine.deliverable(filters.chat_ids)
+                          if wants_message(chat_id, message_type)]
+            signal = (received_at, parse_timestamp(data.get('timestamp')), strategy, action)
+            post = channel_broadcaster.poster(
+                route, lambda link: format_notice(symbol, action, data.get('price', 'N/A'), strategy, link),
+                recipients,
+                lambda chat_ids, text: counters.incr("messages_sent", broadcast_message(chat_ids, text, signal)))
+
+            def post_to_channel():
+                try:
+                    counters.incr("channel_posts", 1 if post(route.target, formatted_message).ok else 0)
+                except Exception as e:
+                    logger.error(f"Channel post to {route.target} failed: {e}")
+
+            channel_posts.submit(post_to_channel)
+            return jsonify({
+                "status": "success",
+                "message": f"Signal queued for {route.target}",
+                "symbol": data.get('symbol', 'Unknown')
+            }), 200
+        if filters.chat_ids:
+            recipients = [
+                chat_id for chat_id in tenant.engine.deliverable(filters.chat_ids)
+                if wants_message(chat_id, message_type)
+            ]
+            signal = (received_at, parse_timestamp(data.get('timestamp')), strategy, action)
+            sent_count = broadcast_message(recipients, formatted_message, signal, tenant.engine)
+            counters.incr("messages_sent", sent_count)
             
             return jsonify({
                 "status": "success",
@@ -149,11 +259,9 @@ def test_endpoint():
     # Format the signal message
     formatted_message = format_trading_signal(data)
     
-    if Config.ALLOWED_CHAT_IDS:
-        sent_count = 0
-        for chat_id in Config.ALLOWED_CHAT_IDS:
-            if send_telegram_message(chat_id, formatted_message):
-                sent_count += 1
+    filters = config_store.current()
+    if filters.chat_ids:
+        sent_count = broadcast_message(delivery_engine.deliverable(filters.chat_ids), formatted_message)
         
         return jsonify({
             "status": "success",
@@ -174,11 +282,22 @@ def health():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "config": {
-            "allowed_tokens": len(Config.ALLOWED_TOKENS),
-            "allowed_strategies": len(Config.ALLOWED_STRATEGIES), 
-            "allowed_chats": len(Config.ALLOWED_CHAT_IDS),
-            "webhook_secret_configured": bool(Config.WEBHOOK_SECRET and Config.WEBHOOK_SECRET != "default_secret")
-        }
+            **config_store.current().summary(),
+            "webhook_secret_configured": bool(Config.WEBHOOK_SECRET and Config.WEBHOOK_SECRET != "default_secret"),
+            "tenants": len(tenant_registry)
+        },
+        "delivery": {
+            "open_circuits": len(delivery_engine.retry_engine.breakers.open_chats()),
+            "retry_after_remaining": round(delivery_engine.retry_engine.gate.remaining(), 1),
+            "suppressed_chats": len(delivery_engine.suppression),
+            "latency": delivery_latency.summary(),
+            "signal_age": signal_ages.summary()
+        },
+        "counters": counters.snapshot(),
+        "history": signal_history.stats(),
+        "strategies": strategy_registry.summary(),
+        "channel_broadcast": channel_broadcaster.stats() if channel_broadcaster.routes else None,
+        "shared_state": bool(shared_state)
     })
 
 @app.route('/', methods=['GET'])
@@ -190,7 +309,9 @@ def home():
         "endpoints": {
             "webhook": "/webhook (POST) - Receive TradingView alerts",
             "test": "/test (GET/POST) - Test signal sending", 
-            "health": "/health (GET) - Health check"
+            "health": "/health (GET) - Health check",
+            "history": "/history (GET) - Recent signals by symbol/strategy/action/time",
+            "reload": "/admin/reload (POST, X-Admin-Token) - Reload filters and chat lists"
         },
         "bot_username": "@tradepods_bot"
     })
@@ -202,5 +323,6 @@ if __name__ == '__main__':
     logger.info(f"Server will run on port {port}")
     logger.info(f"Webhook endpoint: /webhook")
     logger.info(f"Test endpoint: /test")
+    install_reload_signal_handler()
     
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file